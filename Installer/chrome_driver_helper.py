@@ -174,8 +174,12 @@ def download_old_chrome_driver_manually(download_path):
     return None
 
 
-def setup_chrome_driver():
-    """Настройка ChromeDriver с учетом старых версий"""
+def setup_chrome_driver(headless=False, configure_options=None):
+    """Настройка ChromeDriver с учетом старых версий (headless - без окна браузера)
+
+    configure_options - функция, которая получает основные Options перед запуском
+    (например, облегченный профиль для автоматизации).
+    """
     system = platform.system().lower()
     print(f"Определение системы: {system}")
     
@@ -230,7 +234,12 @@ def setup_chrome_driver():
         options.add_argument('--disable-dev-shm-usage')
     
     options.add_argument('--disable-blink-features=AutomationControlled')
-    options.add_argument('--start-maximized')
+    if headless:
+        # На сервере без дисплея окно не создается, размер задаем явно
+        options.add_argument('--headless=new')
+        options.add_argument('--window-size=1920,1080')
+    else:
+        options.add_argument('--start-maximized')
     options.add_experimental_option('excludeSwitches', ['enable-logging'])
     
     # Для старых версий Chrome добавляем дополнительные опции
@@ -244,6 +253,9 @@ def setup_chrome_driver():
             options.add_experimental_option("useAutomationExtension", False)
             options.add_experimental_option("excludeSwitches", ["enable-automation"])
     
+    if configure_options:
+        configure_options(options)
+    
     # Установка драйвера с сервисом
     service = Service(driver_path)
     
@@ -261,6 +273,9 @@ def setup_chrome_driver():
             if system in ["linux", "redos"]:
                 simple_options.add_argument('--no-sandbox')
                 simple_options.add_argument('--disable-dev-shm-usage')
+            if headless:
+                simple_options.add_argument('--headless=new')
+                simple_options.add_argument('--window-size=1920,1080')
             
             simple_options.add_experimental_option('excludeSwitches', ['enable-logging'])
             driver = webdriver.Chrome(service=service, options=simple_options)
@@ -283,6 +298,8 @@ def setup_chrome_driver():
                     if system in ["linux", "redos"]:
                         minimal_options.add_argument('--no-sandbox')
                         minimal_options.add_argument('--disable-dev-shm-usage')
+                    if headless:
+                        minimal_options.add_argument('--headless')
                     
                     driver = webdriver.Chrome(executable_path=driver_path, options=minimal_options)
                     print("ChromeDriver успешно настроен (минимальные опции)")
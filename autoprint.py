@@ -11,6 +11,9 @@ import getpass
 import shutil
 from datetime import datetime
 
+# Форматы скриншотов массового обработчика (png, jpeg, webp)
+IMAGE_PATTERNS = ("*.png", "*.jpg", "*.jpeg", "*.webp")
+
 def setup_printer():
     """Настройка принтера (ваш оригинальный код)"""
     try:
@@ -225,7 +228,7 @@ def main():
     
     folder_path = simpledialog.askstring(
         "Выбор папки",
-        f"Введите путь к папке с PNG файлами:",
+        f"Введите путь к папке со скриншотами (PNG, JPEG, WebP):",
         initialvalue=default_path
     )
     root.destroy()
@@ -234,15 +237,16 @@ def main():
         print("Папка не существует или не указана")
         return
     
-    # Получаем список PNG файлов
-    png_files = sorted(glob.glob(os.path.join(folder_path, "*.png")))
+    # Получаем список скриншотов (по номеру семьи в имени файла)
+    png_files = sorted(path for pattern in IMAGE_PATTERNS
+                       for path in glob.glob(os.path.join(folder_path, pattern)))
     
     if not png_files:
-        print("PNG файлы не найдены в указанной папке")
+        print("Скриншоты не найдены в указанной папке")
         return
     
     total_files = len(png_files)
-    print(f"Найдено {total_files} PNG файлов")
+    print(f"Найдено {total_files} скриншотов")
     
     # Создаем папку для сохранения напечатанных файлов с текущей датой
     printed_dir = create_printed_directory_with_date(folder_path)
@@ -19,6 +19,7 @@ from utils.file_utils import setup_config_directory
 from utils.validation import validate_family_data
 from utils.excel_utils import load_register_file, load_adpi_file, parse_adpi_date, parse_single_date, normalize_fio, is_fio_similar
 from utils.family_processor import FamilyDataProcessor
+from utils.register_cache import ParsedFileCache
 from common.gui_components import BaseGUI
 from family_creator.json_generator import JSONFamilyCreator
 
@@ -59,6 +60,8 @@ class JSONFamilyCreatorGUI(BaseGUI):
         self.registry_dir = self.find_registry_directory(current_dir)
         self.register_dir = self.registry_dir
         self.adpi_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "adpi")
+        # Кэш разобранных файлов реестра и АДПИ
+        self.parsed_file_cache = ParsedFileCache(os.path.join(self.config_dir, "cache"))
         
         # Инициализация переменных, которые могли быть пропущены
         self.last_register_directory = None
@@ -276,7 +279,7 @@ class JSONFamilyCreatorGUI(BaseGUI):
             self.json_creator.last_register_directory = self.last_register_directory
             self.json_creator.save_config()
             
-            self.register_data = load_register_file(file_path)
+            self.register_data = self.parsed_file_cache.load(file_path, load_register_file)
             
             # Синхронизируем данные с процессором
             self.processor.register_data = self.register_data
@@ -360,7 +363,7 @@ class JSONFamilyCreatorGUI(BaseGUI):
             self.json_creator.last_adpi_directory = self.last_adpi_directory
             self.json_creator.save_config()
             
-            loaded_adpi_data = load_adpi_file(file_path)
+            loaded_adpi_data = self.parsed_file_cache.load(file_path, load_adpi_file)
             if loaded_adpi_data is not None:
                 self.adpi_data = loaded_adpi_data
                 # Синхронизируем данные с процессором
@@ -1,6 +1,25 @@
-"""Mass Processor module entry point"""
+"""Mass Processor module entry point
+
+python -m mass_processor                 - графический интерфейс
+python -m mass_processor run <file.json> - пакетная обработка без GUI
+python -m mass_processor mock            - локальная копия страниц сайта для проверки
+python -m mass_processor bench           - замер скорости обработки на локальной копии сайта
+"""
+
+import sys
 
-from .main import main
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "run":
+        from .batch_runner import main as batch_main
+        sys.exit(batch_main(sys.argv[2:]))
+    elif command == "mock":
+        from .mock_site import main as mock_main
+        sys.exit(mock_main(sys.argv[2:]))
+    elif command == "bench":
+        from .benchmark import main as bench_main
+        sys.exit(bench_main(sys.argv[2:]))
+    else:
+        from .main import main
+        main()
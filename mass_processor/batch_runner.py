@@ -0,0 +1,442 @@
+"""Пакетная обработка семей без графического интерфейса
+
+Пример запуска:
+    python -m mass_processor run families.json --workers 4 --headless --jsonl progress.jsonl
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+# Добавляем пути к корню проекта и к Installer (chrome_driver_helper)
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_DIR)
+sys.path.append(os.path.join(PROJECT_DIR, "Installer"))
+
+from mass_processor.core import ENGINES, FILL_MODES, AutoFormFillerMass, MassFamilyProcessorGUI, create_form_filler
+from mass_processor.worker_pool import FamilyWorkerPool
+from mass_processor.card_cache import CardCache
+from mass_processor.timing import TimingRecorder
+from mass_processor.journal import ProcessingJournal
+from mass_processor.session_store import SessionStore
+from mass_processor.screenshot_writer import SCREENSHOT_FORMATS, ScreenshotWriter
+from mass_processor.deferred_queue import DeferredQueue, DEFERRED_STATUS, describe_entry
+from utils.file_utils import setup_config_directory, load_config
+
+
+class HeadlessHost:
+    """Замена MassFamilyProcessorGUI для AutoFormFillerMass при работе без дисплея
+
+    Сообщения пишутся в stdout, события по семьям - в JSONL файл.
+    Вопросы оператору получают ответ по умолчанию, ручное вмешательство невозможно.
+    """
+
+    # Оператора нет: AutoFormFillerMass не будет ждать ручного вмешательства
+    interactive = False
+
+    def __init__(self, jsonl_path=None, quiet=False):
+        self.is_processing = True
+        self.manual_intervention_required = False
+        self.quiet = quiet
+        self.lock = threading.Lock()
+        self.jsonl_file = None
+
+        if jsonl_path:
+            self.jsonl_file = open(jsonl_path, 'a', encoding='utf-8')
+
+    def log_message(self, message):
+        """Вывод сообщения в stdout"""
+        if self.quiet:
+            return
+        self._print(message)
+
+    def progress(self, message):
+        """Вывод строки прогресса (выводится и в режиме quiet)"""
+        self._print(message)
+
+    def emit(self, event, **fields):
+        """Запись события в JSONL файл"""
+        if not self.jsonl_file:
+            return
+        record = {'time': datetime.now().isoformat(timespec='seconds'), 'event': event}
+        record.update(fields)
+        with self.lock:
+            self.jsonl_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.jsonl_file.flush()
+
+    def ask_yes_no(self, title, message, default=True):
+        """Ответ по умолчанию вместо диалога"""
+        self.log_message(f"🤖 {title}: автоматический ответ - {'да' if default else 'нет'}")
+        return default
+
+    def ask_input(self, title, text):
+        """Ввести строку некому - возвращаем пустой ответ"""
+        self.log_message(f"🤖 {title}: ввод недоступен без оператора")
+        return None
+
+    def show_info(self, title, message):
+        """Информационное сообщение в лог"""
+        self.log_message(f"ℹ️ {title}: {message}")
+
+    def show_error(self, title, message):
+        """Сообщение об ошибке в лог"""
+        self._print(f"❌ {title}: {message}")
+
+    def close(self):
+        """Закрытие JSONL файла"""
+        if self.jsonl_file:
+            self.jsonl_file.close()
+            self.jsonl_file = None
+
+    def _print(self, message):
+        timestamp = datetime.now().strftime("[%H:%M:%S]")
+        with self.lock:
+            print(f"{timestamp} {message}", flush=True)
+
+
+def load_families(json_path):
+    """Загрузка и нормализация семей из JSON файла"""
+    with open(json_path, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+
+    if not isinstance(data, list):
+        raise ValueError("JSON должен содержать массив семей")
+
+    families = []
+    for i, family in enumerate(data, 1):
+        try:
+            normalized_family = MassFamilyProcessorGUI.normalize_family_data(family)
+            normalized_family['status'] = 'ожидает'
+            normalized_family['error_message'] = ''
+            families.append(normalized_family)
+        except Exception as e:
+            print(f"⚠️ Ошибка загрузки семьи {i}: {e}")
+    return families
+
+
+def load_default_settings():
+    """Настройки по умолчанию из конфигурации GUI массового обработчика"""
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    try:
+        config_dir, screenshots_dir, logs_dir = setup_config_directory(app_dir)
+    except Exception as e:
+        print(f"⚠️ Не удалось создать папку конфигурации: {e}")
+        config_dir = screenshots_dir = logs_dir = app_dir
+
+    default_config = {
+        "pause": "0.5",
+        "screenshot": True,
+        "screenshot_dir": screenshots_dir,
+        "screenshot_format": "jpeg",
+        "screenshot_quality": "85",
+        "screenshot_max_width": "0",
+        "workers": "1",
+        "engine": "selenium",
+        "fill_mode": "batch",
+        "base_url": AutoFormFillerMass.BASE_URL,
+        "card_cache": True,
+        "spare_browser": True,
+        "recycle_after": "150",
+        "memory_limit_mb": "1500",
+        "card_cache_file": os.path.join(config_dir, "card_cache.json"),
+        "session_file": os.path.join(config_dir, "session_cookies.json"),
+        "logs_dir": logs_dir
+    }
+    return load_config(os.path.join(config_dir, "mass_processor_config.json"), default_config)
+
+
+def run_batch(json_path, workers=1, headless=True, jsonl_path=None, screenshot_dir=None,
+              pause=0.5, start_index=1, stop_on_error=False, quiet=False, engine="selenium",
+              base_url=None, fill_mode="batch", card_cache_path=None, timing_path=None, journal_path=None,
+              keep_spare=True, recycle_after=150, memory_limit_mb=1500, session_path=None,
+              light_browser=True, screenshot_format="jpeg", screenshot_quality=85, screenshot_max_width=0):
+    """Обработка всех семей из JSON файла. Возвращает словарь с итогами
+
+    journal_path - журнал статусов: семьи, успешно обработанные в прошлом
+    (в том числе прерванном) запуске, пропускаются.
+    keep_spare, recycle_after, memory_limit_mb - запасной браузер и плановый
+    перезапуск браузеров (см. DriverManager).
+    session_path - файл cookie сессии: браузеры входят по сессии прошлого входа.
+    Внутри запуска сессия общая для всех браузеров и без файла.
+    light_browser - облегченный профиль Chrome (см. browser_profile).
+    screenshot_format, screenshot_quality, screenshot_max_width - формат, качество
+    и ширина скриншотов; файлы записываются в фоне (см. ScreenshotWriter).
+    """
+    families = load_families(json_path)
+    journal = ProcessingJournal(journal_path) if journal_path else None
+    restored = journal.restore(families) if journal else {}
+    host = HeadlessHost(jsonl_path=jsonl_path, quiet=quiet)
+    card_cache = CardCache(card_cache_path) if card_cache_path else None
+    session_store = SessionStore(session_path)
+    timing = TimingRecorder(timing_path)
+    screenshot_writer = None
+    if screenshot_dir:
+        screenshot_writer = ScreenshotWriter(screenshot_format, screenshot_quality, screenshot_max_width,
+                                             log=host.log_message)
+    summary = {'total': len(families), 'success': 0, 'error': 0, 'skipped': 0, 'deferred': 0}
+    # Семьи, которым нужен оператор: откладываются без повторов и выводятся в итогах
+    deferred_queue = DeferredQueue()
+    started_at = time.time()
+    counters_lock = threading.Lock()
+
+    try:
+        host.progress(f"🚀 Пакетная обработка: {len(families)} семей из {os.path.basename(json_path)}, "
+                      f"движок: {engine}, браузеров: {workers}{', headless' if headless else ''}")
+        host.emit('batch_started', file=os.path.abspath(json_path), total=len(families),
+                  workers=workers, headless=headless, engine=engine)
+        if restored:
+            host.progress("♻️ Статусы восстановлены из журнала обработки ("
+                          + ", ".join(f"{status}: {count}" for status, count in restored.items()) + ")")
+
+        def set_status(index, family, status, error_message=None):
+            family['status'] = status
+            if error_message is not None:
+                family['error_message'] = error_message
+            if journal:
+                journal.record(family, status, family.get('error_message', ''), index)
+
+        tasks = []
+        for i, family in enumerate(families):
+            if i < start_index - 1:
+                continue
+            if family['status'] == 'успешно':
+                summary['skipped'] += 1
+                host.emit('family_finished', index=i + 1, mother_fio=family.get('mother_fio', ''),
+                          status='пропущено', error='Уже обработана (по журналу)', elapsed=0.0)
+                continue
+            if not family.get('mother_fio') and not family.get('father_fio'):
+                set_status(i, family, 'пропущено', 'Не указано ФИО матери или отца')
+                summary['skipped'] += 1
+                host.emit('family_finished', index=i + 1, mother_fio='', status=family['status'],
+                          error=family['error_message'], elapsed=0.0)
+                continue
+            tasks.append((i, family))
+
+        def create_filler():
+            filler = create_form_filler(host, engine, base_url, fill_mode, card_cache, timing, session_store)
+            filler.headless = headless
+            filler.light_browser = light_browser
+            filler.screenshot_writer = screenshot_writer
+            filler.defer_manual = True
+            return filler
+
+        pool = FamilyWorkerPool(host, create_filler, workers=workers,
+                                screenshot_dir=screenshot_dir, pause=pause, keep_spare=keep_spare,
+                                recycle_after=recycle_after, memory_limit_mb=memory_limit_mb)
+        family_started_at = {}
+
+        def on_family_started(index, family, worker_id):
+            set_status(index, family, 'в процессе')
+            family_started_at.setdefault(index, time.time())
+            host.emit('family_started', index=index + 1, mother_fio=family.get('mother_fio', ''),
+                      worker=worker_id)
+
+        def on_family_finished(index, family, success, worker_id):
+            elapsed = round(time.time() - family_started_at.get(index, time.time()), 2)
+            with counters_lock:
+                if success:
+                    set_status(index, family, 'успешно', '')
+                    summary['success'] += 1
+                else:
+                    set_status(index, family, 'ошибка', 'Не удалось обработать')
+                    summary['error'] += 1
+                    if stop_on_error:
+                        pool.cancel_pending()
+                done = summary['success'] + summary['error'] + summary['skipped'] + summary['deferred']
+
+            icon = "✅" if success else "❌"
+            host.progress(f"{icon} [{done}/{len(families)}] Семья {index + 1}: "
+                          f"{family.get('mother_fio', '')} - {family['status']} ({elapsed} сек)")
+            host.emit('family_finished', index=index + 1, mother_fio=family.get('mother_fio', ''),
+                      status=family['status'], error=family['error_message'],
+                      worker=worker_id, elapsed=elapsed)
+
+        def on_family_deferred(index, family, reason, cards, worker_id):
+            elapsed = round(time.time() - family_started_at.get(index, time.time()), 2)
+            with counters_lock:
+                set_status(index, family, DEFERRED_STATUS, reason)
+                deferred_queue.add(index, family, reason, cards, worker_id=worker_id)
+                summary['deferred'] += 1
+                done = summary['success'] + summary['error'] + summary['skipped'] + summary['deferred']
+
+            host.progress(f"⏸️ [{done}/{len(families)}] Семья {index + 1}: "
+                          f"{family.get('mother_fio', '')} - нужен оператор: {reason}")
+            host.emit('family_deferred', index=index + 1, mother_fio=family.get('mother_fio', ''),
+                      reason=reason, cards=cards, worker=worker_id, elapsed=elapsed)
+
+        pool.on_family_started = on_family_started
+        pool.on_family_finished = on_family_finished
+        pool.on_family_deferred = on_family_deferred
+
+        if tasks:
+            try:
+                pool.run(tasks)
+            except KeyboardInterrupt:
+                host.progress("⏹️ Остановка по Ctrl+C...")
+                host.is_processing = False
+                pool.stop()
+
+        # Дожидаемся записи скриншотов, поставленных в очередь исполнителями
+        if screenshot_writer:
+            screenshot_writer.close()
+            summary['screenshots'] = screenshot_writer.written
+
+        # Семьи, не взятые в работу из-за остановки, в журнале снова ожидают обработки
+        for index, family in tasks:
+            if family['status'] == 'в процессе':
+                set_status(index, family, 'ожидает')
+        summary['pending'] = sum(1 for _, family in tasks if family['status'] == 'ожидает')
+        summary['duration'] = round(time.time() - started_at, 1)
+        minutes = summary['duration'] / 60
+        summary['families_per_minute'] = round(summary['success'] / minutes, 2) if minutes > 0 else 0.0
+        # Неудачные попытки и повторы по классам ошибок
+        summary['failures'] = {failure: {'attempts': count, 'retries': pool.scheduler.retries[failure]}
+                               for failure, count in pool.scheduler.failures.items()}
+
+        host.emit('batch_finished', **summary)
+        host.progress("📊 Итоги пакетной обработки:")
+        host.progress(f"   Всего семей: {summary['total']}")
+        host.progress(f"   ✅ Успешно: {summary['success']}")
+        host.progress(f"   ❌ С ошибками: {summary['error']}")
+        host.progress(f"   ⏭️ Пропущено: {summary['skipped']}")
+        host.progress(f"   ⏸️ Нужен оператор: {summary['deferred']}")
+        host.progress(f"   ⏳ Не обработано: {summary['pending']}")
+        host.progress(f"   ⏱️ Время: {summary['duration']} сек ({summary['families_per_minute']} семей/мин)")
+
+        if len(deferred_queue):
+            host.progress("🛠️ Семьи для обработки с оператором (в GUI или в браузере):")
+            for entry in deferred_queue.entries():
+                for line in describe_entry(entry).splitlines():
+                    host.progress(f"   {line}")
+
+        for line in pool.scheduler.report_lines():
+            host.progress(line)
+
+        summary['timing'] = timing.summary()
+        host.emit('timing_summary', **summary['timing'])
+        for line in timing.report_lines():
+            host.progress(line)
+        return summary
+    finally:
+        timing.close()
+        if journal:
+            journal.close()
+        host.close()
+
+
+def main(argv=None):
+    """Точка входа командной строки: python -m mass_processor run families.json"""
+    settings = load_default_settings()
+
+    parser = argparse.ArgumentParser(
+        prog="python -m mass_processor run",
+        description="Пакетная обработка семей из JSON файла без графического интерфейса"
+    )
+    parser.add_argument("json_file", help="JSON файл с массивом семей")
+    parser.add_argument("--workers", type=int, default=int(settings.get("workers", 1) or 1),
+                        help="количество параллельных браузеров (1..8)")
+    parser.add_argument("--headless", action="store_true", help="запуск Chrome без окна")
+    parser.add_argument("--engine", choices=ENGINES, default=settings.get("engine", "selenium"),
+                        help="движок обработки: selenium (Chrome) или http (прямые запросы)")
+    parser.add_argument("--fill-mode", choices=FILL_MODES, default=settings.get("fill_mode", "batch"),
+                        help="заполнение формы: batch (одним запросом) или classic (по одному полю)")
+    parser.add_argument("--base-url", default=settings.get("base_url"),
+                        help="адрес приложения, например http://localhost:8080/aspnetkp")
+    parser.add_argument("--card-cache",
+                        default=settings.get("card_cache_file") if settings.get("card_cache", True) else None,
+                        help="файл кэша найденных карточек (повторная обработка без поиска)")
+    parser.add_argument("--no-card-cache", action="store_true", help="не использовать кэш карточек")
+    parser.add_argument("--timing",
+                        default=os.path.join(settings.get("logs_dir", "."),
+                                             f"timing_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"),
+                        help="файл трассировки времени фаз по семьям (JSONL)")
+    parser.add_argument("--journal",
+                        help="журнал статусов семей: при повторном запуске с тем же журналом "
+                             "успешно обработанные семьи пропускаются (продолжение после сбоя)")
+    parser.add_argument("--spare-browser", dest="spare_browser", action="store_true",
+                        help="держать запасной браузер с выполненным входом для быстрой замены")
+    parser.add_argument("--no-spare-browser", dest="spare_browser", action="store_false",
+                        help="не держать запасной браузер")
+    parser.set_defaults(spare_browser=bool(settings.get("spare_browser", True)))
+    parser.add_argument("--light-browser", dest="light_browser", action="store_true",
+                        help="облегченный Chrome: без картинок и шрифтов, небольшое окно, профиль в памяти")
+    parser.add_argument("--no-light-browser", dest="light_browser", action="store_false",
+                        help="полная загрузка страниц в Chrome")
+    parser.set_defaults(light_browser=bool(settings.get("light_browser", True)))
+    parser.add_argument("--recycle-after", type=int, default=int(settings.get("recycle_after", 150) or 0),
+                        help="перезапуск браузера после стольких семей (0 - не перезапускать)")
+    parser.add_argument("--memory-limit", type=int, default=int(settings.get("memory_limit_mb", 1500) or 0),
+                        help="перезапуск браузера при превышении памяти, МБ (0 - без ограничения)")
+    parser.add_argument("--session-file", default=settings.get("session_file"),
+                        help="файл cookie сессии: новые браузеры входят без формы входа")
+    parser.add_argument("--no-session-file", action="store_true",
+                        help="не сохранять сессию между запусками")
+    parser.add_argument("--jsonl", help="файл для событий прогресса в формате JSONL")
+    parser.add_argument("--screenshots",
+                        default=settings.get("screenshot_dir") if settings.get("screenshot", True) else None,
+                        help="папка для скриншотов")
+    parser.add_argument("--no-screenshots", action="store_true", help="не делать скриншоты")
+    parser.add_argument("--screenshot-format", choices=list(SCREENSHOT_FORMATS),
+                        default=settings.get("screenshot_format", "jpeg"),
+                        help="формат скриншотов (jpeg/webp в несколько раз меньше png)")
+    parser.add_argument("--screenshot-quality", type=int, default=int(settings.get("screenshot_quality", 85) or 85),
+                        help="качество jpeg/webp, 1-100")
+    parser.add_argument("--screenshot-width", type=int, default=int(settings.get("screenshot_max_width", 0) or 0),
+                        help="уменьшать скриншоты до этой ширины, px (0 - не уменьшать)")
+    parser.add_argument("--pause", type=float, default=float(settings.get("pause", 0.5) or 0),
+                        help="пауза между семьями, сек")
+    parser.add_argument("--start", type=int, default=1, help="номер семьи, с которой начать")
+    parser.add_argument("--stop-on-error", action="store_true",
+                        help="не брать новые семьи после первой ошибки")
+    parser.add_argument("--quiet", action="store_true", help="выводить только прогресс и итоги")
+    args = parser.parse_args(argv)
+
+    if not 1 <= args.workers <= 8:
+        parser.error("количество браузеров должно быть от 1 до 8")
+    if args.start < 1:
+        parser.error("номер семьи должен быть больше 0")
+
+    screenshot_dir = None
+    if not args.no_screenshots and args.screenshots:
+        screenshot_dir = args.screenshots
+        os.makedirs(screenshot_dir, exist_ok=True)
+
+    try:
+        summary = run_batch(
+            args.json_file,
+            workers=args.workers,
+            headless=args.headless,
+            jsonl_path=args.jsonl,
+            screenshot_dir=screenshot_dir,
+            pause=args.pause,
+            start_index=args.start,
+            stop_on_error=args.stop_on_error,
+            quiet=args.quiet,
+            engine=args.engine,
+            base_url=args.base_url,
+            fill_mode=args.fill_mode,
+            card_cache_path=None if args.no_card_cache else args.card_cache,
+            timing_path=args.timing,
+            journal_path=args.journal,
+            keep_spare=args.spare_browser,
+            recycle_after=args.recycle_after,
+            memory_limit_mb=args.memory_limit,
+            session_path=None if args.no_session_file else args.session_file,
+            light_browser=args.light_browser,
+            screenshot_format=args.screenshot_format,
+            screenshot_quality=args.screenshot_quality,
+            screenshot_max_width=args.screenshot_width
+        )
+    except (OSError, ValueError) as e:
+        print(f"❌ Не удалось загрузить семьи: {e}")
+        return 2
+
+    return 0 if summary['error'] == 0 and summary['pending'] == 0 and summary['deferred'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
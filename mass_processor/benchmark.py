@@ -0,0 +1,198 @@
+"""Замер производительности массового обработчика на локальной копии сайта
+
+Запускает mock_site в фоновом потоке, создает для него N синтетических семей и
+обрабатывает их через run_batch (AutoFormFillerMass с выбранным движком). В итоге
+выводятся семьи в минуту и время по фазам; результат можно сохранить в JSON и
+сравнить со следующим запуском, чтобы проверить эффект изменения.
+
+Пример запуска:
+    python -m mass_processor bench --families 50 --workers 2 --engine http --output bench.json
+    python -m mass_processor bench --families 50 --workers 2 --engine http --compare bench.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_DIR)
+
+from mass_processor.batch_runner import run_batch
+from mass_processor.core import ENGINES, FILL_MODES
+from mass_processor.mock_site import MockDatabase, generate_families, start_mock_site
+
+
+def run_benchmark(families=20, workers=1, engine="http", fill_mode="batch", headless=True,
+                  latency=0.0, jitter=0.0, failure_rate=0.0, drop_rate=0.0, seed=0,
+                  card_cache=False, screenshots=False, quiet=True):
+    """Обработка синтетических семей на локальной копии сайта. Возвращает словарь с результатами"""
+    family_list = generate_families(families, seed)
+    database = MockDatabase()
+    database.load_families(family_list)
+    server = start_mock_site(database, latency=latency, jitter=jitter, failure_rate=failure_rate,
+                             drop_rate=drop_rate, seed=seed)
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="mass_bench_") as work_dir:
+            json_path = os.path.join(work_dir, "families.json")
+            with open(json_path, 'w', encoding='utf-8') as file:
+                json.dump(family_list, file, ensure_ascii=False)
+
+            screenshot_dir = None
+            if screenshots:
+                screenshot_dir = os.path.join(work_dir, "screenshots")
+                os.makedirs(screenshot_dir, exist_ok=True)
+
+            summary = run_batch(
+                json_path,
+                workers=workers,
+                headless=headless,
+                screenshot_dir=screenshot_dir,
+                pause=0,
+                quiet=quiet,
+                engine=engine,
+                base_url=server.base_url,
+                fill_mode=fill_mode,
+                card_cache_path=os.path.join(work_dir, "card_cache.json") if card_cache else None
+            )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    # Успех засчитывается только если запись действительно сохранена в базе
+    saved = len(database.snapshot()['saved'])
+    return {
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'settings': {
+            'families': families,
+            'workers': workers,
+            'engine': engine,
+            'fill_mode': fill_mode,
+            'latency': latency,
+            'jitter': jitter,
+            'failure_rate': failure_rate,
+            'drop_rate': drop_rate,
+            'seed': seed,
+            'card_cache': card_cache,
+            'screenshots': screenshots,
+        },
+        'success': summary['success'],
+        'error': summary['error'],
+        'saved': saved,
+        'duration': summary['duration'],
+        'families_per_minute': summary['families_per_minute'],
+        'server': server.get_stats(),
+        'timing': summary.get('timing', {}),
+    }
+
+
+def report_lines(result, baseline=None):
+    """Строки итогового отчета, при наличии baseline - с изменением относительно него"""
+    settings = result['settings']
+    lines = [
+        f"🏁 Замер: {settings['families']} семей, движок {settings['engine']} ({settings['fill_mode']}), "
+        f"браузеров: {settings['workers']}, задержка {settings['latency']}+{settings['jitter']} сек, "
+        f"сбоев {settings['failure_rate']:.0%}/{settings['drop_rate']:.0%}",
+        f"   ✅ Успешно: {result['success']} (сохранено в базе: {result['saved']}), ❌ с ошибками: {result['error']}",
+        f"   🌐 Запросов к серверу: {result['server']['requests']} "
+        f"(ошибок 500: {result['server']['errors']}, обрывов: {result['server']['drops']})",
+        f"   ⏱️ {result['duration']} сек, {result['families_per_minute']} семей/мин"
+        + _delta(result['families_per_minute'], baseline and baseline.get('families_per_minute')),
+    ]
+
+    timing = result.get('timing') or {}
+    base_phases = (baseline or {}).get('timing', {}).get('phases', {})
+    family = timing.get('family')
+    if family:
+        base_family = (baseline or {}).get('timing', {}).get('family') or {}
+        lines.append(f"   Семья целиком: p50 {family['p50']:.2f} | p95 {family['p95']:.2f} сек"
+                     + _delta(family['p50'], base_family.get('p50'), lower_is_better=True))
+    for name, stats in timing.get('phases', {}).items():
+        lines.append(f"   {name}: p50 {stats['p50']:.2f} | p95 {stats['p95']:.2f} | max {stats['max']:.2f} сек"
+                     + _delta(stats['p50'], base_phases.get(name, {}).get('p50'), lower_is_better=True))
+    return lines
+
+
+def _delta(value, base, lower_is_better=False):
+    """Изменение относительно прошлого замера в процентах"""
+    if not base:
+        return ""
+    change = (value - base) / base * 100
+    better = change < 0 if lower_is_better else change > 0
+    icon = "🟢" if better else ("⚪" if abs(change) < 1 else "🔴")
+    return f" ({icon} {change:+.1f}% к {base})"
+
+
+def main(argv=None):
+    """Точка входа командной строки: python -m mass_processor bench"""
+    parser = argparse.ArgumentParser(
+        prog="python -m mass_processor bench",
+        description="Замер скорости обработки синтетических семей на локальной копии сайта"
+    )
+    parser.add_argument("--families", type=int, default=20, help="количество синтетических семей")
+    parser.add_argument("--workers", type=int, default=1, help="количество параллельных браузеров (1..8)")
+    parser.add_argument("--engine", choices=ENGINES, default="http",
+                        help="движок обработки: selenium (Chrome) или http (прямые запросы)")
+    parser.add_argument("--fill-mode", choices=FILL_MODES, default="batch",
+                        help="заполнение формы: batch (одним запросом) или classic (по одному полю)")
+    parser.add_argument("--show-browser", action="store_true", help="запуск Chrome с окном (по умолчанию headless)")
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка каждого ответа сервера, сек")
+    parser.add_argument("--jitter", type=float, default=0.0, help="случайная добавка к задержке, 0..N сек")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="доля ответов с ошибкой 500 (0..1)")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="доля оборванных соединений (0..1)")
+    parser.add_argument("--seed", type=int, default=0, help="начальное значение генератора случайных чисел")
+    parser.add_argument("--card-cache", action="store_true", help="использовать кэш найденных карточек")
+    parser.add_argument("--screenshots", action="store_true", help="делать скриншоты (во временную папку)")
+    parser.add_argument("--output", help="сохранить результат замера в JSON файл")
+    parser.add_argument("--compare", help="JSON файл прошлого замера для сравнения")
+    parser.add_argument("--verbose", action="store_true", help="выводить сообщения обработчика")
+    args = parser.parse_args(argv)
+
+    if args.families < 1:
+        parser.error("количество семей должно быть больше 0")
+    if not 1 <= args.workers <= 8:
+        parser.error("количество браузеров должно быть от 1 до 8")
+    if not 0 <= args.failure_rate + args.drop_rate <= 1:
+        parser.error("сумма --failure-rate и --drop-rate должна быть от 0 до 1")
+
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.compare, 'r', encoding='utf-8') as file:
+                baseline = json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Не удалось загрузить прошлый замер {args.compare}: {e}")
+
+    result = run_benchmark(
+        families=args.families,
+        workers=args.workers,
+        engine=args.engine,
+        fill_mode=args.fill_mode,
+        headless=not args.show_browser,
+        latency=args.latency,
+        jitter=args.jitter,
+        failure_rate=args.failure_rate,
+        drop_rate=args.drop_rate,
+        seed=args.seed,
+        card_cache=args.card_cache,
+        screenshots=args.screenshots,
+        quiet=not args.verbose
+    )
+
+    print()
+    for line in report_lines(result, baseline):
+        print(line)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(result, file, ensure_ascii=False, indent=2)
+        print(f"💾 Результат замера: {args.output}")
+
+    return 0 if result['error'] == 0 and result['saved'] >= result['success'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
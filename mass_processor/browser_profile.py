@@ -0,0 +1,75 @@
+"""Облегченный профиль Chrome для сессий автоматизации
+
+Страницам базы для работы нужны только HTML и скрипты ASP.NET: картинки, шрифты
+и медиа блокируются через CDP (Network.setBlockedURLs), страница считается
+загруженной по DOMContentLoaded (pageLoadStrategy eager), расширения и фоновые
+службы Chrome отключены, профиль создается во временной папке в памяти
+(/dev/shm, если есть), а окно имеет фиксированный небольшой размер вместо
+развернутого на весь экран. Для скриншота блокировка снимается и окно
+увеличивается только на время сохранения семьи.
+"""
+
+import os
+import shutil
+import tempfile
+
+# Ресурсы, которые не загружаются в облегченном режиме
+BLOCKED_URL_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.bmp', '*.ico', '*.svg', '*.webp',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp3', '*.mp4', '*.avi', '*.webm', '*.swf',
+]
+
+# Аргументы Chrome облегченного режима
+LIGHT_ARGUMENTS = (
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-component-update',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--disable-notifications',
+    '--disable-features=Translate,OptimizationHints,MediaRouter',
+    '--no-first-run',
+    '--no-default-browser-check',
+    '--mute-audio',
+)
+
+# Размер окна в облегченном режиме и на время скриншота
+WINDOW_SIZE = (1280, 900)
+SCREENSHOT_WINDOW_SIZE = (1920, 1080)
+
+
+def make_user_data_dir():
+    """Временная папка профиля Chrome: в памяти (/dev/shm), если она доступна"""
+    base = '/dev/shm' if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK) else None
+    return tempfile.mkdtemp(prefix='mass_chrome_', dir=base)
+
+
+def remove_user_data_dir(path):
+    """Удаление временного профиля после закрытия браузера"""
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def apply_light_options(options, user_data_dir=None):
+    """Настройки облегченного режима для ChromeOptions"""
+    try:
+        options.page_load_strategy = 'eager'
+    except AttributeError:
+        # Старые версии selenium без свойства page_load_strategy
+        options.set_capability('pageLoadStrategy', 'eager')
+    for argument in LIGHT_ARGUMENTS:
+        options.add_argument(argument)
+    options.add_argument(f'--window-size={WINDOW_SIZE[0]},{WINDOW_SIZE[1]}')
+    if user_data_dir:
+        options.add_argument(f'--user-data-dir={user_data_dir}')
+
+
+def set_resource_blocking(driver, enabled):
+    """Включение или снятие блокировки картинок, шрифтов и медиа через CDP; False - CDP недоступен"""
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS if enabled else []})
+        return True
+    except Exception:
+        return False
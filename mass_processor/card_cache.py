@@ -0,0 +1,96 @@
+"""Кэш найденных карточек: ФИО + дата рождения -> адрес страницы CardInfo.aspx
+
+Позволяет при повторной обработке семьи (повтор после ошибки, повторный запуск
+недельного файла) переходить сразу в карточку, минуя поиск и выбор карточки.
+"""
+
+import json
+import os
+import re
+import threading
+from datetime import datetime
+
+
+def normalize_fio(fio):
+    """ФИО для сравнения: нижний регистр, ё -> е, одиночные пробелы"""
+    return re.sub(r"\s+", " ", (fio or "").lower().replace("ё", "е")).strip()
+
+
+# Элемент с ФИО на странице карточки: метка по id, иначе элемент с классом fio
+# (как ФИО в результатах поиска); если нет ни того, ни другого, карточка из кэша не принимается
+CARD_FIO_ID = "ctl00_cph_lblFio"
+CARD_FIO_CLASS = "fio"
+
+
+def fio_matches(expected_fio, card_fio):
+    """ФИО с карточки совпадает с ФИО семьи (без учета регистра, ё/е и лишних пробелов)"""
+    expected = normalize_fio(expected_fio)
+    return bool(expected) and expected == normalize_fio(card_fio)
+
+
+class CardCache:
+    """Кэш адресов карточек, общий для всех браузеров пула
+
+    Записывается в JSON файл сразу после каждого изменения.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.load()
+
+    @staticmethod
+    def make_key(fio, birth):
+        """Ключ записи: нормализованное ФИО и дата рождения"""
+        return f"{normalize_fio(fio)}|{(birth or '').strip()}"
+
+    def load(self):
+        """Загрузка кэша из файла"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            if isinstance(data, dict):
+                self.entries = data
+        except Exception as e:
+            print(f"⚠️ Ошибка загрузки кэша карточек: {e}")
+
+    def get(self, fio, birth):
+        """Адрес карточки или None"""
+        with self.lock:
+            entry = self.entries.get(self.make_key(fio, birth))
+            return entry.get('url') if entry else None
+
+    def put(self, fio, birth, url):
+        """Запоминание адреса карточки"""
+        key = self.make_key(fio, birth)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry.get('url') == url:
+                return
+            self.entries[key] = {
+                'fio': fio,
+                'url': url,
+                'updated': datetime.now().isoformat(timespec='seconds')
+            }
+            self._save()
+
+    def evict(self, fio, birth):
+        """Удаление записи, например если карточка больше не совпадает"""
+        with self.lock:
+            if self.entries.pop(self.make_key(fio, birth), None) is not None:
+                self._save()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _save(self):
+        try:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(self.entries, file, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            print(f"⚠️ Ошибка сохранения кэша карточек: {e}")
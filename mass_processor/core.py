@@ -4,11 +4,13 @@ import customtkinter as ctk
 from tkinter import messagebox, scrolledtext, filedialog
 import threading
 import json
+import base64
 from datetime import datetime, timedelta
 import os
 import re
 import time
 import traceback
+from urllib.parse import urljoin
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -22,6 +24,31 @@ from utils.file_utils import setup_config_directory, load_config, save_config
 from utils.data_processing import clean_string, clean_fio, clean_date, clean_phone
 from utils.validation import validate_family_data
 from common.gui_components import BaseGUI
+from mass_processor.worker_pool import FamilyWorkerPool
+from mass_processor.card_cache import CARD_FIO_CLASS, CARD_FIO_ID, CardCache, fio_matches
+from mass_processor.waits import PAGE_IDLE_SCRIPT, AdaptiveWaiter
+from mass_processor.timing import PhaseTimer, TimingRecorder
+from mass_processor.ui_bus import UiUpdateBus
+from mass_processor.families_table import VirtualFamiliesTable
+from mass_processor.log_store import LOG_FILTERS, ProcessLog
+from mass_processor.journal import ProcessingJournal, journal_path_for, family_key
+from mass_processor.deferred_queue import DeferredQueue, DEFERRED_STATUS, describe_entry
+from mass_processor.driver_manager import DriverManager
+from mass_processor.session_store import SessionStore
+from mass_processor.screenshot_writer import (
+    SCREENSHOT_FORMATS, SCREENSHOT_REGION_ID, SCREENSHOT_REGION_SCRIPT, ScreenshotWriter
+)
+from mass_processor.browser_profile import (
+    SCREENSHOT_WINDOW_SIZE, WINDOW_SIZE, apply_light_options, make_user_data_dir, remove_user_data_dir,
+    set_resource_blocking
+)
+from mass_processor.retry_policy import (
+    DRIVER, NOT_FOUND, STALE, VALIDATION, RetryScheduler, classify_exception, classify_failure
+)
+from mass_processor.form_layout import (
+    FIELD_INDEX_CACHE, LIVING_CONDITIONS_TEXT, checkbox_ids_for, classify_card_address,
+    fallback_field_indices, pick_card_by_fio, resolve_field_indices, score_card_fio
+)
 
 
 class MassFamilyProcessorGUI(BaseGUI):
@@ -31,17 +58,33 @@ class MassFamilyProcessorGUI(BaseGUI):
         self.app.geometry("1200x900")
         self.app.resizable(True, True)
         
+        # Обновления интерфейса из потоков обработки применяются главным потоком по таймеру
+        self.ui_bus = UiUpdateBus(self.app, on_log=self._append_log,
+                                  on_status=self._apply_status, on_progress=self._apply_progress)
+        
         self.families_list = []
         self.current_family_index = 0
         self.is_processing = False
         self.auto_filler = None
+        self.timing_recorder = None
         self.processing_thread = None
         self.driver = None
+        self.driver_manager = None
+        self.worker_pool = None
+        self.retry_scheduler = None
+        self.screenshot_writer = None
+        self.journal = None
         self.manual_intervention_required = False
+        # Семьи, отложенные до прохода с оператором
+        self.deferred_queue = DeferredQueue()
+        self.operator_pass = False
         
         # Организация конфигурационных файлов в отдельную папку
         self.setup_config_directory()
         
+        # Полный журнал на диске (во вкладке логов только последние строки)
+        self.process_log = ProcessLog(self.logs_dir)
+        
         # Файлы конфигурации
         self.config_file = os.path.join(self.config_dir, "mass_processor_config.json")
         self.stats_file = os.path.join(self.config_dir, "processing_statistics.json")
@@ -49,6 +92,12 @@ class MassFamilyProcessorGUI(BaseGUI):
         self.config = self.load_config()
         self.stats = self.load_statistics()
         
+        # Кэш найденных карточек для повторной обработки без поиска
+        self.card_cache = CardCache(os.path.join(self.config_dir, "card_cache.json"))
+        
+        # Cookie сессии после входа: новые браузеры входят без формы входа
+        self.session_store = SessionStore(os.path.join(self.config_dir, "session_cookies.json"))
+        
         # Последний загруженный JSON файл
         self.last_json_path = self.config.get("last_json_path", "")
         
@@ -164,6 +213,8 @@ class MassFamilyProcessorGUI(BaseGUI):
     
     def update_statistics_display(self):
         """Обновление отображения статистики в интерфейсе"""
+        if not self.ui_bus.in_ui_thread():
+            return self.ui_bus.call(self.update_statistics_display)
         try:
             today_stat, week_stat = self.get_statistics_for_period()
             # Проверяем, существует ли виджет перед обновлением
@@ -211,8 +262,21 @@ class MassFamilyProcessorGUI(BaseGUI):
             "pause": "0.5",
             "screenshot": True,
             "stop_on_error": True,
+            "card_cache": True,
+            "spare_browser": True,
+            "light_browser": True,
+            "screenshot_format": "jpeg",
+            "screenshot_quality": "85",
+            "screenshot_max_width": "0",
+            "defer_manual": False,
+            "recycle_after": "150",
+            "memory_limit_mb": "1500",
             "screenshot_dir": self.screenshots_dir,  # Используем папку из конфигурации
             "start_index": "1",
+            "workers": "1",
+            "engine": "selenium",
+            "fill_mode": "batch",
+            "base_url": AutoFormFillerMass.BASE_URL,
             "last_json_path": ""
         }
         
@@ -230,10 +294,26 @@ class MassFamilyProcessorGUI(BaseGUI):
                 self.config["screenshot"] = self.screenshot_var.get()
             if hasattr(self, 'stop_on_error_var'):
                 self.config["stop_on_error"] = self.stop_on_error_var.get()
+            if hasattr(self, 'card_cache_var'):
+                self.config["card_cache"] = self.card_cache_var.get()
+            if hasattr(self, 'spare_browser_var'):
+                self.config["spare_browser"] = self.spare_browser_var.get()
+            if hasattr(self, 'light_browser_var'):
+                self.config["light_browser"] = self.light_browser_var.get()
+            if hasattr(self, 'screenshot_format_var'):
+                self.config["screenshot_format"] = self.screenshot_format_var.get()
+            if hasattr(self, 'defer_manual_var'):
+                self.config["defer_manual"] = self.defer_manual_var.get()
             if hasattr(self, 'screenshot_dir'):
                 self.config["screenshot_dir"] = self.screenshot_dir.get()
             if hasattr(self, 'start_index_var'):
                 self.config["start_index"] = self.start_index_var.get()
+            if hasattr(self, 'workers_var'):
+                self.config["workers"] = self.workers_var.get()
+            if hasattr(self, 'engine_var'):
+                self.config["engine"] = self.engine_var.get()
+            if hasattr(self, 'fill_mode_var'):
+                self.config["fill_mode"] = self.fill_mode_var.get()
             
             return save_config(self.config_file, self.config)
         except Exception as e:
@@ -256,6 +336,7 @@ class MassFamilyProcessorGUI(BaseGUI):
         self.app.protocol("WM_DELETE_WINDOW", self.on_closing)
         
         self.app.after(100, self.check_last_json)
+        self.ui_bus.start()
         
     def on_closing(self):
         """Обработчик закрытия приложения"""
@@ -264,6 +345,11 @@ class MassFamilyProcessorGUI(BaseGUI):
             if self.is_processing:
                 self.stop_processing()
             
+            self.ui_bus.stop()
+            self.process_log.close()
+            if self.journal:
+                self.journal.close()
+            
             # Уничтожаем окно
             self.app.destroy()
         except Exception as e:
@@ -357,19 +443,16 @@ class MassFamilyProcessorGUI(BaseGUI):
                 row=0, column=i, padx=5, pady=2, sticky="ew")
             headers_frame.grid_columnconfigure(i, weight=1)
         
-        self.families_scrollframe = ctk.CTkScrollableFrame(table_frame, height=300)
-        self.families_scrollframe.pack(fill="both", expand=True, padx=5, pady=5)
-        
-        # Привязываем прокрутку колесиком мыши к этому фрейму
-        try:
-            self.families_scrollframe.bind("<MouseWheel>", self._on_mousewheel)
-            self.families_scrollframe.bind("<Button-4>", self._on_mousewheel)
-            self.families_scrollframe.bind("<Button-5>", self._on_mousewheel)
-        except:
-            # Если bind не поддерживается, пропускаем
-            pass
-        
-        self.families_widgets = []
+        # Отрисовываются только видимые строки, прокрутка колесиком - внутри таблицы
+        self.families_table = VirtualFamiliesTable(
+            table_frame,
+            lambda: self.families_list,
+            on_edit=self.edit_family,
+            on_view=self.view_family,
+            on_remove=self.remove_family,
+            height=300
+        )
+        self.families_table.pack(fill="both", expand=True, padx=5, pady=5)
     
     def setup_settings_tab(self):
         """Вкладка настроек автоматизации"""
@@ -407,6 +490,22 @@ class MassFamilyProcessorGUI(BaseGUI):
         ctk.CTkCheckBox(settings_frame, text="Останавливать при ошибке",
                        variable=self.stop_on_error_var).pack(anchor="w", padx=10, pady=5)
         
+        self.card_cache_var = ctk.BooleanVar(value=self.config.get("card_cache", True))
+        ctk.CTkCheckBox(settings_frame, text="Запоминать найденные карточки (повторно без поиска)",
+                       variable=self.card_cache_var).pack(anchor="w", padx=10, pady=5)
+        
+        self.defer_manual_var = ctk.BooleanVar(value=self.config.get("defer_manual", False))
+        ctk.CTkCheckBox(settings_frame, text="Не ждать оператора: откладывать ненайденные семьи и показывать их в конце",
+                       variable=self.defer_manual_var).pack(anchor="w", padx=10, pady=5)
+        
+        self.spare_browser_var = ctk.BooleanVar(value=self.config.get("spare_browser", True))
+        ctk.CTkCheckBox(settings_frame, text="Держать запасной браузер с выполненным входом (быстрая замена при сбое)",
+                       variable=self.spare_browser_var).pack(anchor="w", padx=10, pady=5)
+        
+        self.light_browser_var = ctk.BooleanVar(value=self.config.get("light_browser", True))
+        ctk.CTkCheckBox(settings_frame, text="Облегченный браузер: без картинок и шрифтов, небольшое окно",
+                       variable=self.light_browser_var).pack(anchor="w", padx=10, pady=5)
+        
         dir_frame = ctk.CTkFrame(settings_frame)
         dir_frame.pack(fill="x", padx=10, pady=10)
         
@@ -422,6 +521,15 @@ class MassFamilyProcessorGUI(BaseGUI):
         ctk.CTkButton(dir_frame, text="Выбрать папку",
                      command=self.select_screenshot_dir, width=120).pack(pady=5)
         
+        format_frame = ctk.CTkFrame(dir_frame)
+        format_frame.pack(fill="x", padx=5, pady=2)
+        ctk.CTkLabel(format_frame, text="Формат скриншотов:").pack(side="left", padx=5)
+        self.screenshot_format_var = ctk.StringVar(value=self.config.get("screenshot_format", "jpeg"))
+        ctk.CTkOptionMenu(format_frame, variable=self.screenshot_format_var, values=list(SCREENSHOT_FORMATS),
+                         width=120).pack(side="left", padx=5)
+        ctk.CTkLabel(format_frame, text="jpeg/webp - в несколько раз меньше png",
+                    text_color="gray").pack(side="left", padx=5)
+        
         start_frame = ctk.CTkFrame(settings_frame)
         start_frame.pack(fill="x", padx=10, pady=5)
         
@@ -441,7 +549,47 @@ class MassFamilyProcessorGUI(BaseGUI):
         
         validate_cmd_index = (self.app.register(validate_index_input), '%P')
         self.start_entry.configure(validate="key", validatecommand=validate_cmd_index)
-        
+
+        workers_frame = ctk.CTkFrame(settings_frame)
+        workers_frame.pack(fill="x", padx=10, pady=5)
+
+        ctk.CTkLabel(workers_frame, text="Параллельных браузеров:").pack(side="left", padx=5)
+        self.workers_var = ctk.StringVar(value=self.config.get("workers", "1"))
+        self.workers_entry = ctk.CTkEntry(workers_frame, textvariable=self.workers_var, width=80)
+        self.workers_entry.pack(side="left", padx=5)
+
+        def validate_workers_input(new_value):
+            if new_value == "":
+                return True
+            try:
+                value = int(new_value)
+                return 1 <= value <= 8
+            except:
+                return False
+
+        validate_cmd_workers = (self.app.register(validate_workers_input), '%P')
+        self.workers_entry.configure(validate="key", validatecommand=validate_cmd_workers)
+
+        engine_frame = ctk.CTkFrame(settings_frame)
+        engine_frame.pack(fill="x", padx=10, pady=5)
+
+        ctk.CTkLabel(engine_frame, text="Движок обработки:").pack(side="left", padx=5)
+        self.engine_var = ctk.StringVar(value=self.config.get("engine", "selenium"))
+        ctk.CTkOptionMenu(engine_frame, variable=self.engine_var, values=ENGINES,
+                         width=120).pack(side="left", padx=5)
+        ctk.CTkLabel(engine_frame, text="http - без браузера, прямые запросы к сайту",
+                    text_color="gray").pack(side="left", padx=5)
+
+        fill_mode_frame = ctk.CTkFrame(settings_frame)
+        fill_mode_frame.pack(fill="x", padx=10, pady=5)
+
+        ctk.CTkLabel(fill_mode_frame, text="Заполнение формы:").pack(side="left", padx=5)
+        self.fill_mode_var = ctk.StringVar(value=self.config.get("fill_mode", "batch"))
+        ctk.CTkOptionMenu(fill_mode_frame, variable=self.fill_mode_var, values=FILL_MODES,
+                         width=120).pack(side="left", padx=5)
+        ctk.CTkLabel(fill_mode_frame, text="batch - все поля одним запросом, classic - по одному",
+                    text_color="gray").pack(side="left", padx=5)
+
         ctk.CTkButton(settings_frame, text="💾 Сохранить настройки",
                      command=self.save_settings_ui, width=200, fg_color="green").pack(pady=20)
     
@@ -463,7 +611,15 @@ class MassFamilyProcessorGUI(BaseGUI):
             except ValueError as e:
                 messagebox.showerror("Ошибка", f"Некорректный индекс: {e}")
                 return
-            
+
+            try:
+                workers = int(self.workers_var.get())
+                if workers < 1 or workers > 8:
+                    raise ValueError("Количество браузеров должно быть от 1 до 8")
+            except ValueError as e:
+                messagebox.showerror("Ошибка", f"Некорректное количество браузеров: {e}")
+                return
+
             if self.save_config():
                 messagebox.showinfo("Настройки", "Настройки успешно сохранены!")
             else:
@@ -480,6 +636,27 @@ class MassFamilyProcessorGUI(BaseGUI):
         ctk.CTkLabel(log_frame, text="📊 ЖУРНАЛ ВЫПОЛНЕНИЯ", 
                     font=ctk.CTkFont(size=16, weight="bold")).pack(pady=10)
         
+        # Поиск по полному журналу на диске
+        search_frame = ctk.CTkFrame(log_frame)
+        search_frame.pack(fill="x", padx=10, pady=5)
+        
+        self.log_search_var = ctk.StringVar()
+        search_entry = ctk.CTkEntry(search_frame, textvariable=self.log_search_var,
+                                    placeholder_text="Текст для поиска в журнале", width=300)
+        search_entry.pack(side="left", padx=5)
+        search_entry.bind("<Return>", lambda event: self.search_log())
+        
+        self.log_filter_var = ctk.StringVar(value="Все")
+        ctk.CTkOptionMenu(search_frame, variable=self.log_filter_var,
+                          values=list(LOG_FILTERS), width=150).pack(side="left", padx=5)
+        
+        ctk.CTkButton(search_frame, text="🔍 Найти в журнале",
+                      command=self.search_log, width=150).pack(side="left", padx=5)
+        
+        ctk.CTkLabel(search_frame,
+                     text=f"Во вкладке последние {ProcessLog.MAX_VIEW_LINES} строк, весь журнал: {self.process_log.path}",
+                     font=ctk.CTkFont(size=11)).pack(side="left", padx=10)
+        
         self.log_text = scrolledtext.ScrolledText(log_frame, height=25)
         self.log_text.pack(fill="both", expand=True, padx=10, pady=5)
         self.log_text.config(state="disabled")
@@ -519,6 +696,10 @@ class MassFamilyProcessorGUI(BaseGUI):
         ctk.CTkButton(buttons_frame, text="📋 Очистить логи", 
                      command=self.clear_logs, width=150).pack(side="left", padx=5)
         
+        self.deferred_button = ctk.CTkButton(buttons_frame, text="🛠️ Отложенные: 0",
+                     command=self.show_deferred_families, width=150, fg_color="#b8860b")
+        self.deferred_button.pack(side="left", padx=5)
+        
         self.progress = ctk.CTkProgressBar(log_frame)
         self.progress.pack(fill="x", padx=10, pady=5)
         self.progress.set(0)
@@ -546,20 +727,18 @@ class MassFamilyProcessorGUI(BaseGUI):
             # Останавливаем автоматизацию
             if self.auto_filler:
                 self.auto_filler.stop_processing()
-                
-            # Закрываем драйвер
-            if self.driver:
-                try:
-                    self.driver.quit()
-                    self.driver = None
-                    self.log_message("🔒 Драйвер закрыт")
-                except Exception as e:
-                    self.log_message(f"⚠️ Ошибка при закрытии драйвера: {e}")
-                
+
+            # Останавливаем параллельные браузеры
+            if self.worker_pool:
+                self.worker_pool.stop()
+
+            # Закрываем активный и запасной браузеры
+            self._close_drivers()
+
             # Ждем завершения потока
             if self.processing_thread and self.processing_thread.is_alive():
                 self.processing_thread.join(timeout=5)
-                
+
             # Разблокируем кнопки
             self.start_button.configure(state="normal")
             self.pause_button.configure(state="disabled")  # Также отключаем кнопку паузы
@@ -634,6 +813,9 @@ class MassFamilyProcessorGUI(BaseGUI):
                 self.config["last_json_path"] = file_path
                 self.save_config()
                 
+                # Статусы прошлого запуска (в том числе прерванного сбоем)
+                self._open_journal(file_path)
+                
                 self.update_families_table()
                 self.update_families_info()
                 self.log_message(f"✅ Загружено {families_loaded} семей из JSON файла: {os.path.basename(file_path)}")
@@ -649,7 +831,8 @@ class MassFamilyProcessorGUI(BaseGUI):
             messagebox.showerror("Ошибка", f"Не удалось загрузить JSON: {str(e)}")
             self.log_message(f"❌ Ошибка загрузки JSON: {e}")
     
-    def normalize_family_data(self, family):
+    @staticmethod
+    def normalize_family_data(family):
         """Нормализация данных семьи с разделением доходов"""
         normalized = {}
         
@@ -793,77 +976,29 @@ class MassFamilyProcessorGUI(BaseGUI):
             self.log_message(f"❌ Ошибка вставки: {e}")
     
     def update_families_table(self):
-        """Обновление таблицы семей"""
+        """Обновление таблицы семей (из потока обработки - не чаще одного раза за тик)"""
+        if not self.ui_bus.in_ui_thread():
+            return self.ui_bus.refresh('families_table', self._render_families_table)
+        self._render_families_table()
+    
+    def _render_families_table(self):
+        """Синхронизация видимых строк таблицы семей"""
         try:
-            # Проверяем, существует ли родительский фрейм перед обновлением
-            if not self.families_scrollframe.winfo_exists():
-                return
-                
-            # Сохраняем ссылки на старые виджеты перед их уничтожением
-            old_widgets = list(self.families_widgets)
-            self.families_widgets = []
-            
-            for i, family in enumerate(self.families_list):
-                # Проверяем, существует ли родительский фрейм перед созданием новых виджетов
-                if not self.families_scrollframe.winfo_exists():
-                    break
-                    
-                row_frame = ctk.CTkFrame(self.families_scrollframe)
-                row_frame.pack(fill="x", padx=5, pady=2)
-                
-                ctk.CTkLabel(row_frame, text=str(i+1)).grid(row=0, column=0, padx=5, pady=2)
-                
-                mother_fio = family.get('mother_fio', '')[:30] + ('...' if len(family.get('mother_fio', '')) > 30 else '')
-                ctk.CTkLabel(row_frame, text=mother_fio).grid(row=0, column=1, padx=5, pady=2)
-                
-                ctk.CTkLabel(row_frame, text=family.get('mother_birth', '')).grid(row=0, column=2, padx=5, pady=2)
-                
-                children_count = len(family.get('children', []))
-                ctk.CTkLabel(row_frame, text=str(children_count)).grid(row=0, column=3, padx=5, pady=2)
-                
-                status = family.get('status', 'ожидает')
-                status_label = ctk.CTkLabel(row_frame, text=status)
-                status_label.grid(row=0, column=4, padx=5, pady=2)
-                
-                if status == 'успешно':
-                    status_label.configure(text_color="green")
-                elif status == 'ошибка':
-                    status_label.configure(text_color="red")
-                elif status == 'в процессе':
-                    status_label.configure(text_color="blue")
-                elif status == 'пропущено':
-                    status_label.configure(text_color="orange")
-                elif status == 'ручное вмешательство':
-                    status_label.configure(text_color="purple")
-                
-                actions_frame = ctk.CTkFrame(row_frame, fg_color="transparent")
-                actions_frame.grid(row=0, column=5, padx=5, pady=2)
-                
-                ctk.CTkButton(actions_frame, text="✏️", width=30,
-                             command=lambda idx=i: self.edit_family(idx)).pack(side="left", padx=2)
-                ctk.CTkButton(actions_frame, text="👁️", width=30,
-                             command=lambda idx=i: self.view_family(idx)).pack(side="left", padx=2)
-                ctk.CTkButton(actions_frame, text="❌", width=30,
-                             command=lambda idx=i: self.remove_family(idx)).pack(side="left", padx=2)
-                
-                self.families_widgets.append(row_frame)
-                
-                for j in range(6):
-                    row_frame.grid_columnconfigure(j, weight=1)
-            
-            # Уничтожаем старые виджеты только после создания новых
-            for widget in old_widgets:
-                try:
-                    # Проверяем, существует ли виджет перед уничтожением
-                    if widget.winfo_exists():
-                        widget.destroy()
-                except:
-                    # Игнорируем ошибки при уничтожении, если виджет уже уничтожен
-                    pass
-                    
+            if self.families_table.winfo_exists():
+                self.families_table.refresh()
         except Exception as e:
             self.log_message(f"❌ Ошибка обновления таблицы: {e}")
     
+    def update_family_row(self, index):
+        """Обновление строки одной семьи (статус меняется на месте, без перерисовки таблицы)"""
+        if not self.ui_bus.in_ui_thread():
+            return self.ui_bus.refresh(('family_row', index), lambda: self.update_family_row(index))
+        try:
+            if self.families_table.winfo_exists():
+                self.families_table.refresh_row(index)
+        except Exception as e:
+            self.log_message(f"❌ Ошибка обновления строки таблицы: {e}")
+    
     def update_families_info(self):
         """Обновление информации о загруженных семьях"""
         try:
@@ -884,7 +1019,8 @@ class MassFamilyProcessorGUI(BaseGUI):
                 'успешно': 0,
                 'ошибка': 0,
                 'пропущено': 0,
-                'ручное вмешательство': 0
+                'ручное вмешательство': 0,
+                DEFERRED_STATUS: 0
             }
             
             for family in self.families_list:
@@ -901,6 +1037,8 @@ class MassFamilyProcessorGUI(BaseGUI):
                 info_text += f" | ⏳: {stats['ожидает']}"
             if stats['ручное вмешательство'] > 0:
                 info_text += f" | 🛠️: {stats['ручное вмешательство']}"
+            if stats[DEFERRED_STATUS] > 0:
+                info_text += f" | ⏸️: {stats[DEFERRED_STATUS]}"
                 
             # Проверяем, существует ли виджет перед обновлением
             try:
@@ -1135,8 +1273,31 @@ class MassFamilyProcessorGUI(BaseGUI):
         except Exception as e:
             messagebox.showerror("Ошибка", f"Ошибка выбора директории: {e}")
     
+    def search_log(self):
+        """Поиск по полному журналу на диске с выводом результатов в отдельном окне"""
+        try:
+            query = self.log_search_var.get().strip()
+            log_filter = self.log_filter_var.get()
+            records = self.process_log.search(query, log_filter)
+            
+            dialog = ctk.CTkToplevel(self.app)
+            dialog.title(f"Журнал: {query or 'все записи'} ({log_filter.lower()})")
+            dialog.geometry("1000x600")
+            dialog.transient(self.app)
+            
+            ctk.CTkLabel(dialog, text=f"Найдено записей: {len(records)}"
+                         + (" (показаны последние)" if len(records) >= 2000 else "")).pack(pady=5)
+            
+            results_text = scrolledtext.ScrolledText(dialog)
+            results_text.pack(fill="both", expand=True, padx=10, pady=10)
+            results_text.insert("end", "".join(records) if records else "Ничего не найдено")
+            results_text.see("end")
+            results_text.config(state="disabled")
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Ошибка поиска в журнале: {e}")
+    
     def clear_logs(self):
-        """Очистка логов"""
+        """Очистка логов (файл журнала сохраняется)"""
         try:
             self.log_text.config(state="normal")
             self.log_text.delete("1.0", "end")
@@ -1146,34 +1307,41 @@ class MassFamilyProcessorGUI(BaseGUI):
     
     def update_progress(self, value):
         """Обновление прогресса"""
+        self.ui_bus.set_progress(value)
+    
+    def update_status(self, message):
+        """Обновление статуса"""
+        self.ui_bus.set_status(message)
+    
+    def _apply_progress(self, value):
+        """Прогресс на экране (главный поток)"""
         try:
-            # Проверяем, существует ли виджет перед обновлением
-            try:
-                # Проверяем, что виджет существует и не был уничтожен
-                if self.progress.winfo_exists():
-                    self.progress.set(value)
-                    self.app.update_idletasks()
-            except:
-                # Виджет может быть уничтожен, игнорируем ошибку
-                pass
+            # Проверяем, что виджет существует и не был уничтожен
+            if self.progress.winfo_exists():
+                self.progress.set(value)
         except:
+            # Виджет может быть уничтожен, игнорируем ошибку
             pass
     
-    def update_status(self, message):
-        """Обновление статуса"""
+    def _apply_status(self, message):
+        """Статус на экране (главный поток)"""
         try:
-            # Проверяем, существует ли виджет перед обновлением
-            try:
-                # Проверяем, что виджет существует и не был уничтожен
-                if self.status_label.winfo_exists():
-                    self.status_label.configure(text=message)
-                    self.app.update_idletasks()
-            except:
-                # Виджет может быть уничтожен, игнорируем ошибку
-                pass
+            # Проверяем, что виджет существует и не был уничтожен
+            if self.status_label.winfo_exists():
+                self.status_label.configure(text=message)
         except:
+            # Виджет может быть уничтожен, игнорируем ошибку
             pass
     
+    def _set_buttons_state(self, start=None, pause=None, cont=None):
+        """Состояние кнопок управления (из потока обработки - через очередь интерфейса)"""
+        if not self.ui_bus.in_ui_thread():
+            return self.ui_bus.call(self._set_buttons_state, start, pause, cont)
+        for button, state in ((self.start_button, start), (self.pause_button, pause),
+                              (self.continue_button, cont)):
+            if state:
+                button.configure(state=state)
+    
     def start_processing(self):
         """Начало обработки семей с выбором стартовой семьи"""
         try:
@@ -1213,6 +1381,8 @@ class MassFamilyProcessorGUI(BaseGUI):
                     status_icon = "⏳"
                 elif status == 'ручное вмешательство':
                     status_icon = "🛠️"
+                elif status == DEFERRED_STATUS:
+                    status_icon = "⏸️"
                 
                 families_data.append(f"{i+1}. {family.get('mother_fio', '')[:30]}... {status_icon}")
             
@@ -1349,6 +1519,18 @@ class MassFamilyProcessorGUI(BaseGUI):
         try:
             self.current_family_index = start_index
             self.is_processing = True
+            # Отложенные семьи прошлого запуска обрабатываются заново вместе с остальными
+            self.deferred_queue.clear()
+            self._update_deferred_button()
+            
+            # Все смены статусов запуска пишутся в журнал файла семей
+            if self.last_json_path and not self.journal:
+                self._open_journal(self.last_json_path)
+            
+            # Трассировка времени фаз обработки в папку логов
+            trace_path = os.path.join(self.logs_dir, f"timing_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+            self.timing_recorder = TimingRecorder(trace_path)
+            self.screenshot_writer = self._create_screenshot_writer()
             
             self.start_button.configure(state="disabled")
             self.save_config()
@@ -1362,92 +1544,138 @@ class MassFamilyProcessorGUI(BaseGUI):
             self.is_processing = False
             self.start_button.configure(state="normal")
     
+    def _open_journal(self, json_path):
+        """Журнал статусов для файла семей и восстановление статусов по нему"""
+        try:
+            if self.journal:
+                self.journal.close()
+            self.journal = ProcessingJournal(journal_path_for(os.path.join(self.config_dir, "journals"), json_path))
+            restored = self.journal.restore(self.families_list)
+            if restored:
+                details = ", ".join(f"{status}: {count}" for status, count in restored.items())
+                self.log_message(f"♻️ Статусы восстановлены из журнала обработки ({details})")
+        except Exception as e:
+            self.journal = None
+            self.log_message(f"⚠️ Не удалось открыть журнал обработки: {e}")
+    
+    def _set_family_status(self, index, family, status, error_message=None):
+        """Смена статуса семьи с записью в журнал (error_message=None - не менять)"""
+        family['status'] = status
+        if error_message is not None:
+            family['error_message'] = error_message
+        if self.journal:
+            self.journal.record(family, status, family.get('error_message', ''), index)
+    
     def check_database_connection(self):
-        """Проверка подключения к базе данных"""
+        """Проверка доступности страницы поиска для движка и адреса из настроек"""
         try:
-            self.log_message("🔗 Проверка подключения к базе данных...")
+            engine = self._selected_engine()
+            search_url = self._create_form_filler().search_url
+            self.log_message(f"🔗 Проверка подключения к базе данных ({search_url})...")
             
+            driver = None
             try:
-                driver = webdriver.Chrome()
-                driver.get("http://localhost:8080/aspnetkp/Common/FindInfo.aspx")
-                time.sleep(1)
+                if engine == "http":
+                    from mass_processor.http_engine import HttpBrowser
+                    driver = HttpBrowser(timeout=15)
+                    driver.get(search_url)
+                else:
+                    driver = webdriver.Chrome()
+                    driver.get(search_url)
+                    time.sleep(1)
                 
                 if "Поиск информации" in driver.title or "FindInfo.aspx" in driver.current_url:
                     self.log_message("✅ Подключение к базе данных установлено")
-                    driver.quit()
                     return True
-                else:
-                    self.log_message("❌ Не удалось загрузить страницу поиска")
-                    driver.quit()
-                    return False
+                self.log_message("❌ Не удалось загрузить страницу поиска")
+                return False
                     
             except Exception as e:
                 self.log_message(f"❌ Ошибка подключения: {e}")
                 return False
+            finally:
+                if driver is not None:
+                    try:
+                        driver.quit()
+                    except Exception:
+                        pass
                 
         except Exception as e:
             self.log_message(f"❌ Ошибка проверки подключения: {e}")
             return False
     
     def process_families(self):
-        """Основной цикл обработки семей с повторной обработкой ошибок"""
+        """Основной цикл обработки семей с повторами по классу ошибки"""
+        workers_count = self._get_workers_count()
+        if workers_count > 1:
+            return self.process_families_parallel(workers_count)
+            
         try:
             total = len(self.families_list)
             processed_count = 0
             success_count = 0
             error_count = 0
             skipped_count = 0
-            retry_families = []  # Семьи для повторной обработки
+            done_count = 0
             
             # Сбрасываем счетчик успешных обработок
             self.success_count = 0
+            self.driver_manager = self._create_driver_manager()
             
             self.log_message(f"🚀 Начало обработки {total - self.current_family_index} семей")
             self.update_status("Идет обработка...")
             
-            # Первичный проход
+            # Очередь семей: повторы встают в нее по политике класса ошибки, вперемешку с новыми семьями
+            scheduler = RetryScheduler()
+            self.retry_scheduler = scheduler
             for i in range(self.current_family_index, total):
-                if not self.is_processing:
-                    self.log_message("⏸️ Обработка приостановлена пользователем")
-                    break
-                    
                 family = self.families_list[i]
                 processed_count += 1
                 
-                try:
-                    # Пропускаем уже успешно обработанные семьи
-                    if family.get('status') == 'успешно':
-                        self.log_message(f"⏭️ Пропускаем семью {i+1} - уже обработана")
-                        skipped_count += 1
-                        continue
+                # Пропускаем уже успешно обработанные семьи
+                if family.get('status') == 'успешно':
+                    self.log_message(f"⏭️ Пропускаем семью {i+1} - уже обработана")
+                    skipped_count += 1
+                    done_count += 1
+                    continue
+                    
+                if not family.get('mother_fio') and not family.get('father_fio'):
+                    self.log_message(f"⚠️ Пропуск семьи {i+1}: не указано ФИО матери или отца")
+                    self._set_family_status(i, family, 'пропущено', 'Не указано ФИО матери или отца')
+                    skipped_count += 1
+                    done_count += 1
+                    continue
                     
+                scheduler.add(i, family)
+            
+            recycle = False
+            while self.is_processing:
+                task = scheduler.get(lambda: self.is_processing)
+                if task is None:
+                    break
+                i, family, attempt = task
+                settled = False
+                
+                try:
                     # Обновляем статус
-                    family['status'] = 'в процессе'
+                    self._set_family_status(i, family, 'в процессе')
                     # Проверяем, не остановлена ли обработка, чтобы избежать лишних обновлений UI
                     if self.is_processing:
-                        self.update_families_table()
+                        self.update_family_row(i)
                     
-                    self.log_message(f"\n📋 Обработка семьи {i+1}/{total}")
+                    self.log_message(f"\n📋 Обработка семьи {i+1}/{total}" + (f" (попытка {attempt})" if attempt > 1 else ""))
                     self.log_message(f"👩 Мать: {family.get('mother_fio', '')}")
                     
-                    if not family.get('mother_fio') and not family.get('father_fio'):
-                        self.log_message("⚠️ Пропуск: не указано ФИО матери или отца")
-                        family['status'] = 'пропущено'
-                        family['error_message'] = 'Не указано ФИО матери или отца'
-                        skipped_count += 1
-                        continue
-                    
                     # Проверяем, требуется ли ручное вмешательство
                     if self.manual_intervention_required:
-                        family['status'] = 'ручное вмешательство'
+                        self._set_family_status(i, family, 'ручное вмешательство')
                         self.log_message("🛠️ Требуется ручное вмешательство")
                         # Проверяем, не остановлена ли обработка, чтобы избежать лишних обновлений UI
                         if self.is_processing:
-                            self.update_families_table()
+                            self.update_family_row(i)
                         
                         # Ждем, пока пользователь не нажмет "Продолжить"
-                        self.continue_button.configure(state="normal")
-                        self.pause_button.configure(state="disabled")
+                        self._set_buttons_state(pause="disabled", cont="normal")
                         self.log_message("⏳ Ожидаю, пока пользователь перейдет на нужную страницу и нажмет 'Продолжить'...")
                         
                         while self.manual_intervention_required and self.is_processing:
@@ -1455,288 +1683,547 @@ class MassFamilyProcessorGUI(BaseGUI):
                         
                         # После завершения ожидания убедимся, что состояние кнопок корректно
                         if not self.manual_intervention_required and self.is_processing:
-                            self.continue_button.configure(state="disabled")
-                            self.pause_button.configure(state="normal")
+                            self._set_buttons_state(pause="normal", cont="disabled")
                         
                         if not self.is_processing:
+                            self._set_family_status(i, family, 'ожидает')
                             break
                             
                         self.log_message("▶️ Продолжаем обработку после ручного вмешательства")
                         
                         # Убедимся, что кнопки находятся в правильном состоянии после продолжения
-                        self.continue_button.configure(state="disabled")
-                        self.pause_button.configure(state="normal")
-                        
-                        # Убедимся, что кнопки находятся в правильном состоянии после продолжения
-                        self.continue_button.configure(state="disabled")
-                        self.pause_button.configure(state="normal")
+                        self._set_buttons_state(pause="normal", cont="disabled")
                     
                     # Запуск автоматизации для одной семьи
-                    success = self.process_single_family_with_retry(family, i+1)
+                    success, failure = self._process_family_attempt(family, i+1, recycle)
+                    recycle = False
                     
                     if success:
-                        family['status'] = 'успешно'
-                        family['error_message'] = ''
+                        scheduler.complete(task)
+                        settled = True
+                        self._set_family_status(i, family, 'успешно', '')
                         success_count += 1
+                        done_count += 1
                         self.log_message(f"✅ Семья {i+1} обработана успешно")
-                    else:
-                        family['status'] = 'ошибка'
-                        family['error_message'] = 'Ошибка при обработке'
+                        continue
+                    if self._park_deferred_family(i, family):
+                        scheduler.complete(task)
+                        settled = True
+                        done_count += 1
+                        continue
+                    if not self.is_processing:
+                        scheduler.complete(task)
+                        settled = True
+                        self._set_family_status(i, family, 'ошибка', 'Обработка остановлена')
                         error_count += 1
-                        retry_families.append(i)  # Добавляем в список для повторной попытки
-                        self.log_message(f"❌ Ошибка при обработке семьи {i+1}")
-                        
-                        if self.stop_on_error_var.get():
-                            self.log_message("⏸️ Остановка из-за ошибки")
-                            break
+                        done_count += 1
+                        continue
+                    
+                    decision = scheduler.report(task, failure)
+                    settled = True
+                    if decision['retry']:
+                        recycle = decision['recycle']
+                        self.log_message(f"🔄 Семья {i+1}: {decision['label']} - повтор (попытка {decision['attempt']}"
+                                         + (f", через {decision['delay']} сек" if decision['delay'] else "")
+                                         + (", с новым браузером" if recycle else "") + ")")
+                        continue
+                    
+                    self._set_family_status(i, family, 'ошибка', f"{decision['label']} (попыток: {attempt})")
+                    error_count += 1
+                    done_count += 1
+                    self.log_message(f"❌ Ошибка при обработке семьи {i+1}: {decision['label']}, без повтора")
+                    
+                    if self.stop_on_error_var.get():
+                        self.log_message("⏸️ Остановка из-за ошибки")
+                        break
                             
                 except Exception as e:
                     error_msg = str(e)
                     self.log_message(f"❌ Критическая ошибка обработки семьи: {error_msg}")
-                    family['status'] = 'ошибка'
-                    family['error_message'] = error_msg
+                    self._set_family_status(i, family, 'ошибка', error_msg)
                     error_count += 1
-                    retry_families.append(i)  # Добавляем в список для повторной попытки
+                    done_count += 1
                     
                     if self.stop_on_error_var.get():
                         self.log_message("⏸️ Остановка из-за критической ошибки")
                         break
                         
                 finally:
-                    # Обновляем прогресс и статус
-                    self._update_progress_and_status(i + 1, total, success_count, error_count, skipped_count)
-                    
-                    # Пауза между семьями
-                    if i < total - 1 and self.is_processing:
-                        try:
-                            pause_time = float(self.pause_var.get())
-                            if pause_time > 0:
-                                time.sleep(pause_time)
-                        except:
-                            time.sleep(0.5)
-            
-            # Повторная обработка семей с ошибками
-            if retry_families and self.is_processing:
-                self.log_message(f"\n🔄 Повторная обработка {len(retry_families)} семей с ошибками...")
-                retry_success_count = 0
-                retry_error_count = 0
-                
-                for idx, family_idx in enumerate(retry_families):
-                    if not self.is_processing:
-                        break
-                        
-                    family = self.families_list[family_idx]
-                    self.log_message(f"\n🔄 Повторная обработка семьи {family_idx+1}/{total} (попытка 2)")
-                    
-                    # Обновляем статус
-                    family['status'] = 'в процессе'
-                    # Проверяем, не остановлена ли обработка, чтобы избежать лишних обновлений UI
-                    if self.is_processing:
-                        self.update_families_table()
-                    
-                    # Запуск автоматизации для одной семьи
-                    success = self.process_single_family_with_retry(family, family_idx+1)
-                    
-                    if success:
-                        family['status'] = 'успешно'
-                        family['error_message'] = ''
-                        retry_success_count += 1
-                        success_count += 1
-                        error_count -= 1
-                        self.log_message(f"✅ Семья {family_idx+1} обработана успешно при повторной попытке")
-                    else:
-                        family['status'] = 'ошибка'
-                        family['error_message'] = 'Не удалось обработать после 2 попыток'
-                        retry_error_count += 1
-                        self.log_message(f"❌ Семья {family_idx+1} не обработана после 2 попыток")
+                    # Задача не должна навсегда остаться "в работе" - иначе scheduler.get() будет ждать ее
+                    if not settled:
+                        scheduler.complete(task)
                     
                     # Обновляем прогресс и статус
-                    self._update_progress_and_status(self.current_family_index + idx + 1, total, success_count, error_count, skipped_count)
+                    self._update_progress_and_status(self.current_family_index + done_count, total,
+                                                     success_count, error_count, skipped_count)
                     
                     # Пауза между семьями
-                    if idx < len(retry_families) - 1 and self.is_processing:
+                    if len(scheduler) and self.is_processing:
                         try:
                             pause_time = float(self.pause_var.get())
                             if pause_time > 0:
                                 time.sleep(pause_time)
                         except:
                             time.sleep(0.5)
-                
-                # Если остались семьи с ошибками после повторной попытки
-                if retry_error_count > 0:
-                    error_families_info = []
-                    for family_idx in retry_families:
-                        family = self.families_list[family_idx]
-                        if family.get('status') == 'ошибка':
-                            error_families_info.append(f"{family_idx+1}. {family.get('mother_fio', '')}")
-                    
-                    self.log_message(f"\n⚠️ После повторной обработки осталось {retry_error_count} семей с ошибками:")
-                    for info in error_families_info:
-                        self.log_message(f"   {info}")
-                    
-                    messagebox.showwarning(
-                        "Остались семьи с ошибками",
-                        f"После повторной обработки осталось {retry_error_count} семей с ошибками.\n\n"
-                        f"Пожалуйста, проверьте данные этих семей и обработайте их вручную.\n"
-                        f"Завершаю автоматизацию."
-                    )
+            
+            # Семьи и повторы, не взятые в работу из-за остановки, возвращаем в ожидание
+            for i in range(self.current_family_index, total):
+                if self.families_list[i].get('status') == 'в процессе':
+                    self._set_family_status(i, self.families_list[i], 'ожидает')
             
             # Завершение обработки
+            self._finish_processing(processed_count, success_count, error_count, skipped_count)
+                
+        except Exception as e:
+            self.log_message(f"❌ Критическая ошибка в основном цикле обработки: {e}")
+            self.update_status("Ошибка обработки")
             self.is_processing = False
-            self.start_button.configure(state="normal")
-            self.pause_button.configure(state="disabled")  # Также отключаем кнопку паузы
-            self.continue_button.configure(state="disabled")
+            self._set_buttons_state(start="normal", pause="disabled", cont="disabled")
             
-            # Закрываем драйвер после обработки всех семей
-            if self.driver:
-                try:
-                    self.driver.quit()
-                    self.driver = None
-                    self.log_message("🔒 Драйвер закрыт")
-                except:
-                    pass
-                
-            # Убедимся, что кнопки находятся в правильном состоянии при завершении
-            self.start_button.configure(state="normal")
-            self.pause_button.configure(state="disabled")
-            self.continue_button.configure(state="disabled")
+            # Закрываем драйвер при ошибке
+            self._close_drivers()
             
-            # Обновляем статистику
-            if success_count > 0:
-                self.update_statistics(success_count)
+    def _finish_processing(self, processed_count, success_count, error_count, skipped_count):
+        """Завершение обработки: закрытие драйвера, статистика и итоги"""
+        self.is_processing = False
+        self._set_buttons_state(start="normal", pause="disabled", cont="disabled")
+        
+        # Закрываем драйвер после обработки всех семей
+        self._close_drivers()
             
-            # Итоговая статистика
-            self.log_message(f"\n🏁 Обработка завершена!")
-            self.log_message(f"📊 Итоги:")
-            self.log_message(f"   Всего семей: {processed_count}")
-            self.log_message(f"   Успешно: {success_count}")
-            self.log_message(f"   С ошибками: {error_count}")
-            self.log_message(f"   Пропущено: {skipped_count}")
+        # Обновляем статистику
+        if success_count > 0:
+            self.update_statistics(success_count)
+        
+        # Итоговая статистика
+        self.log_message(f"\n🏁 Обработка завершена!")
+        self.log_message(f"📊 Итоги:")
+        self.log_message(f"   Всего семей: {processed_count}")
+        self.log_message(f"   Успешно: {success_count}")
+        self.log_message(f"   С ошибками: {error_count}")
+        self.log_message(f"   Пропущено: {skipped_count}")
+        if len(self.deferred_queue):
+            self.log_message(f"   Отложено для оператора: {len(self.deferred_queue)}")
+        
+        # Отображаем статистику за день и неделю
+        today_stat, week_stat = self.get_statistics_for_period()
+        self.log_message(f"📈 Статистика: Сегодня - {today_stat} | Неделя - {week_stat}")
+        
+        # Дожидаемся записи скриншотов, поставленных в очередь
+        if self.screenshot_writer:
+            self.screenshot_writer.close()
+            self.screenshot_writer = None
+        
+        # Неудачные попытки по классам ошибок
+        if self.retry_scheduler:
+            for line in self.retry_scheduler.report_lines():
+                self.log_message(line)
+            self.retry_scheduler = None
+        
+        # Время по фазам обработки
+        if self.timing_recorder:
+            for line in self.timing_recorder.report_lines():
+                self.log_message(line)
+            self.timing_recorder.close()
+        
+        if error_count == 0 and skipped_count == 0:
+            self.update_status("✅ Все семьи обработаны успешно!")
+        else:
+            self.update_status(f"Обработка завершена с {error_count} ошибками")
+        
+        # Диалоги открываются в главном потоке: сначала отложенные семьи, затем завершенные
+        if len(self.deferred_queue):
+            self.ui_bus.call(self.show_deferred_families)
+        self.ui_bus.call(self.handle_completed_families)
+    
+    def _park_deferred_family(self, index, family):
+        """Перенос семьи в очередь отложенных, если исполнитель ее отложил"""
+        if not self.auto_filler or not self.auto_filler.deferred_reason:
+            return False
+        page_url = ""
+        try:
+            page_url = self.auto_filler.driver.current_url
+        except Exception:
+            pass
+        self._park_family(index, family, self.auto_filler.deferred_reason, self.auto_filler.deferred_cards, page_url=page_url)
+        return True
+    
+    def _park_family(self, index, family, reason, cards, worker_id=None, page_url=""):
+        """Семья в очереди отложенных до прохода с оператором"""
+        self.deferred_queue.add(index, family, reason, cards, page_url, worker_id)
+        self._set_family_status(index, family, DEFERRED_STATUS, reason)
+        self.log_message(f"⏸️ Семья {index+1} отложена для оператора: {reason} (всего отложено: {len(self.deferred_queue)})")
+        if self.is_processing:
+            self.update_family_row(index)
+        self._update_deferred_button()
+    
+    def _update_deferred_button(self):
+        """Число отложенных семей на кнопке"""
+        def apply():
+            try:
+                if self.deferred_button.winfo_exists():
+                    self.deferred_button.configure(text=f"🛠️ Отложенные: {len(self.deferred_queue)}")
+            except Exception:
+                pass
+        if not hasattr(self, 'deferred_button'):
+            return
+        if self.ui_bus.in_ui_thread():
+            apply()
+        else:
+            self.ui_bus.refresh('deferred_button', apply)
+    
+    def show_deferred_families(self):
+        """Окно отложенных семей: причины, найденные карточки и запуск прохода с оператором"""
+        try:
+            entries = self.deferred_queue.entries()
             
-            # Отображаем статистику за день и неделю
-            today_stat, week_stat = self.get_statistics_for_period()
-            self.log_message(f"📈 Статистика: Сегодня - {today_stat} | Неделя - {week_stat}")
+            dialog = ctk.CTkToplevel(self.app)
+            dialog.title(f"Отложенные семьи ({len(entries)})")
+            dialog.geometry("900x600")
+            dialog.transient(self.app)
             
-            if error_count == 0 and skipped_count == 0:
-                self.update_status("✅ Все семьи обработаны успешно!")
+            if self.is_processing:
+                hint = "Обработка продолжается. Семьи можно пройти с оператором после ее завершения."
             else:
-                self.update_status(f"Обработка завершена с {error_count} ошибками")
+                hint = "Каждая семья будет обработана заново; при необходимости программа попросит вмешаться."
+            ctk.CTkLabel(dialog, text=f"Отложено семей: {len(entries)}\n{hint}").pack(pady=5)
+            
+            entries_text = scrolledtext.ScrolledText(dialog)
+            entries_text.pack(fill="both", expand=True, padx=10, pady=10)
+            entries_text.insert("end", "\n\n".join(describe_entry(entry) for entry in entries)
+                                if entries else "Отложенных семей нет")
+            entries_text.config(state="disabled")
+            
+            buttons_frame = ctk.CTkFrame(dialog)
+            buttons_frame.pack(fill="x", padx=10, pady=10)
+            
+            def start_operator_pass():
+                dialog.destroy()
+                self.start_operator_pass()
+            
+            ctk.CTkButton(buttons_frame, text="🛠️ Обработать с оператором", command=start_operator_pass,
+                         state="normal" if entries and not self.is_processing else "disabled",
+                         fg_color="green").pack(side="left", padx=5)
+            ctk.CTkButton(buttons_frame, text="Закрыть", command=dialog.destroy).pack(side="right", padx=5)
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Ошибка показа отложенных семей: {e}")
+    
+    def start_operator_pass(self):
+        """Запуск прохода по отложенным семьям с участием оператора"""
+        if self.is_processing or not len(self.deferred_queue):
+            return
+        self.is_processing = True
+        self.operator_pass = True
+        trace_path = os.path.join(self.logs_dir, f"timing_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+        self.timing_recorder = TimingRecorder(trace_path)
+        self.screenshot_writer = self._create_screenshot_writer()
+        self._set_buttons_state(start="disabled", pause="normal", cont="disabled")
+        self.processing_thread = threading.Thread(target=self._process_deferred_families)
+        self.processing_thread.daemon = False
+        self.processing_thread.start()
+    
+    def _process_deferred_families(self):
+        """Проход по отложенным семьям: ручное вмешательство снова ждет оператора"""
+        entries = self.deferred_queue.take_all()
+        success_count = error_count = skipped_count = 0
+        try:
+            self.log_message(f"\n🛠️ Обработка {len(entries)} отложенных семей с оператором")
+            self.driver_manager = self._create_driver_manager()
             
-            # Вызываем функцию для обработки завершенных семей
-            self.handle_completed_families()
+            for position, entry in enumerate(entries):
+                if not self.is_processing:
+                    # Необработанные семьи остаются в очереди отложенных
+                    for rest in entries[position:]:
+                        self.deferred_queue.add(rest['index'], rest['family'], rest['reason'], rest['cards'],
+                                                rest['url'], rest['worker'])
+                    break
+                
+                # Список семей мог измениться (завершенные перенесены в completed) - ищем по ключу
+                key = family_key(entry['family'])
+                index = next((i for i, family in enumerate(self.families_list) if family_key(family) == key), None)
+                if index is None:
+                    self.log_message(f"⏭️ Отложенная семья {entry['family'].get('mother_fio', '')} больше не в списке")
+                    skipped_count += 1
+                    continue
+                family = self.families_list[index]
                 
+                self._set_family_status(index, family, 'в процессе')
+                self.update_family_row(index)
+                self.log_message(f"\n📋 Отложенная семья {index+1}: {family.get('mother_fio', '')} ({entry['reason']})")
+                
+                if self.process_single_family_with_retry(family, index+1):
+                    self._set_family_status(index, family, 'успешно', '')
+                    success_count += 1
+                    self.log_message(f"✅ Семья {index+1} обработана успешно")
+                else:
+                    self._set_family_status(index, family, 'ошибка', entry['reason'])
+                    error_count += 1
+                    self.log_message(f"❌ Семья {index+1} не обработана")
+                self._update_progress_and_status(position + 1, len(entries), success_count, error_count, skipped_count)
         except Exception as e:
-            self.log_message(f"❌ Критическая ошибка в основном цикле обработки: {e}")
-            self.update_status("Ошибка обработки")
-            self.is_processing = False
-            self.start_button.configure(state="normal")
-            self.pause_button.configure(state="disabled")
-            self.continue_button.configure(state="disabled")
+            self.log_message(f"❌ Ошибка обработки отложенных семей: {e}")
+        finally:
+            self.operator_pass = False
+            self._update_deferred_button()
+        self._finish_processing(len(entries), success_count, error_count, skipped_count)
+    
+    def _selected_engine(self):
+        """Движок обработки из настроек (selenium или http)"""
+        return self.engine_var.get() if hasattr(self, 'engine_var') else self.config.get("engine", "selenium")
+    
+    def _create_form_filler(self):
+        """Исполнитель для движка обработки, выбранного в настройках"""
+        engine = self._selected_engine()
+        fill_mode = self.fill_mode_var.get() if hasattr(self, 'fill_mode_var') else self.config.get("fill_mode", "batch")
+        use_cache = self.card_cache_var.get() if hasattr(self, 'card_cache_var') else self.config.get("card_cache", True)
+        filler = create_form_filler(self, engine, self.config.get("base_url"), fill_mode,
+                                    self.card_cache if use_cache else None, self.timing_recorder,
+                                    self.session_store)
+        filler.defer_manual = self._defer_manual_enabled()
+        filler.light_browser = self.light_browser_var.get() if hasattr(self, 'light_browser_var') else self.config.get("light_browser", True)
+        filler.screenshot_writer = self.screenshot_writer
+        return filler
+    
+    def _create_screenshot_writer(self):
+        """Фоновая запись скриншотов запуска в формате из настроек"""
+        fmt = self.screenshot_format_var.get() if hasattr(self, 'screenshot_format_var') else self.config.get("screenshot_format", "jpeg")
+        try:
+            quality = int(self.config.get("screenshot_quality", 85) or 85)
+            max_width = int(self.config.get("screenshot_max_width", 0) or 0)
+        except (TypeError, ValueError):
+            quality, max_width = 85, 0
+        return ScreenshotWriter(fmt, quality, max_width, log=self.log_message)
+    
+    def _defer_manual_enabled(self):
+        """Откладывать ли семьи, которым нужен оператор (в проходе с оператором - нет)"""
+        if self.operator_pass:
+            return False
+        return self.defer_manual_var.get() if hasattr(self, 'defer_manual_var') else self.config.get("defer_manual", False)
+    
+    def _driver_manager_settings(self):
+        """Настройки браузеров: запасной браузер и плановый перезапуск"""
+        keep_spare = self.spare_browser_var.get() if hasattr(self, 'spare_browser_var') else self.config.get("spare_browser", True)
+        try:
+            recycle_after = int(self.config.get("recycle_after", 150) or 0)
+            memory_limit_mb = int(self.config.get("memory_limit_mb", 1500) or 0)
+        except (TypeError, ValueError):
+            recycle_after, memory_limit_mb = 150, 1500
+        return {'keep_spare': keep_spare, 'recycle_after': recycle_after, 'memory_limit_mb': memory_limit_mb}
+    
+    def _create_driver_manager(self):
+        """Менеджер браузеров последовательной обработки"""
+        return DriverManager(self._create_form_filler, self.log_message, **self._driver_manager_settings())
+    
+    def _close_drivers(self):
+        """Закрытие активного и запасного браузеров последовательной обработки"""
+        try:
+            if self.driver_manager:
+                self.driver_manager.stop()
+                self.driver_manager = None
+                self.log_message("🔒 Драйвер закрыт")
+            elif self.driver:
+                self.driver.quit()
+                self.log_message("🔒 Драйвер закрыт")
+        except Exception as e:
+            self.log_message(f"⚠️ Ошибка при закрытии драйвера: {e}")
+        self.driver = None
+        self.auto_filler = None
+    
+    def _get_workers_count(self):
+        """Количество параллельных браузеров из настроек"""
+        try:
+            value = self.workers_var.get() if hasattr(self, 'workers_var') else self.config.get("workers", "1")
+            return max(1, min(8, int(value)))
+        except:
+            return 1
+    
+    def _get_pause_time(self):
+        """Пауза между семьями из настроек"""
+        try:
+            return max(0.0, float(self.pause_var.get()))
+        except:
+            return 0.5
+    
+    def _get_screenshot_dir(self):
+        """Папка для скриншотов или None, если скриншоты отключены"""
+        if not self.screenshot_var.get():
+            return None
             
-            # Закрываем драйвер при ошибке
-            if self.driver:
-                try:
-                    self.driver.quit()
-                    self.driver = None
-                except:
-                    pass
+        screenshot_dir = self.screenshot_dir.get().strip()
+        if not screenshot_dir:
+            screenshot_dir = self.screenshots_dir
             
-    def process_single_family_with_retry(self, family_data, family_number):
-        """Обработка одной семьи с повторными попытками"""
-        max_attempts = 2
-        for attempt in range(max_attempts):
+        if not os.path.exists(screenshot_dir):
             try:
-                self.log_message(f"🔄 Попытка {attempt + 1} обработки семьи {family_number}")
+                os.makedirs(screenshot_dir)
+                self.log_message(f"📁 Создана папка для скриншотов: {screenshot_dir}")
+            except Exception as e:
+                self.log_message(f"⚠️ Не удалось создать папку для скриншотов: {e}")
+                screenshot_dir = None
                 
-                # При повторной попытке перезапускаем драйвер
-                if attempt > 0:
-                    if self.driver:
-                        try:
-                            self.driver.quit()
-                        except Exception as e:
-                            self.log_message(f"⚠️ Ошибка при закрытии драйвера: {e}")
-                        self.driver = None
-                    
-                    self.auto_filler = AutoFormFillerMass(self)
-                    if not self.auto_filler._setup_driver():
-                        self.log_message("❌ Не удалось настроить драйвер")
-                        continue
-                    self.driver = self.auto_filler.driver
-                elif not self.driver:
-                    # Первая попытка, но драйвера нет
-                    self.auto_filler = AutoFormFillerMass(self)
-                    if not self.auto_filler._setup_driver():
-                        self.log_message("❌ Не удалось настроить драйвер")
-                        continue
-                    self.driver = self.auto_filler.driver
-                else:
-                    # Используем существующий драйвер
-                    self.auto_filler = AutoFormFillerMass(self)
-                    # Проверяем, что драйвер все еще активен
-                    try:
-                        # Проверяем, можно ли получить URL страницы
-                        _ = self.driver.current_url
-                        self.auto_filler.driver = self.driver
-                        self.auto_filler.wait = WebDriverWait(self.driver, 10)
-                    except:
-                        # Драйвер больше не активен, нужно создать новый
-                        self.log_message("⚠️ Драйвер больше не активен, создаем новый")
-                        if self.driver:
-                            try:
-                                self.driver.quit()
-                            except Exception as e:
-                                self.log_message(f"⚠️ Ошибка при закрытии старого драйвера: {e}")
-                        self.driver = None
-                        
-                        self.auto_filler = AutoFormFillerMass(self)
-                        if not self.auto_filler._setup_driver():
-                            self.log_message("❌ Не удалось настроить драйвер")
-                            continue
-                        self.driver = self.auto_filler.driver
+        return screenshot_dir
+    
+    def process_families_parallel(self, workers_count):
+        """Обработка семей несколькими параллельными браузерами"""
+        counters = {'processed': 0, 'success': 0, 'error': 0, 'skipped': 0, 'done': 0}
+        counters_lock = threading.Lock()
+        
+        try:
+            total = len(self.families_list)
+            self.success_count = 0
+            stop_on_error = self.stop_on_error_var.get()
+            
+            self.log_message(f"🚀 Начало параллельной обработки {total - self.current_family_index} семей ({workers_count} браузеров)")
+            self.update_status("Идет параллельная обработка...")
+            
+            # Отбираем семьи для обработки так же, как в последовательном режиме
+            tasks = []
+            for i in range(self.current_family_index, total):
+                family = self.families_list[i]
+                counters['processed'] += 1
                 
-                # Устанавливаем путь для скриншотов
-                if self.screenshot_var.get():
-                    screenshot_dir = self.screenshot_dir.get().strip()
-                    if not screenshot_dir:
-                        screenshot_dir = self.screenshots_dir
+                if family.get('status') == 'успешно':
+                    self.log_message(f"⏭️ Пропускаем семью {i+1} - уже обработана")
+                    counters['skipped'] += 1
+                    counters['done'] += 1
+                    continue
+                    
+                if not family.get('mother_fio') and not family.get('father_fio'):
+                    self.log_message(f"⚠️ Пропуск семьи {i+1}: не указано ФИО матери или отца")
+                    self._set_family_status(i, family, 'пропущено', 'Не указано ФИО матери или отца')
+                    counters['skipped'] += 1
+                    counters['done'] += 1
+                    continue
+                    
+                tasks.append((i, family))
+            
+            pool = FamilyWorkerPool(
+                self,
+                self._create_form_filler,
+                workers=workers_count,
+                screenshot_dir=self._get_screenshot_dir(),
+                pause=self._get_pause_time(),
+                **self._driver_manager_settings()
+            )
+            
+            def on_family_started(index, family, worker_id):
+                self._set_family_status(index, family, 'в процессе')
+                self.log_message(f"\n📋 Браузер {worker_id}: обработка семьи {index+1}/{total}")
+                self.log_message(f"👩 Мать: {family.get('mother_fio', '')}")
+                if self.is_processing:
+                    self.update_family_row(index)
+            
+            def on_family_finished(index, family, success, worker_id):
+                with counters_lock:
+                    counters['done'] += 1
+                    if success:
+                        self._set_family_status(index, family, 'успешно', '')
+                        counters['success'] += 1
+                        self.log_message(f"✅ Семья {index+1} обработана успешно (браузер {worker_id})")
+                    else:
+                        self._set_family_status(index, family, 'ошибка', 'Не удалось обработать')
+                        counters['error'] += 1
+                        self.log_message(f"❌ Ошибка при обработке семьи {index+1} (браузер {worker_id})")
                         
-                    if not os.path.exists(screenshot_dir):
-                        try:
-                            os.makedirs(screenshot_dir)
-                            self.log_message(f"📁 Создана папка для скриншотов: {screenshot_dir}")
-                        except Exception as e:
-                            self.log_message(f"⚠️ Не удалось создать папку для скриншотов: {e}")
-                            screenshot_dir = None
-                            
-                    self.auto_filler.screenshot_dir = screenshot_dir
+                        if stop_on_error:
+                            self.log_message("⏸️ Остановка из-за ошибки: новые семьи не берутся в работу")
+                            pool.cancel_pending()
                     
-                # Запускаем автоматизацию
-                success = self.auto_filler.process_family(family_data, family_number)
-                
-                if success:
-                    return True
-                else:
-                    self.log_message(f"❌ Попытка {attempt + 1} не удалась")
-                    if attempt < max_attempts - 1:
-                        self.log_message("🔄 Возвращаемся на страницу поиска для повторной попытки...")
-                        # Возвращаемся на страницу поиска
-                        try:
-                            self.driver.get("http://localhost:8080/aspnetkp/Common/FindInfo.aspx")
-                            time.sleep(0.2)
-                        except:
-                            pass
-                
-            except Exception as e:
-                self.log_message(f"❌ Ошибка в process_single_family (попытка {attempt + 1}): {str(e)}")
-                import traceback
-                self.log_message(f"📋 Трассировка:\n{traceback.format_exc()}")
-                if attempt < max_attempts - 1:
-                    self.log_message("🔄 Пробуем еще раз...")
-                    time.sleep(1)
-        
-        self.log_message(f"❌ Обработка семьи {family_number} не удалась после {max_attempts} попыток")
+                    self._update_progress_and_status(
+                        self.current_family_index + counters['done'], total,
+                        counters['success'], counters['error'], counters['skipped']
+                    )
+            
+            def on_family_deferred(index, family, reason, cards, worker_id):
+                with counters_lock:
+                    counters['done'] += 1
+                    self._park_family(index, family, reason, cards, worker_id)
+                    self._update_progress_and_status(
+                        self.current_family_index + counters['done'], total,
+                        counters['success'], counters['error'], counters['skipped']
+                    )
+            
+            pool.on_family_started = on_family_started
+            pool.on_family_finished = on_family_finished
+            pool.on_family_deferred = on_family_deferred
+            
+            self.worker_pool = pool
+            try:
+                pool.run(tasks)
+            finally:
+                self.worker_pool = None
+            self.retry_scheduler = pool.scheduler
+            
+            # Семьи, не взятые в работу из-за остановки, возвращаем в ожидание
+            for index, family in tasks:
+                if family.get('status') == 'в процессе':
+                    self._set_family_status(index, family, 'ожидает')
+            
+            self._finish_processing(counters['processed'], counters['success'], counters['error'], counters['skipped'])
+            
+        except Exception as e:
+            self.log_message(f"❌ Критическая ошибка в параллельной обработке: {e}")
+            self.update_status("Ошибка обработки")
+            self.is_processing = False
+            self._set_buttons_state(start="normal", pause="disabled", cont="disabled")
+            
+    def process_single_family_with_retry(self, family_data, family_number):
+        """Обработка одной семьи с повторами по классу ошибки (проход с оператором)"""
+        scheduler = RetryScheduler()
+        scheduler.add(family_number - 1, family_data)
+        recycle = False
+        while self.is_processing:
+            task = scheduler.get(lambda: self.is_processing)
+            if task is None:
+                break
+            success, failure = self._process_family_attempt(family_data, family_number, recycle)
+            if success or self.auto_filler and self.auto_filler.deferred_reason or not self.is_processing:
+                scheduler.complete(task)
+                return success
+            decision = scheduler.report(task, failure)
+            if not decision['retry']:
+                self.log_message(f"❌ Обработка семьи {family_number} не удалась: {decision['label']}")
+                return False
+            recycle = decision['recycle']
+            self.log_message(f"🔄 {decision['label']} - повтор (попытка {decision['attempt']}"
+                             + (f", через {decision['delay']} сек" if decision['delay'] else "") + ")")
         return False
     
+    def _process_family_attempt(self, family_data, family_number, recycle=False):
+        """Одна попытка обработки семьи: (успех, класс ошибки неудачной попытки)"""
+        if not self.driver_manager:
+            self.driver_manager = self._create_driver_manager()
+        try:
+            # Живой браузер с выполненным входом; после сбоя браузера - замена (запасным, если он готов)
+            if recycle:
+                self.auto_filler = self.driver_manager.replace_active()
+            else:
+                self.auto_filler = self.driver_manager.acquire()
+            if self.auto_filler is None:
+                self.log_message("❌ Не удалось настроить драйвер")
+                return False, DRIVER
+            self.driver = self.auto_filler.driver
+            self.auto_filler.defer_manual = self._defer_manual_enabled()
+            
+            # Устанавливаем путь для скриншотов
+            if self.screenshot_var.get():
+                self.auto_filler.screenshot_dir = self._get_screenshot_dir()
+                
+            # Запускаем автоматизацию
+            success = self.auto_filler.process_family(family_data, family_number)
+            self.driver_manager.family_finished()
+            if success:
+                return True, None
+            return False, classify_failure(self.auto_filler)
+            
+        except Exception as e:
+            self.log_message(f"❌ Ошибка в process_single_family: {str(e)}")
+            import traceback
+            self.log_message(f"📋 Трассировка:\n{traceback.format_exc()}")
+            if self.auto_filler:
+                self.auto_filler.last_error = e
+            return False, classify_exception(e)
+    
     def _update_progress_and_status(self, current_index, total_count, success_count, error_count, skipped_count):
         """Обновление прогресса и статуса с детальной информацией"""
         # Обновляем прогресс
@@ -1900,6 +2387,8 @@ class MassFamilyProcessorGUI(BaseGUI):
 
             # Удаляем выбранные семьи из исходного JSON файла
             self.remove_families_from_source(selected_families)
+            if self.journal:
+                self.journal.forget(selected_families)
             
             # Добавляем поле isPainted = true для всех перемещенных семей
             for family in selected_families:
@@ -1961,25 +2450,63 @@ class MassFamilyProcessorGUI(BaseGUI):
             import traceback
             self.log_message(f"📋 Трассировка:\n{traceback.format_exc()}")
 
+    def ask_yes_no(self, title, message, default=True):
+        """Вопрос оператору (default - если окно закрыто и ответа не будет)"""
+        try:
+            return self.ui_bus.invoke(messagebox.askyesno, title, message)
+        except RuntimeError:
+            return default
+
+    def ask_input(self, title, text):
+        """Запрос строки у оператора (None - если окно закрыто)"""
+        try:
+            return self.ui_bus.invoke(self._ask_input_dialog, title, text)
+        except RuntimeError:
+            return None
+
+    def _ask_input_dialog(self, title, text):
+        dialog = ctk.CTkInputDialog(text=text, title=title)
+        return dialog.get_input()
+
+    def show_info(self, title, message):
+        """Информационное сообщение оператору"""
+        try:
+            self.ui_bus.invoke(messagebox.showinfo, title, message)
+        except RuntimeError:
+            self.log_message(f"ℹ️ {title}: {message}")
+
+    def show_error(self, title, message):
+        """Сообщение об ошибке оператору"""
+        try:
+            self.ui_bus.invoke(messagebox.showerror, title, message)
+        except RuntimeError:
+            self.log_message(f"❌ {title}: {message}")
+
     def log_message(self, message):
-        """Логирование сообщений в текстовое поле"""
+        """Логирование сообщений в текстовое поле (строки выводятся пакетом по таймеру) и в журнал"""
+        now = datetime.now()
+        self.ui_bus.log(f"{now.strftime('[%H:%M:%S]')} {message}\n")
+        if getattr(self, 'process_log', None):
+            self.process_log.write(f"{now.strftime('[%Y-%m-%d %H:%M:%S]')} {message}")
+    
+    def _append_log(self, text):
+        """Вставка накопленных строк лога одним блоком (главный поток)"""
         try:
-            timestamp = datetime.now().strftime("[%H:%M:%S]")
-            log_entry = f"{timestamp} {message}\n"
-            
             # Проверяем, существует ли виджет перед обновлением
             if hasattr(self, 'log_text') and self.log_text.winfo_exists():
-                # Временно разрешаем редактирование
                 self.log_text.config(state="normal")
-                # Добавляем сообщение
-                self.log_text.insert("end", log_entry)
-                # Прокручиваем к последней строке
+                self.log_text.insert("end", text)
+                # Кольцевой буфер: старые строки удаляются, полный лог остается в файле
+                lines = int(self.log_text.index("end-1c").split(".")[0])
+                if lines > ProcessLog.MAX_VIEW_LINES:
+                    self.log_text.delete("1.0", f"{lines - ProcessLog.MAX_VIEW_LINES + 1}.0")
                 self.log_text.see("end")
-                # Возвращаем в состояние "только для чтения"
                 self.log_text.config(state="disabled")
+            else:
+                print(text, end="")
         except:
             # Если не удается обновить GUI, выводим в консоль
-            print(f"[LOG] {message}")
+            print(text, end="")
     
     def run(self):
         """Запуск приложения"""
@@ -2146,17 +2673,63 @@ class AutoFormFillerMass:
 class AutoFormFillerMass:
     """Класс для массовой обработки семей с улучшенной обработкой ошибок"""
     
+    # Адрес приложения базы данных и учетная запись для входа
+    BASE_URL = "http://localhost:8080/aspnetkp"
+    USERNAME = "СРЦ_Вол"
+    PASSWORD = "СРЦ_Вол1"
+    
     def __init__(self, gui_app):
         self.gui = gui_app
+        self.base_url = self.BASE_URL
+        self.username = self.USERNAME
+        self.password = self.PASSWORD
         self.driver = None
         self.wait = None
         self.screenshot_dir = None
         self.should_stop = False
         self.phone = ""
         self.address = ""
+        # Номер браузера в пуле параллельной обработки (None - единственный браузер)
+        self.worker_id = None
+        # Запуск Chrome без окна (пакетная обработка на сервере)
+        self.headless = False
+        # Заполнение формы: batch - одним вызовом JavaScript, classic - по одному полю
+        self.fill_mode = "batch"
+        # Кэш адресов карточек (CardCache), общий для всех браузеров пула
+        self.card_cache = None
+        # Адаптивные ожидания страниц (создаются вместе с драйвером)
+        self.waiter = None
+        # Сборщик времени фаз (TimingRecorder), общий для всех браузеров запуска
+        self.timing = None
+        self.phase_timer = PhaseTimer()
+        # Блокировка диалогов с оператором, общая для всех браузеров пула
+        self.interaction_lock = threading.RLock()
+        # Cookie сессии после входа (SessionStore), общие для всех браузеров
+        self.session_store = None
+        # Откладывать семьи, которым нужен оператор, вместо ожидания "Продолжить"
+        self.defer_manual = False
+        # Причина и найденные карточки, если текущая семья отложена
+        self.deferred_reason = None
+        self.deferred_cards = []
+        # Причина неудачи текущей семьи для выбора политики повтора (см. retry_policy)
+        self.failure_kind = None
+        self.last_error = None
+        # Облегченный профиль Chrome (см. browser_profile) и его временная папка
+        self.light_browser = False
+        self.user_data_dir = None
+        self.full_rendering = False
+        # Фоновая запись скриншотов (ScreenshotWriter), общая для всех браузеров
+        self.screenshot_writer = None
+        
+    @property
+    def search_url(self):
+        """Адрес страницы поиска FindInfo.aspx"""
+        return f"{self.base_url}/Common/FindInfo.aspx"
         
     def log(self, message):
         """Логирование в GUI"""
+        if self.worker_id is not None:
+            message = f"[Б{self.worker_id}] {message}"
         self.gui.log_message(message)
         
     def stop_processing(self):
@@ -2167,53 +2740,90 @@ class AutoFormFillerMass:
                 self.driver.quit()
             except:
                 pass
+        remove_user_data_dir(self.user_data_dir)
+        self.user_data_dir = None
     
     def wait_for_manual_intervention(self, message):
         """Ожидание ручного вмешательства пользователя"""
         self.log(f"🛠️ {message}")
-        
-        self.gui.manual_intervention_required = True
 
-        # Показываем сообщение пользователю
-        messagebox.showinfo("Требуется ручное вмешательство",
-                           f"{message}\n\n"
-                           "Пожалуйста, перейдите на нужную страницу в браузере и нажмете 'Продолжить' в программе.")
+        if self.defer_manual:
+            return self._defer_family(message)
+
+        # Без оператора (пакетный режим) ждать некого - семья считается необработанной
+        if not getattr(self.gui, 'interactive', True):
+            self.log("⏭️ Оператор недоступен, ручное вмешательство пропущено")
+            return False
         
-        # Ждем, пока пользователь не нажмет "Продолжить"
-        while self.gui.manual_intervention_required and not self.should_stop:
-            time.sleep(0.5)
+        # При параллельной обработке оператор работает с одним браузером за раз
+        with self.interaction_lock:
+            self.gui.manual_intervention_required = True
+
+            # Показываем сообщение пользователю
+            self.gui.show_info("Требуется ручное вмешательство",
+                               f"{message}\n\n"
+                               "Пожалуйста, перейдите на нужную страницу в браузере и нажмете 'Продолжить' в программе.")
+            
+            # Ждем, пока пользователь не нажмет "Продолжить"
+            while self.gui.manual_intervention_required and not self.should_stop:
+                time.sleep(0.5)
         
         return not self.should_stop
         
+    def _defer_family(self, message):
+        """Семья откладывается до прохода с оператором; найденные карточки сохраняются"""
+        if self.deferred_reason:
+            # Уже отложена на предыдущем шаге (например, при выборе карточки)
+            return False
+        self.deferred_reason = message
+        try:
+            self.deferred_cards = [{'fio': card['fio'], 'address': card['address']}
+                                   for card in self._extract_cards()]
+        except Exception:
+            self.deferred_cards = []
+        self.log("⏸️ Семья отложена до прохода с оператором, продолжаем с остальными")
+        return False
+        
+    def _fail(self, failure_kind):
+        """Неудача с известным классом (если раньше не было исключения с более точной причиной)"""
+        if self.failure_kind is None and self.last_error is None:
+            self.failure_kind = failure_kind
+        return False
+        
     # Удаляем дублирующий метод, так как он уже существует в другом виде
     
     def process_family(self, family_data, family_number):
-        """Обработка одной семьи"""
+        """Обработка одной семьи с замером времени фаз"""
+        self.phase_timer = PhaseTimer()
+        self.deferred_reason = None
+        self.deferred_cards = []
+        self.failure_kind = None
+        self.last_error = None
+        # Каждая семья начинается в облегченном режиме, даже если скриншот прошлой не удался
+        self._set_full_rendering(False)
+        if self.waiter:
+            self.waiter.start_family()
+        success = False
         try:
-            # 1. Возвращаемся на страницу поиска
-            self.log("🔙 Возвращаемся на страницу поиска...")
-            try:
-                self.driver.get("http://localhost:8080/aspnetkp/Common/FindInfo.aspx")
-                time.sleep(0.2)  # Уменьшено с 0.5 до 0.2 секунды
-            except Exception as e:
-                self.log(f"❌ Не удалось загрузить страницу поиска: {e}")
-                
-                # Запрашиваем ручное вмешательство
-                if self.wait_for_manual_intervention("Не удалось загрузить страницу поиска"):
-                    self.log("▶️ Продолжаем после ручного вмешательства")
-                    # Проверяем, что страница доступна после ручного вмешательства
-                    try:
-                        WebDriverWait(self.driver, 10).until(
-                            EC.presence_of_element_located((By.ID, "ctl00_cph_ctrlFastFind_tbFind"))
-                        )
-                        self.log("✅ Страница поиска доступна после ручного вмешательства")
-                    except:
-                        self.log("❌ Страница поиска все еще недоступна после ручного вмешательства")
-                        return False
-                else:
-                    return False
-            
-            # 2. Поиск семьи по ФИО матери
+            success = self._process_family_steps(family_data, family_number)
+            return success
+        finally:
+            if self.waiter:
+                self.log(f"⏱️ Ожидание страниц: {self.waiter.family_report()}")
+            if self.timing:
+                self.timing.record_family(
+                    family_number, family_data.get('mother_fio', ''), success, self.phase_timer,
+                    worker=self.worker_id, waits=self.waiter.family_waits if self.waiter else None
+                )
+
+    def _phase(self, name):
+        """Замер фазы обработки текущей семьи"""
+        return self.phase_timer.phase(name)
+
+    def _process_family_steps(self, family_data, family_number):
+        """Шаги обработки одной семьи"""
+        try:
+            # 1. ФИО для поиска
             mother_fio = family_data.get('mother_fio', '')
             father_fio = family_data.get('father_fio', '')
             
@@ -2222,91 +2832,98 @@ class AutoFormFillerMass:
             
             if not search_fio:
                 self.log("❌ Не указано ФИО матери или отца")
-                return False
+                return self._fail(VALIDATION)
                 
-            self.log(f"🔍 Поиск семьи: {search_fio}")
-            
-            # Выполняем поиск
-            if not self._fast_search_mother(search_fio):
-                self.log("❌ Не удалось найти семью")
-                
-                # Запрашиваем ручное вмешательство
-                if self.wait_for_manual_intervention(f"Не удалось найти семью: {mother_fio}"):
-                    self.log("▶️ Продолжаем после ручного вмешательства")
-                    # Предполагаем, что пользователь уже на нужной странице
-                else:
-                    return False
-            
-            # 3. Анализ результатов поиска и автоматический выбор карточки
-            self.log("🤖 Анализируем результаты поиска...")
-            result = self._analyze_search_results(family_number, search_fio)
-            
-            if not result:
-                self.log("❌ Не удалось автоматически выбрать карточку")
-                
-                # Запрашиваем ручное вмешательство
-                if self.wait_for_manual_intervention("Не удалось автоматически выбрать карточку"):
-                    self.log("▶️ Продолжаем после ручного вмешательства")
-                    # Предполагаем, что пользователь уже на нужной карточке
-                else:
+            # 2-3. Карточка из кэша или поиск и выбор карточки
+            with self._phase("карточка"):
+                from_cache = self._open_card_from_cache(family_data, search_fio)
+            if not from_cache:
+                if not self._search_and_open_card(family_data, family_number, search_fio):
                     return False
             
             # 4. ПЕРЕД ПЕРЕХОДОМ НА ДОПОЛНИТЕЛЬНУЮ ИНФОРМАЦИЮ - ПОЛУЧАЕМ ТЕЛЕФОН И АДРЕС
             # Ждем, пока страница карточки полностью загрузится
             try:
-                WebDriverWait(self.driver, 10).until(
-                    lambda driver: "CardInfo.aspx" in driver.current_url or "ПКУ" in driver.title or
-                    driver.execute_script("return document.readyState") == "complete"
-                )
-                self.log("📱 Получаем телефон и адрес СРАЗУ ПОСЛЕ ПЕРЕХОДА НА КАРТОЧКУ...")
-                
-                # Получаем данные из family_data (из JSON)
-                self._get_phone_and_address_from_family_data(family_data)
-                
-                # Также пытаемся получить со страницы (если не удалось из JSON)
-                self._get_phone_and_address_from_page()
+                with self._phase("телефон и адрес"):
+                    self.waiter.until(
+                        "карточка",
+                        lambda driver: "CardInfo.aspx" in driver.current_url or "ПКУ" in driver.title or
+                        driver.execute_script("return document.readyState") == "complete"
+                    )
+                    self.log("📱 Получаем телефон и адрес СРАЗУ ПОСЛЕ ПЕРЕХОДА НА КАРТОЧКУ...")
+                    
+                    # Получаем данные из family_data (из JSON)
+                    self._get_phone_and_address_from_family_data(family_data)
+                    
+                    # Также пытаемся получить со страницы (если не удалось из JSON)
+                    self._get_phone_and_address_from_page()
             except Exception as e:
                 self.log(f"⚠️ Не удалось дождаться полной загрузки карточки или получить данные: {e}")
+                self.last_error = e
                 # Возвращаемся на страницу поиска
                 self._return_to_search_page()
                 return False
             
             # 5. Проверка и заполнение данных
-            if not self._check_additional_info_empty():
+            with self._phase("проверка доп. информации"):
+                is_empty = self._check_additional_info_empty()
+            if is_empty is None:
+                # Проверить не удалось - решает повтор
+                self._return_to_search_page()
+                return False
+            if not is_empty:
                 if not self._warn_existing_data():
                     self.log("⚠️ Пропускаем - данные уже существуют")
                     # Возвращаемся на страницу поиска
-                    self._return_to_search_page()
+                    with self._phase("возврат к поиску"):
+                        self._return_to_search_page()
                     return True  # Возвращаем True, так как это не ошибка
                     
             # 6. Навигация к форме дополнительной информации
             self.log("🔄 Переходим на вкладку доп. информации...")
-            if not self._navigate_to_additional_info():
+            with self._phase("переход к форме"):
+                navigated = self._navigate_to_additional_info()
+            if not navigated:
+                if self.last_error is not None:
+                    # Сбой запроса, а не неожиданная страница - оператор не нужен, решает повтор
+                    return False
                 # Запрашиваем ручное вмешательство при ошибке навигации
                 if self.wait_for_manual_intervention("Не удалось перейти на вкладку доп. информации"):
                     self.log("▶️ Продолжаем после ручного вмешательства")
                     # Предполагаем, что пользователь уже на нужной форме
                 else:
-                    return False
+                    return self._fail(STALE)
                 
-            # 7. Форматирование данных семьи (с доходами)
-            formatted_data = self._format_family_data(family_data)
-            
-            # 8. Заполнение формы
-            if not self._fill_form(*formatted_data):
+            # 7-8. Форматирование данных семьи (с доходами) и заполнение формы
+            with self._phase("заполнение"):
+                formatted_data = self._format_family_data(family_data)
+                filled = self._fill_form(*formatted_data)
+            if not filled:
                 self.log("❌ Ошибка заполнения формы")
                 return False
             
             # 9. Сохранение
-            if self._final_verification(family_data):
-                if self._save_and_exit():
+            with self._phase("проверка"):
+                confirmed = self._final_verification(family_data)
+            if not confirmed:
+                # Оператор не подтвердил данные - повтор их не исправит
+                return self._fail(VALIDATION)
+            if confirmed:
+                if self.screenshot_dir:
+                    # Страница после сохранения нужна для скриншота целиком - с картинками и в большом окне
+                    self._set_full_rendering(True)
+                with self._phase("сохранение"):
+                    saved = self._save_and_exit()
+                if saved:
                     # 10. Скриншот (делаем скриншот сразу после сохранения)
                     if self.screenshot_dir:
-                        self._take_screenshot(formatted_data, family_number, family_data)
+                        with self._phase("скриншот"):
+                            self._take_screenshot(formatted_data, family_number, family_data)
+                        self._set_full_rendering(False)
 
                     # 11. Возвращаемся на страницу поиска без закрытия браузера
-                    time.sleep(0.2)
-                    self._return_to_search_page()
+                    with self._phase("возврат к поиску"):
+                        self._return_to_search_page()
 
                     self.log("✅ Семья обработана успешно")
                     return True
@@ -2316,8 +2933,140 @@ class AutoFormFillerMass:
             self.log(f"❌ Ошибка при обработке семьи: {str(e)}")
             import traceback
             self.log(f"📋 Трассировка:\n{traceback.format_exc()}")
+            self.last_error = e
             return False
     
+    def _search_and_open_card(self, family_data, family_number, search_fio):
+        """Поиск семьи на странице поиска и переход в выбранную карточку"""
+        mother_fio = family_data.get('mother_fio', '')
+        
+        # 1. Возвращаемся на страницу поиска
+        self.log("🔙 Возвращаемся на страницу поиска...")
+        try:
+            with self._phase("поиск"):
+                self.driver.get(self.search_url)
+                self.waiter.page_idle("страница поиска")
+        except Exception as e:
+            self.log(f"❌ Не удалось загрузить страницу поиска: {e}")
+            self.last_error = e
+
+            # Запрашиваем ручное вмешательство
+            if self.wait_for_manual_intervention("Не удалось загрузить страницу поиска"):
+                self.log("▶️ Продолжаем после ручного вмешательства")
+                # Проверяем, что страница доступна после ручного вмешательства
+                try:
+                    WebDriverWait(self.driver, 10).until(
+                        EC.presence_of_element_located((By.ID, "ctl00_cph_ctrlFastFind_tbFind"))
+                    )
+                    self.log("✅ Страница поиска доступна после ручного вмешательства")
+                except:
+                    self.log("❌ Страница поиска все еще недоступна после ручного вмешательства")
+                    return False
+            else:
+                return False
+
+        # 2. Поиск семьи по ФИО матери (или отца)
+        self.log(f"🔍 Поиск семьи: {search_fio}")
+
+        # Выполняем поиск
+        with self._phase("поиск"):
+            found = self._fast_search_mother(search_fio)
+        if not found:
+            self.log("❌ Не удалось найти семью")
+            if self.last_error is not None:
+                # Поиск не выполнился, а не ничего не нашел - решает повтор
+                return False
+
+            # Запрашиваем ручное вмешательство
+            if self.wait_for_manual_intervention(f"Не удалось найти семью: {mother_fio}"):
+                self.log("▶️ Продолжаем после ручного вмешательства")
+                # Предполагаем, что пользователь уже на нужной странице
+            else:
+                return self._fail(NOT_FOUND)
+
+        # 3. Анализ результатов поиска и автоматический выбор карточки
+        self.log("🤖 Анализируем результаты поиска...")
+        with self._phase("карточка"):
+            result = self._analyze_search_results(family_number, search_fio)
+            if result:
+                self._remember_card(family_data, search_fio)
+
+        if not result:
+            self.log("❌ Не удалось автоматически выбрать карточку")
+            if self.last_error is not None:
+                return False
+
+            # Запрашиваем ручное вмешательство
+            if self.wait_for_manual_intervention("Не удалось автоматически выбрать карточку"):
+                self.log("▶️ Продолжаем после ручного вмешательства")
+                # Предполагаем, что пользователь уже на нужной карточке
+            else:
+                return self._fail(NOT_FOUND)
+
+        return True
+
+    @staticmethod
+    def _card_birth(family_data, search_fio):
+        """Дата рождения того, по чьему ФИО ищется карточка"""
+        if search_fio == family_data.get('mother_fio'):
+            return family_data.get('mother_birth', '')
+        return family_data.get('father_birth', '')
+
+    def _open_card_from_cache(self, family_data, search_fio):
+        """Переход в карточку по адресу из кэша без поиска; запись удаляется, если ФИО не совпало"""
+        if self.card_cache is None:
+            return False
+
+        birth = self._card_birth(family_data, search_fio)
+        card_url = self.card_cache.get(search_fio, birth)
+        if not card_url:
+            return False
+
+        self.log(f"⚡ Карточка из кэша: {card_url}")
+        try:
+            self._navigate_to_card_url(card_url)
+            card_fio = self._get_card_fio()
+        except Exception as e:
+            self.log(f"⚠️ Не удалось открыть карточку из кэша: {e}")
+            return False
+
+        if card_fio is None:
+            # Без поля ФИО нельзя убедиться, что это карточка той же семьи
+            self.log("⚠️ На карточке из кэша не найдено поле ФИО, удаляем запись и ищем семью")
+            self.card_cache.evict(search_fio, birth)
+            return False
+
+        if fio_matches(search_fio, card_fio):
+            self.log(f"✅ Открыта карточка из кэша: {search_fio}")
+            return True
+
+        self.log(f"⚠️ Карточка из кэша не совпадает ({card_fio[:50]}), удаляем запись")
+        self.card_cache.evict(search_fio, birth)
+        return False
+
+    def _remember_card(self, family_data, search_fio):
+        """Сохранение адреса открытой карточки в кэш"""
+        if self.card_cache is None:
+            return
+        try:
+            self.waiter.until("карточка", lambda driver: "CardInfo.aspx" in driver.current_url, timeout=5)
+            self.card_cache.put(search_fio, self._card_birth(family_data, search_fio), self.driver.current_url)
+        except Exception as e:
+            self.log(f"⚠️ Адрес карточки не сохранен в кэш: {e}")
+
+    def _navigate_to_card_url(self, card_url):
+        """Открытие карточки по адресу"""
+        self.driver.get(card_url)
+        self.waiter.until("карточка", lambda driver: driver.execute_script(PAGE_IDLE_SCRIPT))
+
+    def _get_card_fio(self):
+        """ФИО из поля ФИО открытой карточки или None, если поля нет"""
+        return self.driver.execute_script(
+            "var el = document.getElementById(arguments[0]) || document.querySelector('.' + arguments[1]);"
+            "return el ? el.innerText : null;",
+            CARD_FIO_ID, CARD_FIO_CLASS
+        )
+
     def _get_phone_and_address_from_family_data(self, family_data):
         """Получение телефона и адреса из данных семьи (JSON)"""
         try:
@@ -2373,20 +3122,21 @@ class AutoFormFillerMass:
                         self.address = address_text
                         self.log(f"🏠 Адрес со страницы: {self.address}")
                         
-                        # Спрашиваем пользователя, верен ли адрес
-                        result = messagebox.askyesno(
-                            "Проверка адреса", 
-                            f"Адрес верен?\n{self.address}\n\nЕсли нет - отредактируйте в следующих шагах."
-                        )
-                        
-                        if not result:
-                            address_dialog = ctk.CTkInputDialog(
-                                text=f"Введите правильный адрес:",
-                                title="Исправление адреса"
+                        with self.interaction_lock:
+                            # Спрашиваем пользователя, верен ли адрес
+                            result = self.gui.ask_yes_no(
+                                "Проверка адреса", 
+                                f"Адрес верен?\n{self.address}\n\nЕсли нет - отредактируйте в следующих шагах.",
+                                default=True
                             )
-                            new_address = address_dialog.get_input()
-                            if new_address:
-                                self.address = new_address
+                            
+                            if not result:
+                                new_address = self.gui.ask_input(
+                                    "Исправление адреса",
+                                    f"Введите правильный адрес:"
+                                )
+                                if new_address:
+                                    self.address = new_address
                 except Exception as e:
                     self.log("⚠️ Адрес не найден на странице")
                     if not self.address:
@@ -2399,421 +3149,201 @@ class AutoFormFillerMass:
         """Возврат на страницу поиска без закрытия браузера"""
         try:
             self.log("🔄 Возвращаемся на страницу поиска...")
-            self.driver.get("http://localhost:8080/aspnetkp/Common/FindInfo.aspx")
+            self.driver.get(self.search_url)
             
             # Ждем полной загрузки страницы
-            WebDriverWait(self.driver, 10).until(
-                lambda driver: driver.execute_script("return document.readyState") == "complete"
-            )
+            self.waiter.page_idle("страница поиска")
             
             # Дополнительно ждем появление элемента поиска и проверяем, что он доступен для ввода
-            search_element = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.NAME, "ctl00$cph$ctrlFastFind$tbFind"))
+            search_element = self.waiter.until(
+                "страница поиска", EC.element_to_be_clickable((By.NAME, "ctl00$cph$ctrlFastFind$tbFind"))
             )
             
             # Убедимся, что поле поиска пустое перед следующим использованием
             search_element.clear()
             
             # Дополнительно проверяем, что страница полностью загружена и готова к поиску
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.ID, "ctl00_cph_dTabsContainer"))  # Убедимся, что контейнер результатов поиска присутствует
+            self.waiter.until(
+                "страница поиска", EC.presence_of_element_located((By.ID, "ctl00_cph_dTabsContainer"))  # Убедимся, что контейнер результатов поиска присутствует
             )
             
             self.log("✅ Вернулись на страницу поиска")
         except Exception as e:
             self.log(f"⚠️ Не удалось вернуться на страницу поиска: {e}")
     
-    def _analyze_search_results(self, family_number, mother_fio):
-        """Анализ результатов поиска и автоматический выбор карточки"""
-        try:
-            # Добавляем дополнительное ожидание полной загрузки страницы результатов поиска
-            WebDriverWait(self.driver, 10).until(
-                lambda driver: driver.execute_script("return document.readyState") == "complete"
-            )
-            
-            # Ждем появления контейнера с результатами поиска
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "#ctl00_cph_dTabsContainer"))
-            )
-            
-            # Повторяем попытку нахождения карточек с несколькими попытками
-            cards = None
-            for attempt in range(3):
-                try:
-                    cards = WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_all_elements_located((By.CSS_SELECTOR, "#ctl00_cph_dTabsContainer .pers"))
-                    )
-                    break
-                except:
-                    self.log(f"⚠️ Попытка {attempt + 1} нахождения карточек не удалась, ожидание и повтор...")
-                    time.sleep(1)
-                    continue
-            
-            if not cards:
-                self.log("❌ Карточки не найдены")
-                return False
-                
-            self.log(f"📊 Найдено карточек: {len(cards)}")
-            
-            # Убираем автоматический выбор первой карточки, если найдена только одна
-            # Теперь будем искать карточки по приоритетам: "Вышневолоцкий городской округ" -> "Вышневолоцкий" -> "Вышний Волочек" -> выбор пользователем
-            
-            # Получаем свежий список карточек для анализа
-            fresh_cards = self.driver.find_elements(By.CSS_SELECTOR, "#ctl00_cph_dTabsContainer .pers")
-            
-            # Поиск по приоритетам
-            vyishnevolotsk_ao_cards = []  # "Вышневолоцкий городской округ"
-            vyishnevolotsk_cards = []     # "Вышневолоцкий"
-            vyshniy_volochek_cards = []   # "Вышний Волочек"
-            
-            for i, card in enumerate(fresh_cards):
-                try:
-                    # Используем более надежный способ получения текста
-                    fio = ""
-                    try:
-                        fio_element = card.find_element(By.CSS_SELECTOR, ".fio")
-                        fio = fio_element.text if fio_element else ""
-                    except:
-                        # Альтернативный способ получения ФИО
-                        try:
-                            fio = card.text.split('\n')[0] if card.text else ""
-                        except:
-                            fio = f"Карточка {i+1}"
-                    
-                    address = ""
-                    try:
-                        details_table = card.find_element(By.CSS_SELECTOR, "table.tbl-details")
-                        rows = details_table.find_elements(By.TAG_NAME, "tr")
-                        
-                        for row in rows:
-                            cells = row.find_elements(By.TAG_NAME, "td")
-                            if len(cells) >= 2 and "Проживает:" in cells[0].text:
-                                address = cells[1].text
-                                break
-                    except:
-                        # Альтернативный способ получения адреса
-                        address = card.text
-                    
-                    self.log(f"  Карточка {i+1}: {fio}")
-                    self.log(f"    Адрес: {address[:50]}..." if len(address) > 50 else f"    Адрес: {address}")
-                    
-                    # Проверяем по приоритетам
-                    address_lower = address.lower()
-                    if "вышневолоцкий городской округ" in address_lower:
-                        vyishnevolotsk_ao_cards.append({
-                            'index': i,
-                            'card': card,
-                            'fio': fio,
-                            'address': address
-                        })
-                        self.log(f"    ✅ Подходит под Вышневолоцкий городской округ")
-                    elif "вышневолоцкий" in address_lower:
-                        vyishnevolotsk_cards.append({
-                            'index': i,
-                            'card': card,
-                            'fio': fio,
-                            'address': address
-                        })
-                        self.log(f"    ✅ Подходит под Вышневолоцкий район")
-                    elif "вышний волочек" in address_lower:
-                        vyshniy_volochek_cards.append({
-                            'index': i,
-                            'card': card,
-                            'fio': fio,
-                            'address': address
-                        })
-                        self.log(f"    ✅ Подходит под Вышний Волочек")
-                    elif "вышневолоцкий" in address_lower:
-                        vyishnevolotsk_cards.append({
-                            'index': i,
-                            'card': card,
-                            'fio': fio,
-                            'address': address
-                        })
-                        self.log(f"    ✅ Подходит под Вышневолоцкий район (альтернативное написание)")
-                    elif "вышнего волочка" in address_lower:
-                        vyshniy_volochek_cards.append({
-                            'index': i,
-                            'card': card,
-                            'fio': fio,
-                            'address': address
-                        })
-                        self.log(f"    ✅ Подходит под Вышний Волочек (альтернативное написание)")
-                        
-                except Exception as e:
-                    self.log(f"⚠️ Ошибка анализа карточки {i+1}: {e}")
-                    continue
-            
-            # Проверяем карточки по приоритетам
-            selected_cards = []
-            priority_name = ""
-            
-            if vyishnevolotsk_ao_cards:
-                selected_cards = vyishnevolotsk_ao_cards
-                priority_name = "Вышневолоцкий городской округ"
-                self.log(f"✅ Найдено {len(vyishnevolotsk_ao_cards)} карточек в {priority_name}")
-            elif vyishnevolotsk_cards:
-                selected_cards = vyishnevolotsk_cards
-                priority_name = "Вышневолоцкий район"
-                self.log(f"✅ Найдено {len(vyishnevolotsk_cards)} карточек в {priority_name}")
-            elif vyshniy_volochek_cards:
-                selected_cards = vyshniy_volochek_cards
-                priority_name = "Вышний Волочек"
-                self.log(f"✅ Найдено {len(vyshniy_volochek_cards)} карточек в {priority_name}")
-            else:
+    def _extract_cards(self):
+        """Карточки результатов поиска одним запросом: ФИО, адрес и ссылка на карточку"""
+        cards_script = """
+        var cards = document.querySelectorAll('#ctl00_cph_dTabsContainer .pers');
+        var result = [];
+        for (var i = 0; i < cards.length; i++) {
+            var card = cards[i];
+            var cardText = card.innerText || '';
+            var fioElement = card.querySelector('.fio');
+            var fio = fioElement ? fioElement.innerText.trim() : cardText.split('\\n')[0];
+
+            var address = '';
+            var details = card.querySelector('table.tbl-details');
+            if (details) {
+                var rows = details.getElementsByTagName('tr');
+                for (var j = 0; j < rows.length; j++) {
+                    var cells = rows[j].getElementsByTagName('td');
+                    if (cells.length >= 2 && cells[0].innerText.indexOf('Проживает:') !== -1) {
+                        address = cells[1].innerText.trim();
+                        break;
+                    }
+                }
+            } else {
+                address = cardText;
+            }
+
+            var link = card.querySelector("a[title='Переход в просмотр ПКУ']");
+            result.push({
+                index: i,
+                id: card.id || '',
+                fio: fio || ('Карточка ' + (i + 1)),
+                address: address,
+                link_id: link ? (link.id || '') : '',
+                href: link ? (link.getAttribute('href') || '') : ''
+            });
+        }
+        return result;
+        """
+        # Ждем загрузки страницы результатов поиска и контейнера с карточками
+        self.waiter.until("поиск", lambda driver: driver.execute_script(PAGE_IDLE_SCRIPT))
+        self.waiter.until("поиск", EC.presence_of_element_located((By.CSS_SELECTOR, "#ctl00_cph_dTabsContainer")))
+
+        # Карточки могут появиться не сразу - несколько попыток
+        for attempt in range(3):
+            try:
+                cards = self.driver.execute_script(cards_script)
+                if cards:
+                    return cards
+            except Exception as e:
+                self.log(f"⚠️ Ошибка чтения карточек: {e}")
+            self.log(f"⚠️ Попытка {attempt + 1} нахождения карточек не удалась, ожидание и повтор...")
+            time.sleep(1)
+        return []
+
+    def _open_card(self, card):
+        """Переход в карточку по ссылке 'Переход в просмотр ПКУ'"""
+        click_script = """
+        var link = arguments[0] ? document.getElementById(arguments[0]) : null;
+        if (!link) {
+            var cards = document.querySelectorAll('#ctl00_cph_dTabsContainer .pers');
+            if (cards.length > arguments[1]) {
+                link = cards[arguments[1]].querySelector("a[title='Переход в просмотр ПКУ']");
+            }
+        }
+        if (!link) {
+            return false;
+        }
+        link.scrollIntoView({block: 'center'});
+        link.click();
+        return true;
+        """
+        try:
+            clicked = self.driver.execute_script(click_script, card['link_id'], card['index'])
+        except Exception as e:
+            self.log(f"⚠️ Не удалось кликнуть по ссылке через JavaScript: {e}")
+            clicked = False
+
+        if not clicked:
+            href = card.get('href', '')
+            if not href or href.lower().startswith('javascript:'):
+                self.log("❌ Не удалось найти ссылку для перехода к карточке")
+                return False
+            self.driver.get(urljoin(self.driver.current_url, href))
+
+        self.log(f"✅ Открыта карточка: {card['fio']}")
+        return True
+
+    def _analyze_search_results(self, family_number, mother_fio):
+        """Анализ результатов поиска и автоматический выбор карточки"""
+        try:
+            cards = self._extract_cards()
+            if not cards:
+                self.log("❌ Карточки не найдены")
+                return False
+            self.log(f"📊 Найдено карточек: {len(cards)}")
+
+            # Приоритет районов: "Вышневолоцкий городской округ" -> "Вышневолоцкий" -> "Вышний Волочек" -> выбор пользователем
+            best_rank = None
+            for card in cards:
+                rank, district = classify_card_address(card['address'])
+                card['rank'] = rank
+                card['district'] = district
+                score = score_card_fio(mother_fio, card)
+                self.log(f"  Карточка {card['index']+1}: {card['fio']} (ФИО {score:.0%}) - {card['address'][:50]}")
+                if rank is not None and (best_rank is None or rank < best_rank):
+                    best_rank = rank
+
+            if best_rank is None:
                 self.log("❌ Не найдено карточек в указанных районах (Вышневолоцкий городской округ, Вышневолоцкий район, Вышний Волочек)")
-                # Получаем свежий список карточек для передачи в выбор
-                fresh_cards_for_selection = self.driver.find_elements(By.CSS_SELECTOR, "#ctl00_cph_dTabsContainer .pers")
-                return self._show_cards_for_selection(fresh_cards_for_selection, family_number, mother_fio)
-                
-            # Обработка выбранного приоритета
-            if len(selected_cards) == 1:
-                self.log(f"✅ Найдена 1 карточка в {priority_name}")
-                try:
-                    # Используем свежую карточку из selected_cards
-                    card = selected_cards[0]['card']
-                    # Ищем ссылку с атрибутом title='Переход в просмотр ПКУ' с обработкой stale элементов
-                    try:
-                        links = card.find_elements(By.CSS_SELECTOR, "a[title='Переход в просмотр ПКУ']")
-                    except Exception as e:
-                        if "stale element reference" in str(e).lower():
-                            # Получаем свежий список карточек и пробуем снова
-                            fresh_cards = self.driver.find_elements(By.CSS_SELECTOR, "#ctl00_cph_dTabsContainer .pers")
-                            if len(fresh_cards) > selected_cards[0]['index']:
-                                card = fresh_cards[selected_cards[0]['index']]
-                                links = card.find_elements(By.CSS_SELECTOR, "a[title='Переход в просмотр ПКУ']")
-                            else:
-                                self.log("❌ Не удалось получить свежий список карточек")
-                                return False
-                        else:
-                            raise e
-                    
-                    if len(links) > 0:
-                        link = links[0]
-                        # Получаем ID ссылки для использования в случае stale element reference
-                        link_id = link.get_attribute("id")
-                        
-                        if link_id:
-                            # Используем ID для получения свежего элемента перед кликом
-                            try:
-                                fresh_link = WebDriverWait(self.driver, 10).until(
-                                    EC.element_to_be_clickable((By.ID, link_id))
-                                )
-                                # Прокручиваем к элементу перед кликом
-                                self.driver.execute_script("arguments[0].scrollIntoView({block: 'center', behavior: 'smooth'});", fresh_link)
-                                time.sleep(0.5)  # Небольшая задержка для завершения прокрутки
-                                
-                                # Используем JavaScript для клика, чтобы избежать stale element reference
-                                try:
-                                    self.driver.execute_script("arguments[0].click();", fresh_link)
-                                except:
-                                    # Если JavaScript клик не работает, используем обычный клик
-                                    fresh_link.click()
-                            except:
-                                # Если не удается найти элемент по ID, используем JavaScript напрямую
-                                link_script = f"document.querySelector('a[title=\"Переход в просмотр ПКУ\"][id=\"{link_id}\"]')"
-                                try:
-                                    self.driver.execute_script(f"({link_script}).click();")
-                                except Exception as js_error:
-                                    self.log(f"❌ Не удалось кликнуть через JavaScript по ID: {js_error}")
-                                    # Попробуем универсальный селектор
-                                    try:
-                                        self.driver.execute_script("document.querySelector('a[title=\"Переход в просмотр ПКУ\"]').click();")
-                                    except Exception as universal_error:
-                                        self.log(f"❌ Не удалось кликнуть через универсальный селектор: {universal_error}")
-                                        return False
-                        else:
-                            # Если у ссылки нет ID, используем общий селектор
-                            try:
-                                # Прокручиваем к элементу перед кликом
-                                self.driver.execute_script("arguments[0].scrollIntoView({block: 'center', behavior: 'smooth'});", link)
-                                time.sleep(0.5)  # Небольшая задержка для завершения прокрутки
-                                
-                                # Используем JavaScript для клика, чтобы избежать stale element reference
-                                try:
-                                    self.driver.execute_script("arguments[0].click();", link)
-                                except:
-                                    # Если JavaScript клик не работает, используем обычный клик
-                                    link.click()
-                            except Exception as click_error:
-                                self.log(f"❌ Не удалось кликнуть на ссылку: {click_error}")
-                                return False
-                        
-                        return True
-                    else:
-                        self.log("❌ Не удалось найти ссылку для перехода к карточке")
-                        return False
-                except Exception as e:
-                    self.log(f"❌ Не удалось кликнуть на ссылку: {e}")
-                    import traceback
-                    self.log(f"📋 Трассировка:\n{traceback.format_exc()}")
-                    return False
-                    
-            else:
-                self.log(f"⚠️ Найдено {len(selected_cards)} карточек в {priority_name}")
-                # Передаем свежие карточки в метод выбора
-                fresh_cards_for_selection = [info['card'] for info in selected_cards]
-                return self._show_cards_for_selection(
-                    fresh_cards_for_selection,
-                    family_number,
-                    mother_fio,
-                    filtered=True
-                )
-                
+                return self._show_cards_for_selection(cards, family_number, mother_fio)
+
+            selected = [card for card in cards if card['rank'] == best_rank]
+            if len(selected) == 1:
+                self.log(f"✅ Найдена 1 карточка в {selected[0]['district']}")
+                return self._open_card(selected[0])
+
+            self.log(f"⚠️ Найдено {len(selected)} карточек в {selected[0]['district']}")
+            # Без оператора - только если ровно одна карточка района того же человека по ФИО
+            card = pick_card_by_fio(mother_fio, selected)
+            if card is not None:
+                self.log(f"✅ Выбрана карточка {card['index']+1} по совпадению ФИО ({card['score']:.0%})")
+                return self._open_card(card)
+            return self._show_cards_for_selection(selected, family_number, mother_fio, filtered=True)
+
         except Exception as e:
             self.log(f"❌ Ошибка анализа результатов поиска: {e}")
             import traceback
             self.log(f"📋 Трассировка:\n{traceback.format_exc()}")
+            self.last_error = e
             return False
-    
+
     def _show_cards_for_selection(self, cards, family_number, mother_fio, filtered=False):
         """Показ карточек пользователю для выбора"""
         try:
-            card_info_list = []
-            
-            # Получаем свежие карточки для отображения информации
-            for i, card in enumerate(cards):
-                try:
-                    fio_element = card.find_element(By.CSS_SELECTOR, ".fio")
-                    fio = fio_element.text if fio_element else f"Карточка {i+1}"
-                    
-                    address = ""
-                    try:
-                        details_table = card.find_element(By.CSS_SELECTOR, "table.tbl-details")
-                        rows = details_table.find_elements(By.TAG_NAME, "tr")
-                        
-                        for row in rows:
-                            cells = row.find_elements(By.TAG_NAME, "td")
-                            if len(cells) >= 2 and "Проживает:" in cells[0].text:
-                                address = cells[1].text
-                                break
-                    except:
-                        pass
-                    
-                    # Определяем приоритет района для отображения
-                    address_lower = address.lower()
-                    priority = ""
-                    if "вышневолоцкий городской округ" in address_lower:
-                        priority = " (Вышневолоцкий ГО)"
-                    elif "вышневолоцкий" in address_lower:
-                        priority = " (Вышневолоцкий)"
-                    elif "вышний волочек" in address_lower:
-                        priority = " (Вышний Волочек)"
-                    
-                    card_info_list.append({
-                        'index': i,
-                        'fio': fio,
-                        'address': address[:100] + "..." if len(address) > 100 else address,
-                        'priority': priority
-                    })
-                except:
-                    card_info_list.append({
-                        'index': i,
-                        'fio': f"Карточка {i+1}",
-                        'address': "Информация недоступна",
-                        'priority': ""
-                    })
-            
+            if self.defer_manual:
+                reason = "Несколько карточек в приоритетном районе" if filtered else "Нет карточек в приоритетных районах"
+                return self._defer_family(f"{reason}, нужен выбор оператора")
+
             dialog_text = f"Семья {family_number}: {mother_fio}\n\n"
-            
+
             if filtered:
                 dialog_text += "Найдено несколько карточек в приоритетных районах (Вышневолоцкий городской округ -> Вышневолоцкий -> Вышний Волочек):\n\n"
             else:
                 dialog_text += "Найдено несколько карточек. Выберите нужную:\n\n"
-            
-            for i, info in enumerate(card_info_list):
-                dialog_text += f"{i+1}. {info['fio']}{info.get('priority', '')}\n"
-                dialog_text += f"   Адрес: {info['address']}\n\n"
-            
+
+            for i, card in enumerate(cards):
+                address = card['address'][:100] + "..." if len(card['address']) > 100 else card['address']
+                priority = f" ({card['district']})" if card.get('district') else ""
+                dialog_text += f"{i+1}. {card['fio']}{priority}\n"
+                dialog_text += f"   Адрес: {address}\n\n"
+
             dialog_text += "Введите номер карточки (1, 2, 3...):"
-            
-            choice_dialog = ctk.CTkInputDialog(
-                text=dialog_text,
-                title="Выбор карточки"
-            )
-            
-            choice = choice_dialog.get_input()
-            
+
+            with self.interaction_lock:
+                choice = self.gui.ask_input("Выбор карточки", dialog_text)
+
             if not choice:
                 self.log("❌ Пользователь не сделал выбор")
                 return False
-                
+
             try:
                 choice_num = int(choice) - 1
-                if 0 <= choice_num < len(cards):
-                    # Вместо использования старой карточки, находим свежую по индексу
-                    fresh_cards = self.driver.find_elements(By.CSS_SELECTOR, "#ctl00_cph_dTabsContainer .pers")
-                    if choice_num < len(fresh_cards):
-                        selected_card = fresh_cards[choice_num]
-                        # Ищем ссылку с атрибутом title='Переход в просмотр ПКУ'
-                        links = selected_card.find_elements(By.CSS_SELECTOR, "a[title='Переход в просмотр ПКУ']")
-                        if len(links) > 0:
-                            link = links[0]
-                            # Получаем ID ссылки для использования в случае stale element reference
-                            link_id = link.get_attribute("id")
-                            
-                            if link_id:
-                                # Используем ID для получения свежего элемента перед кликом
-                                try:
-                                    fresh_link = WebDriverWait(self.driver, 10).until(
-                                        EC.element_to_be_clickable((By.ID, link_id))
-                                    )
-                                    # Прокручиваем к элементу перед кликом
-                                    self.driver.execute_script("arguments[0].scrollIntoView({block: 'center', behavior: 'smooth'});", fresh_link)
-                                    time.sleep(0.5)  # Небольшая задержка для завершения прокрутки
-                                    
-                                    # Используем JavaScript для клика, чтобы избежать stale element reference
-                                    try:
-                                        self.driver.execute_script("arguments[0].click();", fresh_link)
-                                    except:
-                                        # Если JavaScript клик не работает, используем обычный клик
-                                        fresh_link.click()
-                                except:
-                                    # Если не удается найти элемент по ID, используем JavaScript напрямую
-                                    link_script = f"document.querySelector('a[title=\"Переход в просмотр ПКУ\"][id=\"{link_id}\"]')"
-                                    try:
-                                        self.driver.execute_script(f"({link_script}).click();")
-                                    except Exception as js_error:
-                                        self.log(f"❌ Не удалось кликнуть через JavaScript по ID: {js_error}")
-                                        # Попробуем универсальный селектор
-                                        try:
-                                            self.driver.execute_script("document.querySelector('a[title=\"Переход в просмотр ПКУ\"]').click();")
-                                        except Exception as universal_error:
-                                            self.log(f"❌ Не удалось кликнуть через универсальный селектор: {universal_error}")
-                                            return False
-                            else:
-                                # Если у ссылки нет ID, используем общий селектор
-                                try:
-                                    # Прокручиваем к элементу перед кликом
-                                    self.driver.execute_script("arguments[0].scrollIntoView({block: 'center', behavior: 'smooth'});", link)
-                                    time.sleep(0.5)  # Небольшая задержка для завершения прокрутки
-                                    
-                                    # Используем JavaScript для клика, чтобы избежать stale element reference
-                                    try:
-                                        self.driver.execute_script("arguments[0].click();", link)
-                                    except:
-                                        # Если JavaScript клик не работает, используем обычный клик
-                                        link.click()
-                                except Exception as click_error:
-                                    self.log(f"❌ Не удалось кликнуть на ссылку: {click_error}")
-                                    return False
-                            
-                            time.sleep(0.8)  # Уменьшено с 2 до 0.8 секунды
-                            self.log(f"✅ Выбрана карточка {choice_num + 1}")
-                            return True
-                        else:
-                            self.log(f"❌ Не удалось найти ссылку для карточки {choice_num + 1}")
-                            return False
-                    else:
-                        self.log(f"❌ Карточка с индексом {choice_num} не найдена в свежем списке")
-                        return False
-                else:
-                    self.log(f"❌ Некорректный номер карточки: {choice}")
-                    return False
             except ValueError:
                 self.log(f"❌ Некорректный ввод: {choice}")
                 return False
-                
+
+            if not 0 <= choice_num < len(cards):
+                self.log(f"❌ Некорректный номер карточки: {choice}")
+                return False
+
+            self.log(f"✅ Выбрана карточка {choice_num + 1}")
+            return self._open_card(cards[choice_num])
+
         except Exception as e:
             self.log(f"❌ Ошибка при выборе карточки: {e}")
             import traceback
@@ -2829,16 +3359,17 @@ class AutoFormFillerMass:
             from chrome_driver_helper import setup_chrome_driver
             
             # Используем улучшенный метод настройки ChromeDriver
-            self.driver = setup_chrome_driver()
+            self.driver = setup_chrome_driver(headless=self.headless, configure_options=self._configure_chrome_options)
             if self.driver is None:
                 self.log("❌ Не удалось настроить ChromeDriver")
-                messagebox.showerror("Ошибка", "Не удалось настроить ChromeDriver")
+                self.gui.show_error("Ошибка", "Не удалось настроить ChromeDriver")
                 return False
             
             self.wait = WebDriverWait(self.driver, 10)
-            self.driver.maximize_window()
+            self.waiter = AdaptiveWaiter(self.driver)
+            self._prepare_window()
             
-            if not self._login():
+            if not self._sign_in():
                 return False
                 
             self.log("✅ Драйвер настроен и выполнен вход")
@@ -2860,14 +3391,14 @@ class AutoFormFillerMass:
             browser = self._detect_browser()
             if not browser:
                 self.log("❌ Не найден Chrome, Yandex или Chromium")
-                messagebox.showerror("Ошибка", "Не найден браузер Chrome, Yandex или Chromium")
+                self.gui.show_error("Ошибка", "Не найден браузер Chrome, Yandex или Chromium")
                 return False
                 
             try:
                 driver_path = ChromeDriverManager(chrome_type=browser['type']).install()
             except Exception as e:
                 self.log(f"❌ Не удалось установить драйвер: {e}")
-                messagebox.showerror("Ошибка", f"Не удалось установить драйвер браузера: {e}")
+                self.gui.show_error("Ошибка", f"Не удалось установить драйвер браузера: {e}")
                 return False
                 
             service = webdriver.chrome.service.Service(driver_path)
@@ -2878,16 +3409,21 @@ class AutoFormFillerMass:
                 options.add_argument('--disable-dev-shm-usage')
             
             options.add_argument('--disable-blink-features=AutomationControlled')
-            options.add_argument('--start-maximized')
+            if self.headless:
+                options.add_argument('--headless=new')
+                options.add_argument('--window-size=1920,1080')
+            else:
+                options.add_argument('--start-maximized')
             options.add_experimental_option('excludeSwitches', ['enable-logging'])
+            self._configure_chrome_options(options)
             
             try:
                 self.driver = webdriver.Chrome(service=service, options=options)
                 self.wait = WebDriverWait(self.driver, 10)
+                self.waiter = AdaptiveWaiter(self.driver)
+                self._prepare_window()
                 
-                self.driver.maximize_window()
-                
-                if not self._login():
+                if not self._sign_in():
                     return False
                     
                 self.log("✅ Драйвер настроен и выполнен вход")
@@ -2901,6 +3437,39 @@ class AutoFormFillerMass:
             self.log(f"❌ Ошибка настройки драйвера: {e}")
             return False
     
+    def _configure_chrome_options(self, options):
+        """Облегченный профиль в настройках Chrome, если он включен"""
+        if not self.light_browser:
+            return
+        self.user_data_dir = make_user_data_dir()
+        apply_light_options(options, self.user_data_dir)
+    
+    def _prepare_window(self):
+        """Окно браузера: развернутое или, в облегченном режиме, небольшое с блокировкой ресурсов"""
+        if not self.light_browser:
+            if not self.headless:
+                self.driver.maximize_window()
+            return
+        try:
+            self.driver.set_window_size(*WINDOW_SIZE)
+        except Exception:
+            pass
+        if set_resource_blocking(self.driver, True):
+            self.log("🪶 Облегченный режим: картинки, шрифты и медиа не загружаются")
+        else:
+            self.log("⚠️ Блокировка ресурсов недоступна (нет CDP), страницы загружаются полностью")
+    
+    def _set_full_rendering(self, enabled):
+        """Полная загрузка страниц и большое окно (для скриншота) или возврат к облегченному режиму"""
+        if not self.light_browser or not self.driver or self.full_rendering == enabled:
+            return
+        self.full_rendering = enabled
+        set_resource_blocking(self.driver, not enabled)
+        try:
+            self.driver.set_window_size(*(SCREENSHOT_WINDOW_SIZE if enabled else WINDOW_SIZE))
+        except Exception:
+            pass
+    
     def _detect_browser(self):
         """Определение доступного браузера"""
         system = platform.system().lower()
@@ -2941,29 +3510,133 @@ class AutoFormFillerMass:
         try:
             self.log("🔐 Выполняем вход...")
             
-            self.driver.get("http://localhost:8080/aspnetkp/Common/FindInfo.aspx")
-            time.sleep(1)
+            self.driver.get(self.search_url)
+            self.waiter.page_idle("вход")
             
             username_field = self.wait.until(
                 EC.element_to_be_clickable((By.NAME, "tbUserName"))
             )
             username_field.clear()
-            username_field.send_keys("СРЦ_Вол")
+            username_field.send_keys(self.username)
             
             password_field = self.wait.until(
                 EC.element_to_be_clickable((By.NAME, "tbPassword"))
             )
             password_field.clear()
-            password_field.send_keys("СРЦ_Вол1", Keys.ENTER)
+            password_field.send_keys(self.password, Keys.ENTER)
             
-            time.sleep(1)
+            # Вход завершен, когда форма входа исчезла и страница загрузилась
+            self.waiter.until("вход", lambda driver: not driver.find_elements(By.NAME, "tbUserName")
+                              and driver.execute_script(PAGE_IDLE_SCRIPT))
             self.log("✅ Вход выполнен")
+            self._save_session()
             return True
             
         except Exception as e:
             self.log(f"❌ Ошибка входа: {e}")
-            messagebox.showerror("Ошибка входа", f"Не удалось выполнить вход: {e}")
+            self.gui.show_error("Ошибка входа", f"Не удалось выполнить вход: {e}")
+            return False
+    
+    def _sign_in(self):
+        """Вход при запуске браузера: по сохраненной сессии, иначе через форму входа"""
+        if self.session_store is None:
+            return self._login()
+        if self._restore_session():
+            return True
+        # Форму входа заполняет один браузер, остальные ждут и берут его сессию
+        with self.session_store.login_lock:
+            if self._restore_session():
+                return True
+            return self._login()
+    
+    def _restore_session(self):
+        """Вход по сохраненным cookie сессии, без формы входа"""
+        if self.session_store is None:
             return False
+        cookies = self.session_store.get(self.base_url, self.username)
+        if not cookies:
+            return False
+        try:
+            self._apply_cookies(cookies)
+            if self._session_accepted():
+                self.log("✅ Вход по сохраненной сессии")
+                return True
+            self.log("⚠️ Сохраненная сессия отклонена, выполняем вход")
+            self.session_store.evict(self.base_url, self.username, cookies)
+        except Exception as e:
+            self.log(f"⚠️ Не удалось использовать сохраненную сессию: {e}")
+        return False
+    
+    def _save_session(self):
+        """Сохранение cookie после входа для следующих браузеров"""
+        if self.session_store is None:
+            return
+        try:
+            self.session_store.put(self.base_url, self.username, self._session_cookies())
+        except Exception as e:
+            self.log(f"⚠️ Не удалось сохранить сессию: {e}")
+    
+    def _session_cookies(self):
+        """Cookie браузера в формате WebDriver (name, value, domain, path, ...)"""
+        return self.driver.get_cookies()
+    
+    def _apply_cookies(self, cookies):
+        """Подстановка cookie в браузер до открытия страниц приложения"""
+        try:
+            # Через DevTools cookie ставятся без загрузки страницы
+            for cookie in cookies:
+                params = {
+                    'name': cookie['name'],
+                    'value': cookie['value'],
+                    'path': cookie.get('path', '/'),
+                    'secure': cookie.get('secure', False),
+                    'httpOnly': cookie.get('httpOnly', False),
+                }
+                if cookie.get('domain'):
+                    params['domain'] = cookie['domain']
+                else:
+                    params['url'] = self.base_url
+                if cookie.get('expiry'):
+                    params['expires'] = cookie['expiry']
+                self.driver.execute_cdp_cmd('Network.setCookie', params)
+        except Exception:
+            # Браузер без DevTools: cookie ставятся только на странице того же сайта
+            self.driver.get(self.search_url)
+            for cookie in cookies:
+                self.driver.add_cookie({key: value for key, value in cookie.items()
+                                        if key in ('name', 'value', 'path', 'domain', 'secure', 'httpOnly', 'expiry')})
+    
+    def _session_accepted(self):
+        """Открылась ли страница поиска без формы входа"""
+        self.driver.get(self.search_url)
+        self.waiter.page_idle("вход")
+        return not self.driver.find_elements(By.NAME, "tbUserName")
+    
+    def _keep_session_alive(self):
+        """Обновление страницы поиска, чтобы не истекла сессия; повторный вход при необходимости"""
+        self.driver.get(self.search_url)
+        self.waiter.page_idle("поддержание сессии")
+        if self.driver.find_elements(By.NAME, "tbUserName"):
+            return self._login()
+        return True
+    
+    def _browser_memory_mb(self):
+        """Память процессов браузера в МБ (None, если узнать не удалось)"""
+        try:
+            import psutil
+            process = psutil.Process(self.driver.service.process.pid)
+            processes = [process] + process.children(recursive=True)
+            return sum(child.memory_info().rss for child in processes) / (1024 * 1024)
+        except ImportError:
+            # Без psutil - хотя бы объем JS кучи текущей страницы
+            try:
+                used = self.driver.execute_script(
+                    "return window.performance && performance.memory ? performance.memory.usedJSHeapSize : null;")
+                return used / (1024 * 1024) if used else None
+            except Exception:
+                return None
+        except Exception:
+            return None
     
     def _fast_search_mother(self, mother_fio):
         """Быстрый поиск по ФИО матери"""
@@ -2971,8 +3644,8 @@ class AutoFormFillerMass:
         for attempt in range(max_attempts):
             try:
                 # Ждем, что поле поиска будет доступно и пустое
-                search_field = WebDriverWait(self.driver, 10).until(
-                    EC.element_to_be_clickable((By.NAME, "ctl00$cph$ctrlFastFind$tbFind"))
+                search_field = self.waiter.until(
+                    "страница поиска", EC.element_to_be_clickable((By.NAME, "ctl00$cph$ctrlFastFind$tbFind"))
                 )
                 
                 # Получаем атрибуты элемента перед возможной устаревшей ссылкой
@@ -2981,13 +3654,12 @@ class AutoFormFillerMass:
                 
                 # Очищаем поле и вводим новое значение
                 search_field.clear()
-                time.sleep(0.2)  # Небольшая задержка для завершения очистки
                 search_field.send_keys(mother_fio)
                 search_field.send_keys(Keys.ENTER)
                 
                 # Ждем появления результатов поиска
-                WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "#ctl00_cph_dTabsContainer .pers"))
+                self.waiter.until(
+                    "поиск", EC.presence_of_element_located((By.CSS_SELECTOR, "#ctl00_cph_dTabsContainer .pers"))
                 )
                 
                 self.log(f"✅ Поиск выполнен успешно (попытка {attempt + 1})")
@@ -3024,16 +3696,17 @@ class AutoFormFillerMass:
                     # Дополнительно убедимся, что мы на странице поиска
                     try:
                         self.driver.refresh()
-                        time.sleep(1)
                         # Повторно дожидаемся загрузки страницы
-                        WebDriverWait(self.driver, 10).until(
-                            lambda driver: driver.execute_script("return document.readyState") == "complete"
-                        )
+                        self.waiter.page_idle("страница поиска")
                     except:
                         pass
                     time.sleep(0.5)
                 else:
                     self.log(f"❌ Ошибка поиска после {max_attempts} попыток: {e}")
+                    # Результаты так и не появились на загруженной странице - семья не найдена;
+                    # остальные ошибки (браузер, сеть) классифицируются по исключению
+                    if classify_exception(e) != STALE:
+                        self.last_error = e
                     return False
         return False
     
@@ -3056,8 +3729,8 @@ class AutoFormFillerMass:
                         
                 # Ждем появления элемента с информацией
                 try:
-                    info_element = WebDriverWait(self.driver, 5).until(
-                        EC.presence_of_element_located((By.ID, "ctl00_cph_lblAddInfo2"))
+                    info_element = self.waiter.until(
+                        "вкладка доп. информации", EC.presence_of_element_located((By.ID, "ctl00_cph_lblAddInfo2"))
                     )
                     info_text = info_element.text.strip()
                 except:
@@ -3073,14 +3746,18 @@ class AutoFormFillerMass:
                     self.log(f"⚠️ Попытка {attempt + 1} проверки поля не удалась: {e}")
                     time.sleep(0.5)
                 else:
+                    # Неизвестно - не значит пусто: иначе сохранение затрет существующие данные
                     self.log(f"⚠️ Ошибка проверки поля: {e}")
-                    return True
-        return True
+                    self.last_error = e
+                    return None
+        return None
     
     def _warn_existing_data(self):
         """Предупреждение о существующих данных"""
-        return messagebox.askyesno("Предупреждение", 
-                                 "В разделе уже есть данные! Они будут УДАЛЕНЫ.\nПродолжить?")
+        with self.interaction_lock:
+            return self.gui.ask_yes_no("Предупреждение", 
+                                       "В разделе уже есть данные! Они будут УДАЛЕНЫ.\nПродолжить?",
+                                       default=False)
                                  
     def _navigate_to_additional_info(self):
         """Навигация к форме дополнительной информации"""
@@ -3090,8 +3767,8 @@ class AutoFormFillerMass:
             
             # Проверяем, что мы действительно на странице карточки перед переходом к доп. информации
             try:
-                WebDriverWait(self.driver, 10).until(
-                    lambda driver: "CardInfo.aspx" in driver.current_url or "ПКУ" in driver.title
+                self.waiter.until(
+                    "карточка", lambda driver: "CardInfo.aspx" in driver.current_url or "ПКУ" in driver.title
                 )
             except:
                 self.log("⚠️ Мы не на странице карточки семьи")
@@ -3101,13 +3778,11 @@ class AutoFormFillerMass:
                 self.log("❌ Не удалось кликнуть вкладку дополнительной информации")
                 return False
             
-            # Небольшая задержка для загрузки вкладки
-            time.sleep(0.5)
-            
-            # Ожидаем появление кнопки редактирования с дополнительной проверкой
+            # Ожидаем загрузку вкладки и появление кнопки редактирования
             try:
-                edit_button = WebDriverWait(self.driver, 10).until(
-                    EC.element_to_be_clickable((By.ID, "ctl00_cph_lbtnEditAddInfo"))
+                self.waiter.page_idle("вкладка доп. информации")
+                edit_button = self.waiter.until(
+                    "вкладка доп. информации", EC.element_to_be_clickable((By.ID, "ctl00_cph_lbtnEditAddInfo"))
                 )
                 self.log("✅ Кнопка редактирования найдена")
             except:
@@ -3118,13 +3793,11 @@ class AutoFormFillerMass:
                 self.log("❌ Не удалось кликнуть кнопку редактирования")
                 return False
             
-            # Небольшая задержка после клика по кнопке редактирования
-            time.sleep(0.5)
-            
-            # Ожидаем появление кнопки добавления с дополнительной проверкой
+            # Ожидаем режим редактирования и появление кнопки добавления
             try:
-                add_button = WebDriverWait(self.driver, 10).until(
-                    EC.element_to_be_clickable((By.ID, "ctl00_cph_ctrlDopFields_lbtnAdd"))
+                self.waiter.page_idle("редактирование")
+                add_button = self.waiter.until(
+                    "редактирование", EC.element_to_be_clickable((By.ID, "ctl00_cph_ctrlDopFields_lbtnAdd"))
                 )
                 self.log("✅ Кнопка добавления найдена")
             except:
@@ -3135,13 +3808,11 @@ class AutoFormFillerMass:
                 self.log("❌ Не удалось кликнуть кнопку добавления")
                 return False
             
-            # Небольшая задержка после клика по кнопке добавления
-            time.sleep(1)
-            
-            # Ждем загрузки формы с дополнительной проверкой
+            # Ждем загрузки формы после клика по кнопке добавления
             try:
-                form_field = WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.NAME, "ctl00$cph$tbAddInfo"))
+                self.waiter.page_idle("форма")
+                form_field = self.waiter.until(
+                    "форма", EC.presence_of_element_located((By.NAME, "ctl00$cph$tbAddInfo"))
                 )
                 self.log("✅ Форма дополнительной информации загружена")
             except:
@@ -3254,14 +3925,18 @@ class AutoFormFillerMass:
     
     def _fill_form(self, add_info_text, category, housing_info, adpi_data):
         """Заполнение формы с динамическим определением индексов"""
+        if self.fill_mode == "batch":
+            result = self._fill_form_batch(add_info_text, category, housing_info, adpi_data)
+            if result is not None:
+                return result
+            self.log("⚠️ Пакетное заполнение недоступно, заполняем поля по одному")
+
         try:
             # Определяем, есть ли АДПИ
             has_adpi = adpi_data['has_adpi'] == 'д'
             
             # Отмечаем чекбоксы
-            checkbox_ids = [8, 12, 13, 14, 17, 18]
-            if has_adpi:
-                checkbox_ids.extend([15, 16])
+            checkbox_ids = checkbox_ids_for(has_adpi)
             
             self.log(f"🔄 Отмечаем чекбоксы: {checkbox_ids}")
             
@@ -3269,13 +3944,12 @@ class AutoFormFillerMass:
             for checkbox_id in checkbox_ids:
                 try:
                     checkbox_element_id = f"ctl00_cph_ctrlDopFields_AJSpr1_PopupDiv_divContent_AJ_{checkbox_id}"
-                    checkbox = WebDriverWait(self.driver, 5).until(
-                        EC.element_to_be_clickable((By.ID, checkbox_element_id))
+                    checkbox = self.waiter.until(
+                        "чекбоксы", EC.element_to_be_clickable((By.ID, checkbox_element_id))
                     )
                     
                     # Прокручиваем к чекбоксу
-                    self.driver.execute_script("arguments[0].scrollIntoView({block: 'center', behavior: 'smooth'});", checkbox)
-                    time.sleep(0.2)
+                    self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", checkbox)
                     
                     # Проверяем, установлен ли чекбокс уже
                     is_selected = checkbox.is_selected()
@@ -3283,7 +3957,6 @@ class AutoFormFillerMass:
                         # Попробуем кликнуть напрямую
                         try:
                             checkbox.click()
-                            time.sleep(0.1)  # Небольшая задержка для обновления состояния
                         except:
                             # Если клик не удался, используем JavaScript
                             try:
@@ -3396,11 +4069,10 @@ class AutoFormFillerMass:
                 self.log("⚠️ Поле жилищных условий не найдено в таблице")
             
             if 'living' in field_indices:
-                living_conditions_text = "Санитарные условия удовлетворительные, для детей имеется отдельное спальное место, место для занятий и отдыха. Продукты питания в достаточном количестве."
                 if not self._fill_field_with_retry(
                     'name',
                     f'ctl00$cph$ctrlDopFields$gv$ctl{field_indices["living"]}$tb',
-                    living_conditions_text
+                    LIVING_CONDITIONS_TEXT
                 ):
                     self.log("⚠️ Не удалось заполнить бытовые условия")
             else:
@@ -3416,109 +4088,235 @@ class AutoFormFillerMass:
             self.log(f"❌ Ошибка заполнения формы: {e}")
             import traceback
             self.log(f"📋 Трассировка:\n{traceback.format_exc()}")
+            self.last_error = e
             return False
-    
+
+    def _fill_form_batch(self, add_info_text, category, housing_info, adpi_data):
+        """Заполнение формы одним вызовом JavaScript с проверкой значений
+
+        Возвращает None, если окно чекбоксов не найдено (нужно заполнение по одному).
+        """
+        has_adpi = adpi_data['has_adpi'] == 'д'
+        checkbox_ids = checkbox_ids_for(has_adpi)
+
+        # 1. Чекбоксы и кнопка подтверждения - один запрос
+        checkbox_script = """
+        var ids = arguments[0];
+        var prefix = 'ctl00_cph_ctrlDopFields_AJSpr1_PopupDiv_divContent_AJ_';
+        var notChecked = [];
+        var found = 0;
+        for (var i = 0; i < ids.length; i++) {
+            var checkbox = document.getElementById(prefix + ids[i]);
+            if (!checkbox) {
+                notChecked.push(ids[i]);
+                continue;
+            }
+            found++;
+            if (!checkbox.checked) {
+                checkbox.click();
+            }
+            if (!checkbox.checked) {
+                notChecked.push(ids[i]);
+            }
+        }
+        var ok = document.getElementById('ctl00_cph_ctrlDopFields_AJSpr1_PopupDiv_ctl06_AJOk');
+        if (found === 0 || !ok) {
+            return null;
+        }
+        ok.click();
+        return notChecked;
+        """
+        try:
+            self.log(f"🔄 Отмечаем чекбоксы: {checkbox_ids}")
+            not_checked = self.driver.execute_script(checkbox_script, checkbox_ids)
+        except Exception as e:
+            self.log(f"⚠️ Ошибка отметки чекбоксов через JavaScript: {e}")
+            return None
+
+        if not_checked is None:
+            return None
+        if not_checked:
+            self.log(f"⚠️ Не удалось отметить чекбоксы: {not_checked}")
+        else:
+            self.log("✅ Чекбоксы отмечены и подтверждены")
+
+        try:
+            self.waiter.page_idle("чекбоксы")
+            self.waiter.until("форма", EC.presence_of_element_located((By.NAME, "ctl00$cph$tbAddInfo")))
+        except Exception as e:
+            self.log(f"❌ Форма не загрузилась после подтверждения чекбоксов: {e}")
+            return False
+
+        field_indices = self._get_field_indices()
+        if not field_indices:
+            self.log("❌ Не удалось определить индексы полей")
+            return False
+
+        # 2. Все значения формы - один запрос с обратным чтением
+        entries = [{'key': 'add_info', 'by': 'name', 'target': "ctl00$cph$tbAddInfo",
+                    'kind': 'textarea', 'value': add_info_text}]
+        field_values = {
+            'phone': self.phone or '',
+            'category': category,
+            'address': self.address,
+            'housing': housing_info,
+            'living': LIVING_CONDITIONS_TEXT
+        }
+        for key, value in field_values.items():
+            if key in field_indices:
+                entries.append({'key': key, 'by': 'name', 'kind': 'text', 'value': value or '',
+                                'target': f'ctl00$cph$ctrlDopFields$gv$ctl{field_indices[key]}$tb'})
+            else:
+                self.log(f"⚠️ Поле {key} не найдено в таблице")
+        if has_adpi:
+            for key in ('install_date', 'check_date'):
+                if adpi_data.get(key) and key in field_indices:
+                    entries.append({'key': key, 'by': 'id', 'kind': 'date', 'value': adpi_data[key],
+                                    'target': f"igtxtctl00_cph_ctrlDopFields_gv_ctl{field_indices[key]}_wdte"})
+
+        radio_id = "ctl00_cph_ctrlDopFields_gv_ctl03_rbl_0" if has_adpi else "ctl00_cph_ctrlDopFields_gv_ctl03_rbl_1"
+
+        fill_script = """
+        var entries = arguments[0];
+        var radioId = arguments[1];
+        var result = {values: {}, radio: null};
+        function fire(el, names) {
+            for (var i = 0; i < names.length; i++) {
+                el.dispatchEvent(new Event(names[i], {bubbles: true}));
+            }
+        }
+        var radio = document.getElementById(radioId);
+        if (radio) {
+            if (!radio.checked) {
+                radio.click();
+            }
+            result.radio = radio.checked;
+        }
+        for (var i = 0; i < entries.length; i++) {
+            var entry = entries[i];
+            var el = entry.by === 'id' ? document.getElementById(entry.target)
+                                       : document.getElementsByName(entry.target)[0];
+            if (!el) {
+                result.values[entry.key] = null;
+                continue;
+            }
+            if (entry.kind === 'textarea') {
+                el.style.height = '352px';
+                el.style.width = '1151px';
+            }
+            el.focus();
+            el.value = entry.value;
+            fire(el, ['input', 'change']);
+            if (entry.kind === 'date') {
+                el.dispatchEvent(new KeyboardEvent('keydown', {key: 'Enter', keyCode: 13, bubbles: true}));
+            }
+            el.blur();
+            fire(el, ['blur']);
+            result.values[entry.key] = el.value;
+        }
+        return result;
+        """
+        try:
+            result = self.driver.execute_script(fill_script, entries, radio_id)
+        except Exception as e:
+            self.log(f"⚠️ Ошибка пакетного заполнения формы: {e}")
+            result = {'values': {}, 'radio': None}
+
+        # 3. Проверка прочитанных значений, поля с расхождением - заполнение по одному
+        values = result.get('values') or {}
+        failed = []
+        for entry in entries:
+            actual = values.get(entry['key'])
+            if actual is not None and self._same_field_value(entry, actual):
+                continue
+            failed.append(entry['key'])
+            if entry['kind'] == 'textarea':
+                ok = self._fill_textarea(entry['target'], entry['value'], resize=True)
+            elif entry['kind'] == 'date':
+                ok = self._fill_date_field(entry['target'], entry['value'])
+            else:
+                ok = self._fill_field_with_retry('name', entry['target'], entry['value'])
+            if not ok:
+                self.log(f"⚠️ Не удалось заполнить поле {entry['key']}")
+
+        if not result.get('radio'):
+            failed.append('adpi')
+            if not self._fill_adpi_radio_button(adpi_data):
+                self.log("⚠️ Не удалось заполнить АДПИ")
+
+        if failed:
+            self.log(f"⚠️ Поля заполнены повторно по одному: {failed}")
+        total = len(entries) + 1  # поля и радио-кнопка АДПИ
+        self.log(f"✅ Форма заполнена пакетно: {total - len(failed)} из {total} значений с первого запроса")
+        return True
+
+    @staticmethod
+    def _same_field_value(entry, actual):
+        """Совпадает ли прочитанное значение поля с записанным"""
+        expected = entry['value'] or ''
+        if entry['kind'] == 'date':
+            # Редактор даты может переформатировать значение
+            return ''.join(filter(str.isdigit, actual)) == ''.join(filter(str.isdigit, expected))
+        return actual.replace('\r\n', '\n').strip() == expected.replace('\r\n', '\n').strip()
+
     def _get_field_indices(self):
-        """Динамическое определение индексов полей по их названиям"""
-        field_indices = {}
-        
+        """Определение индексов полей по их названиям с кэшем по сигнатуре разметки"""
+        # Названия всех строк таблицы и наличие АДПИ - одним запросом
+        layout_script = """
+        var table = document.getElementById('ctl00_cph_ctrlDopFields_gv');
+        if (!table) {
+            return null;
+        }
+        var rows = table.querySelectorAll('tr:not(:first-child)');
+        var labels = {};
+        for (var i = 0; i < rows.length; i++) {
+            var index = ('0' + (i + 2)).slice(-2);
+            var label = document.getElementById('ctl00_cph_ctrlDopFields_gv_ctl' + index + '_lbName');
+            if (!label) {
+                var cells = rows[i].getElementsByTagName('td');
+                label = cells.length >= 2 ? cells[1] : null;
+            }
+            var text = label ? (label.innerText || label.textContent || '').trim() : '';
+            if (text) {
+                labels[index] = text;
+            }
+        }
+        return {
+            labels: labels,
+            has_adpi: !!document.getElementById('ctl00_cph_ctrlDopFields_gv_ctl03_rbl_0')
+        };
+        """
         try:
             # Ждем загрузки таблицы
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.ID, "ctl00_cph_ctrlDopFields_gv"))
-            )
-            
-            # Прокручиваем немного вниз, чтобы таблица была видна
-            self.driver.execute_script("window.scrollBy(0, 300);")
-            # Убрали задержку, так как используем ожидание элементов
-            
-            # Пробуем найти все строки с полями
-            rows = self.driver.find_elements(By.CSS_SELECTOR, "#ctl00_cph_ctrlDopFields_gv tr:not(:first-child)")
-            
-            if not rows:
-                self.log("⚠️ Не найдены строки в таблице, использую стандартные индексы")
-                return self._get_fallback_indices()
-            
-            self.log(f"📊 Найдено строк в таблице: {len(rows)}")
-            
-            # Проходим по всем строкам и ищем нужные поля
-            for i, row in enumerate(rows, start=2):  # начинаем с 2
-                try:
-                    # Формируем индекс для поиска элемента
-                    index_str = f"{i:02d}"
-                    
-                    # Пробуем найти элемент с названием поля
-                    try:
-                        field_name_elem = row.find_element(By.ID, f"ctl00_cph_ctrlDopFields_gv_ctl{index_str}_lbName")
-                        field_name = field_name_elem.text.strip()
-                        
-                        self.log(f"  Строка {index_str}: {field_name}")
-                        
-                        # Сопоставляем название поля с нашими ключами
-                        if "Номер телефона" in field_name:
-                            field_indices['phone'] = index_str
-                        elif "Категория семьи" in field_name:
-                            field_indices['category'] = index_str
-                        elif "Фактический адрес проживания семьи" in field_name or "адрес" in field_name.lower():
-                            field_indices['address'] = index_str
-                        elif "Жилищные условия" in field_name or "жилищ" in field_name.lower():
-                            field_indices['housing'] = index_str
-                        elif "Бытовые условия" in field_name or "бытов" in field_name.lower():
-                            field_indices['living'] = index_str
-                        elif "Дата установки АДПИ" in field_name or "установки" in field_name.lower():
-                            field_indices['install_date'] = index_str
-                        elif "Дата последней проверки АДПИ" in field_name or "проверки" in field_name.lower():
-                            field_indices['check_date'] = index_str
-                        
-                    except:
-                        # Пробуем альтернативный способ поиска
-                        try:
-                            cells = row.find_elements(By.TAG_NAME, "td")
-                            if len(cells) >= 2:
-                                field_name = cells[1].text.strip()
-                                if field_name:
-                                    self.log(f"  Строка {index_str}: {field_name}")
-                                    
-                                    if "Номер телефона" in field_name:
-                                        field_indices['phone'] = index_str
-                                    elif "Категория семьи" in field_name:
-                                        field_indices['category'] = index_str
-                                    elif "Фактический адрес проживания семьи" in field_name or "адрес" in field_name.lower():
-                                        field_indices['address'] = index_str
-                                    elif "Жилищные условия" in field_name or "жилищ" in field_name.lower():
-                                        field_indices['housing'] = index_str
-                                    elif "Бытовые условия" in field_name or "бытов" in field_name.lower():
-                                        field_indices['living'] = index_str
-                                    elif "Дата установки АДПИ" in field_name or "установки" in field_name.lower():
-                                        field_indices['install_date'] = index_str
-                                    elif "Дата последней проверки АДПИ" in field_name or "проверки" in field_name.lower():
-                                        field_indices['check_date'] = index_str
-                        except:
-                            continue
-                            
-                except Exception as e:
-                    self.log(f"    ⚠️ Ошибка анализа строки {i}: {e}")
-                    continue
-            
-            self.log(f"✅ Определены индексы полей: {field_indices}")
-            
-            # Если не нашли все нужные поля, используем запасной вариант
-            required_fields = ['phone', 'category', 'address', 'housing', 'living']
-            missing_fields = [field for field in required_fields if field not in field_indices]
-            
-            if missing_fields:
-                self.log(f"⚠️ Не найдены поля: {missing_fields}, использую стандартные индексы")
-                fallback_indices = self._get_fallback_indices()
-                # Объединяем найденные индексы со стандартными
-                for field in missing_fields:
-                    if field in fallback_indices:
-                        field_indices[field] = fallback_indices[field]
-            
-            return field_indices
-            
+            self.waiter.until("форма", EC.presence_of_element_located((By.ID, "ctl00_cph_ctrlDopFields_gv")))
+            layout = self.driver.execute_script(layout_script)
         except Exception as e:
             self.log(f"❌ Ошибка определения индексов полей: {e}")
             return self._get_fallback_indices()
+
+        if not layout or not layout.get('labels'):
+            self.log("⚠️ Не найдены строки в таблице, использую стандартные индексы")
+            return fallback_field_indices(bool(layout and layout.get('has_adpi')))
+
+        labels = layout['labels']
+        has_adpi = bool(layout.get('has_adpi'))
+        signature = FIELD_INDEX_CACHE.signature(labels, has_adpi)
+        field_indices = FIELD_INDEX_CACHE.get(signature)
+        if field_indices is not None:
+            self.log(f"✅ Индексы полей из кэша разметки: {field_indices}")
+            return field_indices
+
+        self.log(f"📊 Найдено строк в таблице: {len(labels)}")
+        for index_str in sorted(labels):
+            self.log(f"  Строка {index_str}: {labels[index_str]}")
+
+        field_indices, missing_fields = resolve_field_indices(labels, has_adpi)
+        if missing_fields:
+            self.log(f"⚠️ Не найдены поля: {missing_fields}, использую стандартные индексы")
+        self.log(f"✅ Определены индексы полей: {field_indices}")
+
+        FIELD_INDEX_CACHE.put(signature, field_indices)
+        return field_indices
     
     def _get_fallback_indices(self):
         """Запасной вариант определения индексов"""
@@ -3531,24 +4329,7 @@ class AutoFormFillerMass:
         except:
             has_adpi = False
         
-        if has_adpi:
-            return {
-                'phone': '02',
-                'category': '06',
-                'address': '07',
-                'housing': '08',
-                'living': '09',
-                'install_date': '04',
-                'check_date': '05'
-            }
-        else:
-            return {
-                'phone': '02',
-                'category': '04',
-                'address': '05',
-                'housing': '06',
-                'living': '07'
-            }
+        return fallback_field_indices(has_adpi)
     
     def _fill_field_with_retry(self, by, selector, text, max_attempts=3):
         """Улучшенный метод заполнения поля с повторными попытками"""
@@ -3811,10 +4592,12 @@ class AutoFormFillerMass:
         """Финальная проверка"""
         try:
             mother_fio = family_data.get('mother_fio', 'неизвестно')
-            return messagebox.askyesno("Финальная проверка", 
-                                     f"Семья: {mother_fio}\n\n"
-                                     "Проверьте все введенные данные на странице.\n\n"
-                                     "Продолжить сохранение?")
+            with self.interaction_lock:
+                return self.gui.ask_yes_no("Финальная проверка", 
+                                           f"Семья: {mother_fio}\n\n"
+                                           "Проверьте все введенные данные на странице.\n\n"
+                                           "Продолжить сохранение?",
+                                           default=True)
         except:
             return False
             
@@ -3823,16 +4606,20 @@ class AutoFormFillerMass:
         try:
             self.log("💾 Сохраняем данные...")
             
-            save_button = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.ID, "ctl00_cph_lbtnExitSave"))
+            save_button = self.waiter.until(
+                "сохранение", EC.element_to_be_clickable((By.ID, "ctl00_cph_lbtnExitSave"))
             )
             save_button.click()
             
+            # Ждем завершения постбэка сохранения (скриншот делается сразу после)
+            self.waiter.page_idle("сохранение")
+            
             self.log("✅ Данные сохранены")
             return True
             
         except Exception as e:
             self.log(f"❌ Ошибка сохранения: {e}")
+            self.last_error = e
             return False
             
     def _take_screenshot(self, formatted_data, family_number, family_data):
@@ -3867,22 +4654,36 @@ class AutoFormFillerMass:
                     self.log(f"⚠️ Не удалось создать папку для скриншотов: {e}")
                     return
             
-            file_path = os.path.join(self.screenshot_dir, f"{family_number:03d}_{safe_name}.png")
+            base_path = os.path.join(self.screenshot_dir, f"{family_number:03d}_{safe_name}")
+            png_bytes = self._capture_form_png()
             
-            for attempt in range(3):
-                try:
-                    self.driver.save_screenshot(file_path)
-                    if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
-                        self.log(f"📸 Скриншот сохранен: {file_path}")
-                        return
-                except Exception as e:
-                    if attempt < 2:
-                        time.sleep(0.5)
-                    else:
-                        self.log(f"⚠️ Ошибка скриншота: {e}")
+            if self.screenshot_writer:
+                # Перекодирование и запись файла - в фоне, следующая семья не ждет диска
+                self.screenshot_writer.submit(png_bytes, base_path)
+                return
+            
+            file_path = base_path + ".png"
+            with open(file_path, 'wb') as file:
+                file.write(png_bytes)
+            self.log(f"📸 Скриншот сохранен: {file_path}")
             
         except Exception as e:
             self.log(f"⚠️ Ошибка создания скриншота: {e}")
+    
+    def _capture_form_png(self):
+        """PNG только области формы через CDP, без CDP - снимок окна"""
+        try:
+            rect = self.driver.execute_script(SCREENSHOT_REGION_SCRIPT, SCREENSHOT_REGION_ID)
+            if rect and rect['width'] > 0 and rect['height'] > 0:
+                result = self.driver.execute_cdp_cmd('Page.captureScreenshot', {
+                    'format': 'png',
+                    'captureBeyondViewport': True,
+                    'clip': dict(rect, scale=1),
+                })
+                return base64.b64decode(result['data'])
+        except Exception as e:
+            self.log(f"⚠️ Снимок области формы недоступен, снимаем окно: {e}")
+        return self.driver.get_screenshot_as_png()
             
     def _bulk_click_checkboxes(self, checkbox_ids):
         try:
@@ -4016,24 +4817,13 @@ class AutoFormFillerMass:
             try:
                 self.log(f"🔄 Попытка {attempt + 1} клика на элемент {selector}")
                 
-                # First, wait for element to be present
-                element = WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((by, selector))
-                )
-                
-                # Wait a bit for the element to be fully rendered
-                time.sleep(0.2)
-                
-                # Check if element is clickable now
-                element = WebDriverWait(self.driver, 5).until(
-                    EC.element_to_be_clickable((by, selector))
-                )
+                # Wait for the element to be present and clickable
+                step = f"клик {selector.replace('ctl00_cph_', '')}"
+                self.waiter.until(step, EC.presence_of_element_located((by, selector)))
+                element = self.waiter.until(step, EC.element_to_be_clickable((by, selector)))
                 
-                # Scroll element into view
-                self.driver.execute_script("arguments[0].scrollIntoView({block: 'center', behavior: 'smooth'});", element)
-                
-                # Wait for any animations to complete
-                time.sleep(0.3)
+                # Scroll element into view (without smooth animation, so no need to wait for it)
+                self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
                 
                 # Get element attributes before potential stale reference
                 element_id = element.get_attribute("id")
@@ -4142,21 +4932,17 @@ class AutoFormFillerMass:
     def _fill_textarea(self, field_name, text, resize=False):
         try:
             # First, wait for the element to be present
-            field = self.wait.until(EC.presence_of_element_located((By.NAME, field_name)))
-            
-            # Wait a bit more for the element to be fully loaded
-            time.sleep(0.3)
+            self.waiter.until("форма", EC.presence_of_element_located((By.NAME, field_name)))
             
             # Now wait for it to be clickable
-            field = self.wait.until(EC.element_to_be_clickable((By.NAME, field_name)))
+            field = self.waiter.until("форма", EC.element_to_be_clickable((By.NAME, field_name)))
             
             # Get field attributes before potential stale reference
             field_id = field.get_attribute("id")
             field_name_attr = field.get_attribute("name")
             
             # Scroll to the element
-            self.driver.execute_script("arguments[0].scrollIntoView({block: 'center', behavior: 'smooth'});", field)
-            time.sleep(0.3)
+            self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", field)
             
             # Clear the field using JavaScript to ensure it's completely cleared
             self.driver.execute_script("arguments[0].value = '';", field)
@@ -4343,3 +5129,25 @@ class AutoFormFillerMass:
             self.log(f"⚠️ Ошибка получения текста элемента {element_id}: {e}")
             return default
     
+
+
+ENGINES = ["selenium", "http"]
+FILL_MODES = ["batch", "classic"]
+
+
+def create_form_filler(host, engine="selenium", base_url=None, fill_mode=None, card_cache=None, timing=None,
+                       session_store=None):
+    """Создание исполнителя для выбранного движка обработки (selenium или http)"""
+    if engine == "http":
+        from mass_processor.http_engine import HttpFormFiller
+        filler = HttpFormFiller(host)
+    else:
+        filler = AutoFormFillerMass(host)
+    if base_url:
+        filler.base_url = base_url.rstrip('/')
+    if fill_mode:
+        filler.fill_mode = fill_mode
+    filler.card_cache = card_cache
+    filler.timing = timing
+    filler.session_store = session_store
+    return filler
@@ -0,0 +1,72 @@
+"""Отложенные семьи, которым нужен оператор
+
+Когда поиск не нашел семью или карточку не удалось выбрать автоматически,
+семья не останавливает всю обработку ожиданием кнопки "Продолжить": она
+откладывается вместе с найденными карточками и причиной, а автоматизация
+идет дальше. Отложенные семьи показываются оператору вместе - во время
+обработки или после нее - и проходятся заново уже с его участием.
+"""
+
+import threading
+from datetime import datetime
+
+# Статус семьи в очереди отложенных
+DEFERRED_STATUS = 'отложено'
+
+
+class DeferredQueue:
+    """Очередь отложенных семей, общая для всех браузеров пула"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.items = []
+
+    def add(self, index, family, reason, cards=None, page_url="", worker_id=None):
+        """Семья откладывается до прохода с оператором (повторное добавление заменяет запись)"""
+        entry = {
+            'index': index,
+            'family': family,
+            'reason': reason,
+            'cards': list(cards or []),
+            'url': page_url,
+            'worker': worker_id,
+            'time': datetime.now().strftime('%H:%M:%S'),
+        }
+        with self.lock:
+            self.items = [item for item in self.items if item['index'] != index]
+            self.items.append(entry)
+        return entry
+
+    def entries(self):
+        """Снимок очереди в порядке номеров семей"""
+        with self.lock:
+            return sorted(self.items, key=lambda item: item['index'])
+
+    def take_all(self):
+        """Все отложенные семьи с очисткой очереди"""
+        with self.lock:
+            items, self.items = self.items, []
+        return sorted(items, key=lambda item: item['index'])
+
+    def clear(self):
+        with self.lock:
+            self.items = []
+
+    def __len__(self):
+        return len(self.items)
+
+
+def describe_entry(entry, max_cards=5):
+    """Текст записи для оператора: семья, причина и найденные карточки"""
+    family = entry['family']
+    fio = family.get('mother_fio') or family.get('father_fio') or ''
+    lines = [f"{entry['index'] + 1}. {fio} ({family.get('mother_birth', '')})",
+             f"   Причина: {entry['reason']}"]
+    cards = entry.get('cards') or []
+    if cards:
+        lines.append(f"   Найдено карточек: {len(cards)}")
+        for card in cards[:max_cards]:
+            lines.append(f"     - {card.get('fio', '')}: {(card.get('address') or '')[:80]}")
+        if len(cards) > max_cards:
+            lines.append(f"     ... и еще {len(cards) - max_cards}")
+    return "\n".join(lines)
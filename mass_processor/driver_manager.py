@@ -0,0 +1,207 @@
+"""Жизненный цикл браузеров AutoFormFillerMass
+
+DriverManager держит активного исполнителя (драйвер + выполненный вход) и, при
+keep_spare, запасного, который готовится в фоновом потоке и поддерживает сессию.
+Перед каждой семьей активный браузер проверяется: упавший сразу заменяется
+запасным, а после recycle_after семей или при превышении memory_limit_mb браузер
+пересоздается, чтобы не замедлялась обработка к концу длинного запуска.
+"""
+
+import threading
+import time
+
+
+class DriverManager:
+    """Активный и запасной исполнители одного потока обработки"""
+
+    # Как часто запасной браузер обновляет страницу, чтобы не истекла сессия, сек
+    KEEPALIVE_INTERVAL = 300
+
+    def __init__(self, filler_factory, log, worker_id=None, keep_spare=True,
+                 recycle_after=150, memory_limit_mb=1500):
+        self.filler_factory = filler_factory
+        self.log = log
+        self.worker_id = worker_id
+        self.keep_spare = keep_spare
+        self.recycle_after = recycle_after
+        self.memory_limit_mb = memory_limit_mb
+
+        self.lock = threading.Lock()
+        self.active = None
+        self.families_done = 0
+        self.spare = None
+        self.spare_thread = None
+        self.spare_ready = threading.Event()
+        self.stopped = threading.Event()
+
+    # ---- основной поток ----
+
+    def acquire(self):
+        """Готовый к работе исполнитель (None, если браузер создать не удалось)"""
+        if self.stopped.is_set():
+            return None
+        if self.active is not None and self._is_alive(self.active):
+            if not self._needs_recycle(self.active):
+                return self.active
+            self._retire_active("🔁 плановый перезапуск браузера")
+        elif self.active is not None:
+            self._retire_active("⚠️ браузер больше не активен")
+
+        filler = self._take_spare()
+        if filler is None and not self.stopped.is_set():
+            filler = self._create()
+        if self.stopped.is_set():
+            # stop() вызван, пока ждали запасной или создавали новый браузер
+            self._quit(filler)
+            return None
+        self.active = filler
+        self.families_done = 0
+        self._start_spare()
+        return self.active
+
+    def family_finished(self):
+        """Учет обработанной семьи для планового перезапуска"""
+        self.families_done += 1
+
+    def replace_active(self):
+        """Принудительная замена активного браузера (например, перед повторной попыткой)"""
+        if self.active is not None:
+            self._retire_active("🔄 замена браузера")
+        return self.acquire()
+
+    def stop(self):
+        """Закрытие активного и запасного браузеров"""
+        self.stopped.set()
+        with self.lock:
+            active, spare = self.active, self.spare
+            self.active = self.spare = None
+        for filler in (active, spare):
+            self._quit(filler)
+
+    # ---- проверки ----
+
+    def _is_alive(self, filler):
+        try:
+            _ = filler.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _needs_recycle(self, filler):
+        if self.recycle_after and self.families_done >= self.recycle_after:
+            return True
+        if self.memory_limit_mb:
+            memory = filler._browser_memory_mb()
+            if memory is not None and memory > self.memory_limit_mb:
+                self.log(f"🧠 {self._name()}: память браузера {memory:.0f} МБ больше {self.memory_limit_mb} МБ")
+                return True
+        return False
+
+    # ---- запасной браузер ----
+
+    def _start_spare(self):
+        """Фоновая подготовка запасного браузера, если его нет"""
+        if not self.keep_spare or self.stopped.is_set():
+            return
+        with self.lock:
+            if self.spare is not None or (self.spare_thread and self.spare_thread.is_alive()):
+                return
+            self.spare_ready.clear()
+            self.spare_thread = threading.Thread(target=self._spare_loop, daemon=True)
+            self.spare_thread.start()
+
+    def _spare_loop(self):
+        """Создание запасного браузера и поддержание его сессии до востребования"""
+        try:
+            filler = self._prepare_spare()
+        finally:
+            # Ожидающий _take_spare освобождается при любом исходе, в том числе при остановке
+            self.spare_ready.set()
+        if filler is None:
+            return
+        self.log(f"🌡️ {self._name()}: запасной браузер готов")
+
+        last_keepalive = time.monotonic()
+        while not self.stopped.wait(5):
+            with self.lock:
+                if self.spare is not filler:
+                    # Запасной браузер забран в работу
+                    return
+                if time.monotonic() - last_keepalive < self.KEEPALIVE_INTERVAL:
+                    continue
+                # Под блокировкой, чтобы браузер не забрали посреди обновления страницы
+                try:
+                    alive = filler._keep_session_alive()
+                except Exception:
+                    alive = False
+                if not alive:
+                    self.spare = None
+                last_keepalive = time.monotonic()
+            if not alive:
+                self.log(f"⚠️ {self._name()}: запасной браузер потерял сессию, готовим новый")
+                self._quit(filler)
+                with self.lock:
+                    self.spare_ready.clear()
+                    self.spare_thread = threading.Thread(target=self._spare_loop, daemon=True)
+                    self.spare_thread.start()
+                return
+
+    def _prepare_spare(self):
+        """Создание запасного браузера (None, если не удалось или менеджер остановлен)"""
+        filler = self._create(quiet=True)
+        if filler is None:
+            return None
+        with self.lock:
+            if self.stopped.is_set():
+                self._quit(filler)
+                return None
+            self.spare = filler
+        return filler
+
+    def _take_spare(self):
+        """Запасной браузер, если он готов или вот-вот будет готов"""
+        if not self.keep_spare:
+            return None
+        while self.spare_thread and self.spare_thread.is_alive() and not self.spare_ready.wait(1):
+            if self.stopped.is_set():
+                return None
+        if self.stopped.is_set():
+            return None
+        with self.lock:
+            filler, self.spare = self.spare, None
+        if filler is not None and not self._is_alive(filler):
+            self._quit(filler)
+            return None
+        if filler is not None:
+            self.log(f"⚡ {self._name()}: переключение на запасной браузер")
+        return filler
+
+    # ---- создание и закрытие ----
+
+    def _create(self, quiet=False):
+        filler = self.filler_factory()
+        if filler is None:
+            return None
+        if not quiet:
+            self.log(f"🔧 {self._name()}: запуск браузера")
+        if not filler._setup_driver():
+            self.log(f"❌ {self._name()}: не удалось настроить драйвер")
+            self._quit(filler)
+            return None
+        return filler
+
+    def _retire_active(self, reason):
+        self.log(f"{reason} ({self._name()}, семей обработано: {self.families_done})")
+        filler, self.active = self.active, None
+        self._quit(filler)
+
+    def _quit(self, filler):
+        if filler is None:
+            return
+        try:
+            filler.stop_processing()
+        except Exception:
+            pass
+
+    def _name(self):
+        return f"браузер {self.worker_id}" if self.worker_id else "браузер"
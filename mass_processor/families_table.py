@@ -0,0 +1,197 @@
+"""Таблица семей с отрисовкой только видимых строк
+
+Вместо отдельного фрейма с пятью надписями и тремя кнопками на каждую семью
+создается столько строк, сколько помещается по высоте. При прокрутке строки
+переиспользуются для других семей, а при обновлении меняются только надписи,
+текст или цвет которых действительно изменился.
+"""
+
+import customtkinter as ctk
+
+from mass_processor.deferred_queue import DEFERRED_STATUS
+
+# Цвет надписи статуса
+STATUS_COLORS = {
+    'успешно': "green",
+    'ошибка': "red",
+    'в процессе': "blue",
+    'пропущено': "orange",
+    'ручное вмешательство': "purple",
+    DEFERRED_STATUS: "#b8860b",
+}
+
+
+class FamilyRow:
+    """Одна строка таблицы, переиспользуемая для разных семей"""
+
+    def __init__(self, table, parent):
+        self.index = None
+        self.values = None
+        self.packed = False
+        self.frame = ctk.CTkFrame(parent)
+
+        self.labels = []
+        for column in range(5):
+            label = ctk.CTkLabel(self.frame, text="")
+            label.grid(row=0, column=column, padx=5, pady=2)
+            self.labels.append(label)
+        self.default_color = self.labels[4].cget("text_color")
+
+        actions_frame = ctk.CTkFrame(self.frame, fg_color="transparent")
+        actions_frame.grid(row=0, column=5, padx=5, pady=2)
+        for text, action in (("✏️", table.on_edit), ("👁️", table.on_view), ("❌", table.on_remove)):
+            ctk.CTkButton(actions_frame, text=text, width=30,
+                          command=lambda action=action: self._run(action)).pack(side="left", padx=2)
+
+        for column in range(6):
+            self.frame.grid_columnconfigure(column, weight=1)
+
+        for widget in [self.frame, actions_frame] + self.labels:
+            table.bind_scroll(widget)
+
+    def show(self, index, family):
+        """Отображение семьи; надписи меняются только при изменении значений"""
+        self.index = index
+        mother_fio = family.get('mother_fio', '')
+        status = family.get('status', 'ожидает')
+        values = (
+            str(index + 1),
+            mother_fio[:30] + ('...' if len(mother_fio) > 30 else ''),
+            family.get('mother_birth', ''),
+            str(len(family.get('children', []))),
+            status,
+        )
+        if values == self.values:
+            return
+
+        previous = self.values or (None,) * len(values)
+        for label, value, old_value in zip(self.labels, values, previous):
+            if value != old_value:
+                label.configure(text=value)
+        if status != previous[4]:
+            self.labels[4].configure(text_color=STATUS_COLORS.get(status, self.default_color))
+        self.values = values
+
+    def _run(self, action):
+        if self.index is not None and action:
+            action(self.index)
+
+
+class VirtualFamiliesTable:
+    """Таблица семей: строки создаются по высоте области, а не по числу семей"""
+
+    # Высота строки с отступами, пикселей
+    ROW_HEIGHT = 40
+
+    def __init__(self, parent, get_families, on_edit=None, on_view=None, on_remove=None, height=300):
+        # Список семей берется при каждом обновлении: GUI может заменить его целиком
+        self.get_families = get_families
+        self.on_edit = on_edit
+        self.on_view = on_view
+        self.on_remove = on_remove
+        self.offset = 0
+        self.rows = []
+        self.visible_count = max(1, height // self.ROW_HEIGHT)
+
+        self.frame = ctk.CTkFrame(parent, height=height)
+        self.rows_frame = ctk.CTkFrame(self.frame, fg_color="transparent")
+        self.rows_frame.pack(side="left", fill="both", expand=True)
+        # Высота области задается окном, а не числом строк в ней
+        self.rows_frame.pack_propagate(False)
+        self.scrollbar = ctk.CTkScrollbar(self.frame, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.bind_scroll(self.frame)
+        self.bind_scroll(self.rows_frame)
+        self.rows_frame.bind("<Configure>", self._on_resize)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def winfo_exists(self):
+        return self.frame.winfo_exists()
+
+    def bind_scroll(self, widget):
+        """Прокрутка колесиком мыши над виджетом"""
+        try:
+            widget.bind("<MouseWheel>", self._on_mousewheel)
+            widget.bind("<Button-4>", self._on_mousewheel)
+            widget.bind("<Button-5>", self._on_mousewheel)
+        except Exception:
+            pass
+
+    def refresh(self):
+        """Синхронизация видимых строк со списком семей"""
+        families = self.get_families()
+        total = len(families)
+        self.offset = max(0, min(self.offset, total - self.visible_count))
+
+        while len(self.rows) < min(self.visible_count, total):
+            self.rows.append(FamilyRow(self, self.rows_frame))
+
+        for position, row in enumerate(self.rows):
+            index = self.offset + position
+            if position < self.visible_count and index < total:
+                row.show(index, families[index])
+                if not row.packed:
+                    row.frame.pack(fill="x", padx=5, pady=2)
+                    row.packed = True
+            elif row.packed:
+                row.frame.pack_forget()
+                row.packed = False
+                row.index = None
+                row.values = None
+
+        self._update_scrollbar()
+
+    def refresh_row(self, index):
+        """Обновление одной семьи, если ее строка сейчас видна"""
+        families = self.get_families()
+        position = index - self.offset
+        if 0 <= position < len(self.rows) and self.rows[position].index == index and index < len(families):
+            self.rows[position].show(index, families[index])
+
+    def scroll_to(self, index):
+        """Прокрутка так, чтобы семья index была видна"""
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + self.visible_count:
+            self.offset = index - self.visible_count + 1
+        else:
+            return
+        self.refresh()
+
+    def _scroll_by(self, rows):
+        self.offset += rows
+        self.refresh()
+
+    def _on_scrollbar(self, *args):
+        total = len(self.get_families())
+        if not total:
+            return
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * total)
+            self.refresh()
+        elif args[0] == "scroll":
+            step = int(args[1]) * (self.visible_count if args[2] == "pages" else 1)
+            self._scroll_by(step)
+
+    def _on_mousewheel(self, event):
+        if event.num == 4 or getattr(event, 'delta', 0) > 0:
+            self._scroll_by(-3)
+        elif event.num == 5 or getattr(event, 'delta', 0) < 0:
+            self._scroll_by(3)
+        return "break"
+
+    def _on_resize(self, event):
+        visible_count = max(1, event.height // self.ROW_HEIGHT)
+        if visible_count != self.visible_count:
+            self.visible_count = visible_count
+            self.refresh()
+
+    def _update_scrollbar(self):
+        total = len(self.get_families())
+        if total <= self.visible_count:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + self.visible_count) / total)
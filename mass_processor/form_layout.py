@@ -0,0 +1,166 @@
+"""Правила разметки формы доп. информации и выбора карточки
+
+Общие для всех движков обработки (Selenium и HTTP): сопоставление названий строк
+таблицы ctrlDopFields_gv с полями семьи, стандартные индексы строк, приоритет
+районов и сравнение ФИО при выборе карточки из результатов поиска.
+"""
+
+import hashlib
+import threading
+
+from utils.fuzzy_fio import fio_similarity, is_same_person
+
+# Чекбоксы окна признаков семьи (AJSpr1_PopupDiv), для АДПИ добавляются 15 и 16
+CHECKBOX_IDS = [8, 12, 13, 14, 17, 18]
+ADPI_CHECKBOX_IDS = [15, 16]
+
+LIVING_CONDITIONS_TEXT = ("Санитарные условия удовлетворительные, для детей имеется отдельное спальное место, "
+                          "место для занятий и отдыха. Продукты питания в достаточном количестве.")
+
+REQUIRED_FIELDS = ['phone', 'category', 'address', 'housing', 'living']
+
+# Порядок важен: первое совпадение определяет поле
+FIELD_LABEL_RULES = [
+    ('phone', ["Номер телефона"], []),
+    ('category', ["Категория семьи"], []),
+    ('address', ["Фактический адрес проживания семьи"], ["адрес"]),
+    ('housing', ["Жилищные условия"], ["жилищ"]),
+    ('living', ["Бытовые условия"], ["бытов"]),
+    ('install_date', ["Дата установки АДПИ"], ["установки"]),
+    ('check_date', ["Дата последней проверки АДПИ"], ["проверки"]),
+]
+
+# Приоритет районов: чем меньше номер, тем выше приоритет
+DISTRICT_RULES = [
+    (0, "Вышневолоцкий городской округ", "вышневолоцкий городской округ"),
+    (1, "Вышневолоцкий район", "вышневолоцкий"),
+    (2, "Вышний Волочек", "вышний волочек"),
+    (2, "Вышний Волочек", "вышнего волочка"),
+]
+
+# Карточка выбирается без оператора, только если имя и отчество совпадают точно,
+# а фамилия отличается не больше чем на столько букв
+CARD_MAX_SURNAME_EDITS = 1
+
+
+def match_field_label(field_name):
+    """Ключ поля семьи по названию строки таблицы или None"""
+    lowered = field_name.lower()
+    for key, exact_parts, lower_parts in FIELD_LABEL_RULES:
+        if any(part in field_name for part in exact_parts) or any(part in lowered for part in lower_parts):
+            return key
+    return None
+
+
+def map_field_labels(labels):
+    """Индексы полей по названиям строк: {'02': 'Номер телефона', ...} -> {'phone': '02', ...}"""
+    field_indices = {}
+    for index_str, field_name in labels.items():
+        key = match_field_label(field_name.strip())
+        if key:
+            field_indices[key] = index_str
+    return field_indices
+
+
+def fallback_field_indices(has_adpi):
+    """Стандартные индексы строк для разметки с АДПИ и без"""
+    if has_adpi:
+        return {
+            'phone': '02',
+            'category': '06',
+            'address': '07',
+            'housing': '08',
+            'living': '09',
+            'install_date': '04',
+            'check_date': '05'
+        }
+    return {
+        'phone': '02',
+        'category': '04',
+        'address': '05',
+        'housing': '06',
+        'living': '07'
+    }
+
+
+def resolve_field_indices(labels, has_adpi):
+    """Индексы полей по названиям строк с добором стандартных: (индексы, ненайденные поля)"""
+    field_indices = map_field_labels(labels)
+    missing_fields = [field for field in REQUIRED_FIELDS if field not in field_indices]
+    fallback_indices = fallback_field_indices(has_adpi)
+    for field in missing_fields:
+        field_indices[field] = fallback_indices[field]
+    return field_indices, missing_fields
+
+
+class FieldIndexCache:
+    """Кэш индексов полей по сигнатуре разметки таблицы ctrlDopFields_gv
+
+    Сигнатура - число строк и хеш их названий, поэтому при изменении разметки
+    на сайте старая запись просто перестает совпадать.
+    """
+
+    MAX_ENTRIES = 16
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    @staticmethod
+    def signature(labels, has_adpi):
+        """Сигнатура разметки: (число строк, АДПИ, sha1 названий строк)"""
+        text = "\n".join(f"{index}={labels[index].strip()}" for index in sorted(labels))
+        return len(labels), bool(has_adpi), hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def get(self, signature):
+        """Копия индексов для сигнатуры или None"""
+        with self._lock:
+            indices = self._entries.get(signature)
+            return dict(indices) if indices is not None else None
+
+    def put(self, signature, field_indices):
+        """Сохранение индексов для сигнатуры"""
+        with self._lock:
+            if len(self._entries) >= self.MAX_ENTRIES:
+                self._entries.clear()
+            self._entries[signature] = dict(field_indices)
+
+    def clear(self):
+        """Очистка кэша"""
+        with self._lock:
+            self._entries.clear()
+
+
+# Общий кэш для всех исполнителей и браузеров пула
+FIELD_INDEX_CACHE = FieldIndexCache()
+
+
+def checkbox_ids_for(has_adpi):
+    """Номера чекбоксов признаков семьи"""
+    return CHECKBOX_IDS + ADPI_CHECKBOX_IDS if has_adpi else list(CHECKBOX_IDS)
+
+
+def classify_card_address(address):
+    """Приоритет района по адресу карточки: (номер, название) или (None, '')"""
+    address_lower = address.lower()
+    for rank, name, marker in DISTRICT_RULES:
+        if marker in address_lower:
+            return rank, name
+    return None, ""
+
+
+def score_card_fio(search_fio, card):
+    """Оценка совпадения ФИО карточки с искомым (0..1), запоминается в card['score']"""
+    card['score'] = fio_similarity(search_fio, card.get('fio', ''))
+    return card['score']
+
+
+def card_fio_matches(search_fio, card_fio):
+    """ФИО карточки - тот же человек (is_same_person): имя и отчество совпадают, фамилия - с опечаткой не больше одной буквы"""
+    return is_same_person(search_fio, card_fio, CARD_MAX_SURNAME_EDITS)
+
+
+def pick_card_by_fio(search_fio, cards):
+    """Единственная карточка того же человека (card_fio_matches) или None - тогда выбирает оператор"""
+    matching = [card for card in cards if card_fio_matches(search_fio, card.get('fio', ''))]
+    return matching[0] if len(matching) == 1 else None
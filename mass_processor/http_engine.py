@@ -0,0 +1,772 @@
+"""Движок обработки через прямые HTTP постбэки (без браузера)
+
+Повторяет шаги AutoFormFillerMass (поиск на FindInfo.aspx, выбор карточки, вкладка
+доп. информации, редактирование, добавление полей, сохранение), но вместо Chrome
+отправляет формы ASP.NET WebForms напрямую: разбирает страницу, переносит
+__VIEWSTATE/__EVENTVALIDATION и выполняет __doPostBack через общую сессию requests.
+"""
+
+import os
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from mass_processor.card_cache import CARD_FIO_CLASS, CARD_FIO_ID
+from mass_processor.core import AutoFormFillerMass
+from mass_processor.retry_policy import NOT_FOUND, STALE, VALIDATION
+from mass_processor.form_layout import (
+    FIELD_INDEX_CACHE, LIVING_CONDITIONS_TEXT, checkbox_ids_for,
+    fallback_field_indices, resolve_field_indices
+)
+
+POSTBACK_RE = re.compile(r"__doPostBack\(\s*['\"]([^'\"]*)['\"]\s*,\s*['\"]([^'\"]*)['\"]\s*\)")
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param',
+             'source', 'track', 'wbr'}
+
+CHECKBOX_ID_PREFIX = "ctl00_cph_ctrlDopFields_AJSpr1_PopupDiv_divContent_AJ_"
+CHECKBOX_OK_ID = "ctl00_cph_ctrlDopFields_AJSpr1_PopupDiv_ctl06_AJOk"
+GRID_LABEL_RE = re.compile(r"^ctl00_cph_ctrlDopFields_gv_ctl(\d+)_lbName$")
+
+
+class HtmlElement:
+    """Элемент разобранной страницы"""
+
+    def __init__(self, tag, attrs, parent=None):
+        self.tag = tag
+        self.attrs = attrs
+        self.parent = parent
+        self.children = []
+        self.text_parts = []
+
+    def get(self, name, default=None):
+        return self.attrs.get(name, default)
+
+    @property
+    def id(self):
+        return self.attrs.get('id', '')
+
+    @property
+    def classes(self):
+        return (self.attrs.get('class') or '').split()
+
+    @property
+    def text(self):
+        """Текст элемента со всеми вложенными элементами"""
+        parts = list(self.text_parts)
+        for child in self.children:
+            parts.append(child.text)
+        return ' '.join(part.strip() for part in parts if part and part.strip())
+
+    def iter(self):
+        """Обход элемента и всех вложенных в порядке документа"""
+        yield self
+        for child in self.children:
+            yield from child.iter()
+
+    def find_all(self, tag=None, class_name=None, **attrs):
+        result = []
+        for element in self.iter():
+            if element is self:
+                continue
+            if tag and element.tag != tag:
+                continue
+            if class_name and class_name not in element.classes:
+                continue
+            if any(element.attrs.get(key) != value for key, value in attrs.items()):
+                continue
+            result.append(element)
+        return result
+
+    def find(self, tag=None, class_name=None, **attrs):
+        found = self.find_all(tag, class_name, **attrs)
+        return found[0] if found else None
+
+
+class HtmlDocument(HTMLParser):
+    """Упрощенное DOM-дерево страницы на стандартном html.parser"""
+
+    def __init__(self, html_text):
+        super().__init__(convert_charrefs=True)
+        self.root = HtmlElement('document', {})
+        self.current = self.root
+        self.by_id = {}
+        self.feed(html_text)
+        self.close()
+
+    def handle_starttag(self, tag, attrs):
+        element = HtmlElement(tag, {name: (value if value is not None else '') for name, value in attrs},
+                              self.current)
+        self.current.children.append(element)
+        if element.id and element.id not in self.by_id:
+            self.by_id[element.id] = element
+        if tag not in VOID_TAGS:
+            self.current = element
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self.current.tag == tag:
+            self.current = self.current.parent
+
+    def handle_endtag(self, tag):
+        element = self.current
+        while element is not self.root and element.tag != tag:
+            element = element.parent
+        if element is not self.root:
+            self.current = element.parent
+
+    def handle_data(self, data):
+        self.current.text_parts.append(data)
+
+    def get_element_by_id(self, element_id):
+        return self.by_id.get(element_id)
+
+    def find_all(self, tag=None, class_name=None, **attrs):
+        return self.root.find_all(tag, class_name, **attrs)
+
+    def find(self, tag=None, class_name=None, **attrs):
+        return self.root.find(tag, class_name, **attrs)
+
+    @property
+    def title(self):
+        title = self.find('title')
+        return title.text if title else ""
+
+    def form_fields(self, form=None):
+        """Значения полей формы так, как их отправил бы браузер (без кнопок)"""
+        form = form or self.find('form') or self.root
+        fields = []
+        for element in form.iter():
+            name = element.get('name')
+            if not name or element.get('disabled') is not None:
+                continue
+            if element.tag == 'input':
+                input_type = (element.get('type') or 'text').lower()
+                if input_type in ('submit', 'button', 'image', 'reset', 'file'):
+                    continue
+                if input_type in ('checkbox', 'radio'):
+                    if element.get('checked') is not None:
+                        fields.append((name, element.get('value', 'on')))
+                    continue
+                fields.append((name, element.get('value', '')))
+            elif element.tag == 'textarea':
+                fields.append((name, ''.join(element.text_parts)))
+            elif element.tag == 'select':
+                options = element.find_all('option')
+                selected = [option for option in options if option.get('selected') is not None]
+                chosen = selected[:1] or options[:1]
+                for option in chosen:
+                    fields.append((name, option.get('value', option.text)))
+        return fields
+
+
+class HttpBrowser:
+    """Сессия HTTP с текущей страницей: минимальная замена WebDriver для HttpFormFiller
+
+    Поддерживает те атрибуты WebDriver, которыми пользуются GUI и пул браузеров
+    (current_url, title, page_source, get, refresh, quit).
+    """
+
+    def __init__(self, timeout=30, pool_size=4, retries=2):
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.response = None
+        self.document = None
+        self.closed = False
+
+    def _check_open(self):
+        if self.closed:
+            raise RuntimeError("HTTP сессия закрыта")
+
+    @property
+    def current_url(self):
+        self._check_open()
+        return self.response.url if self.response is not None else ""
+
+    @property
+    def title(self):
+        self._check_open()
+        return self.document.title if self.document else ""
+
+    @property
+    def page_source(self):
+        self._check_open()
+        return self.response.text if self.response is not None else ""
+
+    def _load(self, response):
+        response.raise_for_status()
+        if not response.encoding or response.encoding.lower() == 'iso-8859-1':
+            response.encoding = response.apparent_encoding or 'utf-8'
+        self.response = response
+        self.document = HtmlDocument(response.text)
+        return self.document
+
+    def get(self, url):
+        """Загрузка страницы"""
+        self._check_open()
+        return self._load(self.session.get(url, timeout=self.timeout))
+
+    def refresh(self):
+        return self.get(self.current_url)
+
+    def submit(self, overrides=None, event_target="", event_argument="", button=None):
+        """Отправка формы текущей страницы (постбэк)
+
+        overrides - значения полей {name: value}, None удаляет поле из отправки;
+        button - (name, value) нажатой кнопки submit.
+        """
+        self._check_open()
+        form = self.document.find('form')
+        if form is None:
+            raise RuntimeError("На странице нет формы для отправки")
+
+        fields = dict(self.document.form_fields(form))
+        for name, value in (overrides or {}).items():
+            if value is None:
+                fields.pop(name, None)
+            else:
+                fields[name] = value
+        fields['__EVENTTARGET'] = event_target
+        fields['__EVENTARGUMENT'] = event_argument
+        if button:
+            fields[button[0]] = button[1]
+
+        action = urljoin(self.current_url, form.get('action') or self.current_url)
+        return self._load(self.session.post(action, data=fields, timeout=self.timeout))
+
+    def postback_target(self, element_id):
+        """Цель __doPostBack для элемента по его href/onclick (или по соглашению об именах ASP.NET)"""
+        element = self.document.get_element_by_id(element_id) if self.document else None
+        if element is not None:
+            for candidate in element.iter():
+                for attr in ('href', 'onclick'):
+                    match = POSTBACK_RE.search(candidate.get(attr) or '')
+                    if match:
+                        return match.group(1), match.group(2)
+        return element_id.replace('_', '$'), ''
+
+    def click(self, element_id, overrides=None):
+        """Нажатие на элемент: кнопка отправляет форму, ссылка выполняет постбэк или переход"""
+        self._check_open()
+        element = self.document.get_element_by_id(element_id)
+        if element is not None and element.tag in ('input', 'button') and \
+                (element.get('type') or 'submit').lower() in ('submit', 'image'):
+            return self.submit(overrides, button=(element.get('name') or element_id, element.get('value', '')))
+
+        if element is not None and element.tag == 'a':
+            href = element.get('href') or ''
+            if href and not href.lower().startswith('javascript:') and not element.get('onclick'):
+                return self.get(urljoin(self.current_url, href))
+
+        target, argument = self.postback_target(element_id)
+        return self.submit(overrides, event_target=target, event_argument=argument)
+
+    def quit(self):
+        self.closed = True
+        try:
+            self.session.close()
+        except Exception:
+            pass
+
+
+class HttpFormFiller(AutoFormFillerMass):
+    """AutoFormFillerMass с теми же шагами обработки семьи, но без браузера"""
+
+    def __init__(self, gui_app):
+        super().__init__(gui_app)
+        self.card_url = ""
+        self.pending_fields = {}
+
+    # ---- сессия ----
+
+    def _setup_driver(self):
+        """Создание HTTP сессии и вход в систему"""
+        try:
+            self.log("🔧 Настройка HTTP сессии...")
+            self.driver = HttpBrowser()
+            if not self._sign_in():
+                return False
+            self.log("✅ HTTP сессия настроена и выполнен вход")
+            return True
+        except Exception as e:
+            self.log(f"❌ Ошибка настройки HTTP сессии: {e}")
+            return False
+
+    def _login(self):
+        """Вход в систему отправкой формы входа"""
+        try:
+            self.log("🔐 Выполняем вход...")
+            document = self.driver.get(self.search_url)
+            if document.find('input', name='tbUserName') is None:
+                self.log("✅ Вход не требуется")
+                return True
+
+            login_button = None
+            for element in document.find_all('input'):
+                if (element.get('type') or '').lower() == 'submit':
+                    login_button = (element.get('name'), element.get('value', ''))
+                    break
+
+            document = self.driver.submit({'tbUserName': self.username, 'tbPassword': self.password},
+                                          button=login_button)
+            if document.find('input', name='tbUserName') is not None:
+                raise RuntimeError("сервер снова показал форму входа")
+
+            self.log("✅ Вход выполнен")
+            self._save_session()
+            return True
+        except Exception as e:
+            self.log(f"❌ Ошибка входа: {e}")
+            self.gui.show_error("Ошибка входа", f"Не удалось выполнить вход: {e}")
+            return False
+
+    def _session_cookies(self):
+        """Cookie сессии requests в формате WebDriver (общий файл сессий для обоих движков)"""
+        cookies = []
+        for cookie in self.driver.session.cookies:
+            entry = {'name': cookie.name, 'value': cookie.value, 'domain': cookie.domain,
+                     'path': cookie.path, 'secure': cookie.secure,
+                     'httpOnly': cookie.has_nonstandard_attr('HttpOnly')}
+            if cookie.expires:
+                entry['expiry'] = cookie.expires
+            cookies.append(entry)
+        return cookies
+
+    def _apply_cookies(self, cookies):
+        """Подстановка cookie в сессию requests"""
+        # Сессии хранятся по адресу приложения, поэтому cookie ставятся без домена
+        # (у requests и WebDriver разные домены для хостов без точки, например localhost)
+        for cookie in cookies:
+            self.driver.session.cookies.set(cookie['name'], cookie['value'], path=cookie.get('path', '/'),
+                                            secure=cookie.get('secure', False))
+
+    def _session_accepted(self):
+        """Открылась ли страница поиска без формы входа"""
+        document = self.driver.get(self.search_url)
+        if document.find('input', name='tbUserName') is None:
+            return True
+        # Отклоненные cookie не должны уйти вместе с новыми после входа
+        self.driver.session.cookies.clear()
+        return False
+
+    def _keep_session_alive(self):
+        """Открытие страницы поиска с повторным входом при истекшей сессии"""
+        return self._get_with_login(self.search_url)
+
+    def _browser_memory_mb(self):
+        """Браузера нет - плановый перезапуск по памяти не нужен"""
+        return None
+
+    def wait_for_manual_intervention(self, message):
+        """Без браузера оператору некуда вмешаться - семья откладывается или считается необработанной"""
+        self.log(f"🛠️ {message}")
+        if self.defer_manual:
+            return self._defer_family(message)
+        self.log("⏭️ HTTP режим: ручное вмешательство невозможно, обработайте семью в браузере")
+        return False
+
+    def _element_text(self, element_id, default=""):
+        element = self.driver.document.get_element_by_id(element_id) if self.driver.document else None
+        return element.text.strip() if element is not None else default
+
+    # ---- обработка семьи ----
+
+    def _process_family_steps(self, family_data, family_number):
+        """Шаги обработки одной семьи (тот же контракт, что и у AutoFormFillerMass)"""
+        try:
+            self.pending_fields = {}
+
+            # 1. ФИО для поиска
+            mother_fio = family_data.get('mother_fio', '')
+            search_fio = mother_fio or family_data.get('father_fio', '')
+            if not search_fio:
+                self.log("❌ Не указано ФИО матери или отца")
+                return self._fail(VALIDATION)
+
+            # 2-3. Карточка из кэша или поиск и выбор карточки
+            with self._phase("карточка"):
+                from_cache = self._open_card_from_cache(family_data, search_fio)
+            if not from_cache:
+                if not self._search_and_open_card(family_data, family_number, search_fio):
+                    return False
+
+            # 4. Телефон и адрес
+            with self._phase("телефон и адрес"):
+                self._get_phone_and_address_from_family_data(family_data)
+                self._get_phone_and_address_from_page()
+
+            # 5. Проверка существующих данных
+            with self._phase("проверка доп. информации"):
+                is_empty = self._check_additional_info_empty()
+            if is_empty is None:
+                # Сбой запроса - решает повтор
+                return False
+            if not is_empty:
+                if not self._warn_existing_data():
+                    self.log("⚠️ Пропускаем - данные уже существуют")
+                    return True
+
+            # 6. Форма доп. информации
+            self.log("🔄 Переходим на вкладку доп. информации...")
+            with self._phase("переход к форме"):
+                navigated = self._navigate_to_additional_info()
+            if not navigated:
+                if self.last_error is not None:
+                    # Сбой запроса, а не неожиданная страница - оператор не нужен, решает повтор
+                    return False
+                return (self.wait_for_manual_intervention("Не удалось перейти на вкладку доп. информации")
+                        or self._fail(STALE))
+
+            # 7-8. Заполнение
+            with self._phase("заполнение"):
+                formatted_data = self._format_family_data(family_data)
+                filled = self._fill_form(*formatted_data)
+            if not filled:
+                self.log("❌ Ошибка заполнения формы")
+                return False
+
+            # 9. Сохранение
+            with self._phase("проверка"):
+                confirmed = self._final_verification(family_data)
+            if not confirmed:
+                return self._fail(VALIDATION)
+            with self._phase("сохранение"):
+                saved = self._save_and_exit()
+            if saved:
+                if self.screenshot_dir:
+                    with self._phase("скриншот"):
+                        self._take_screenshot(formatted_data, family_number, family_data)
+                self.log("✅ Семья обработана успешно")
+                return True
+            return False
+
+        except Exception as e:
+            self.log(f"❌ Ошибка при обработке семьи: {str(e)}")
+            import traceback
+            self.log(f"📋 Трассировка:\n{traceback.format_exc()}")
+            self.last_error = e
+            return False
+
+    def _search_and_open_card(self, family_data, family_number, search_fio):
+        """Страница поиска (повторный вход, если сессия истекла), поиск и выбор карточки"""
+        with self._phase("поиск"):
+            self.log("🔙 Открываем страницу поиска...")
+            if not self._get_with_login(self.search_url):
+                return False
+
+            self.log(f"🔍 Поиск семьи: {search_fio}")
+            found = self._fast_search_mother(search_fio)
+        if not found:
+            self.log("❌ Не удалось найти семью")
+            if self.last_error is not None:
+                # Поиск не выполнился, а не ничего не нашел - решает повтор
+                return False
+            return self.wait_for_manual_intervention(f"Не удалось найти семью: {search_fio}") or self._fail(NOT_FOUND)
+
+        self.log("🤖 Анализируем результаты поиска...")
+        with self._phase("карточка"):
+            opened = self._analyze_search_results(family_number, search_fio)
+            if opened:
+                self._remember_card(family_data, search_fio)
+        if not opened:
+            self.log("❌ Не удалось автоматически выбрать карточку")
+            if self.last_error is not None:
+                return False
+            return self.wait_for_manual_intervention("Не удалось автоматически выбрать карточку") or self._fail(NOT_FOUND)
+        return True
+
+    def _get_with_login(self, url):
+        """Открытие страницы с повторным входом, если сессия истекла"""
+        document = self.driver.get(url)
+        if document.find('input', name='tbUserName') is not None:
+            self.log("⚠️ Сессия истекла, выполняем вход повторно")
+            if not self._login():
+                return False
+            self.driver.get(url)
+        return True
+
+    def _navigate_to_card_url(self, card_url):
+        if not self._get_with_login(card_url):
+            raise RuntimeError("не удалось выполнить вход")
+        self.card_url = self.driver.current_url
+
+    def _get_card_fio(self):
+        document = self.driver.document
+        element = document.get_element_by_id(CARD_FIO_ID)
+        if element is None:
+            element = document.find(class_name=CARD_FIO_CLASS)
+        return element.text if element is not None else None
+
+    def _remember_card(self, family_data, search_fio):
+        if self.card_cache is not None and "CardInfo.aspx" in self.card_url:
+            self.card_cache.put(search_fio, self._card_birth(family_data, search_fio), self.card_url)
+
+    def _return_to_search_page(self):
+        """Возврат на страницу поиска"""
+        try:
+            self.driver.get(self.search_url)
+        except Exception as e:
+            self.log(f"⚠️ Не удалось вернуться на страницу поиска: {e}")
+
+    def _fast_search_mother(self, mother_fio):
+        """Поиск постбэком поля быстрого поиска"""
+        for attempt in range(2):
+            try:
+                document = self.driver.document
+                overrides = {'ctl00$cph$ctrlFastFind$tbFind': mother_fio}
+                button = None
+                for element in document.find_all('input'):
+                    name = element.get('name') or ''
+                    if name.startswith('ctl00$cph$ctrlFastFind$') and \
+                            (element.get('type') or '').lower() in ('submit', 'image'):
+                        button = (name, element.get('value', ''))
+                        break
+
+                document = self.driver.submit(overrides, button=button)
+                self.last_error = None
+                container = document.get_element_by_id('ctl00_cph_dTabsContainer')
+                if container is not None and container.find(class_name='pers') is not None:
+                    self.log(f"✅ Поиск выполнен успешно (попытка {attempt + 1})")
+                    return True
+                self.log("⚠️ По запросу не найдено ни одной карточки")
+                return False
+            except Exception as e:
+                self.log(f"⚠️ Попытка {attempt + 1} поиска не удалась: {e}")
+                # Поиск не выполнился (а не ничего не нашел) - повтор решается по этой ошибке
+                self.last_error = e
+                try:
+                    self.driver.get(self.search_url)
+                except Exception:
+                    pass
+        return False
+
+    def _extract_cards(self):
+        """Карточки результатов поиска: ФИО, адрес и ссылка на карточку"""
+        container = self.driver.document.get_element_by_id('ctl00_cph_dTabsContainer')
+        cards = []
+        if container is None:
+            return cards
+
+        for i, card in enumerate(container.find_all(class_name='pers')):
+            fio_element = card.find(class_name='fio')
+            fio = fio_element.text if fio_element is not None else f"Карточка {i+1}"
+
+            address = ""
+            details = card.find('table', class_name='tbl-details')
+            if details is not None:
+                for row in details.find_all('tr'):
+                    cells = row.find_all('td')
+                    if len(cells) >= 2 and "Проживает:" in cells[0].text:
+                        address = cells[1].text
+                        break
+
+            link = card.find('a', title='Переход в просмотр ПКУ')
+            cards.append({
+                'index': i,
+                'id': card.id,
+                'fio': fio,
+                'address': address,
+                'link_id': link.id if link is not None else '',
+                'href': link.get('href', '') if link is not None else ''
+            })
+        return cards
+
+    def _open_card(self, card):
+        """Переход в карточку по ссылке 'Переход в просмотр ПКУ'"""
+        href = card['href']
+        if href and not href.lower().startswith('javascript:'):
+            self.driver.get(urljoin(self.driver.current_url, href))
+        elif card['link_id']:
+            self.driver.click(card['link_id'])
+        else:
+            match = POSTBACK_RE.search(href)
+            if not match:
+                self.log("❌ Не удалось найти ссылку для перехода к карточке")
+                return False
+            self.driver.submit(event_target=match.group(1), event_argument=match.group(2))
+
+        self.card_url = self.driver.current_url
+        self.log(f"✅ Открыта карточка: {card['fio']}")
+        return True
+
+    def _get_phone_and_address_from_page(self):
+        """Телефон и адрес из карточки, если их нет в JSON"""
+        if not self.phone:
+            self.phone = self._element_text("ctl00_cph_lblMobilPhone")
+            if self.phone:
+                self.log(f"📱 Телефон со страницы: {self.phone}")
+
+        if not self.address or self.address == "Адрес не найден":
+            address_text = self._element_text("ctl00_cph_lblRegAddress")
+            if not address_text:
+                self.log("⚠️ Адрес не найден на странице")
+                self.address = self.address or "Адрес не найден"
+                return
+            self.address = address_text
+            self.log(f"🏠 Адрес со страницы: {self.address}")
+            with self.interaction_lock:
+                if not self.gui.ask_yes_no(
+                    "Проверка адреса",
+                    f"Адрес верен?\n{self.address}\n\nЕсли нет - отредактируйте в следующих шагах.",
+                    default=True
+                ):
+                    new_address = self.gui.ask_input("Исправление адреса", "Введите правильный адрес:")
+                    if new_address:
+                        self.address = new_address
+
+    def _check_additional_info_empty(self):
+        """Открытие вкладки доп. информации и проверка, что она пуста; None - проверить не удалось"""
+        try:
+            self.driver.click("ctl00_cph_rptAllTabs_ctl10_tdTabL")
+            info_text = self._element_text("ctl00_cph_lblAddInfo2")
+            result = info_text == "Информация отсутствует" or not info_text
+            self.log(f"📊 Проверка дополнительной информации: {'пусто' if result else 'есть данные'}")
+            return result
+        except Exception as e:
+            # Неизвестно - не значит пусто: иначе сохранение затрет существующие данные
+            self.log(f"⚠️ Ошибка проверки поля: {e}")
+            self.last_error = e
+            return None
+
+    def _navigate_to_additional_info(self):
+        """Вкладка -> Редактировать -> Добавить"""
+        try:
+            document = self.driver.document
+            if document.get_element_by_id("ctl00_cph_lbtnEditAddInfo") is None:
+                self.driver.click("ctl00_cph_rptAllTabs_ctl10_tdTabL")
+
+            for element_id in ("ctl00_cph_lbtnEditAddInfo", "ctl00_cph_ctrlDopFields_lbtnAdd"):
+                if self.driver.document.get_element_by_id(element_id) is None:
+                    self.log(f"❌ Кнопка {element_id} не найдена")
+                    return False
+                self.driver.click(element_id)
+
+            if self.driver.document.find('textarea', name='ctl00$cph$tbAddInfo') is None:
+                self.log("❌ Форма дополнительной информации не загружена")
+                return False
+            self.log("✅ Форма дополнительной информации загружена")
+            return True
+        except Exception as e:
+            self.log(f"❌ Ошибка навигации: {e}")
+            self.last_error = e
+            return False
+
+    def _get_field_indices(self):
+        """Индексы строк таблицы доп. полей по их названиям"""
+        labels = {}
+        for element_id, element in self.driver.document.by_id.items():
+            match = GRID_LABEL_RE.match(element_id)
+            if match:
+                labels[match.group(1).zfill(2)] = element.text
+
+        has_adpi = self.driver.document.get_element_by_id("ctl00_cph_ctrlDopFields_gv_ctl03_rbl_0") is not None
+        signature = FIELD_INDEX_CACHE.signature(labels, has_adpi)
+        field_indices = FIELD_INDEX_CACHE.get(signature)
+        if field_indices is not None:
+            return field_indices
+
+        field_indices, missing_fields = resolve_field_indices(labels, has_adpi)
+        if missing_fields:
+            self.log(f"⚠️ Не найдены поля: {missing_fields}, использую стандартные индексы")
+        self.log(f"✅ Определены индексы полей: {field_indices}")
+        FIELD_INDEX_CACHE.put(signature, field_indices)
+        return field_indices
+
+    def _get_fallback_indices(self):
+        has_adpi = self.driver.document.get_element_by_id("ctl00_cph_ctrlDopFields_gv_ctl03_rbl_0") is not None
+        return fallback_field_indices(has_adpi)
+
+    def _input_name(self, element_id, default_name):
+        element = self.driver.document.get_element_by_id(element_id)
+        return element.get('name') if element is not None and element.get('name') else default_name
+
+    def _fill_form(self, add_info_text, category, housing_info, adpi_data):
+        """Подтверждение признаков постбэком и подготовка значений для сохранения"""
+        try:
+            has_adpi = adpi_data['has_adpi'] == 'д'
+            checkbox_ids = checkbox_ids_for(has_adpi)
+            self.log(f"🔄 Отмечаем чекбоксы: {checkbox_ids}")
+
+            overrides = {'ctl00$cph$tbAddInfo': add_info_text}
+            for checkbox_id in checkbox_ids:
+                element_id = f"{CHECKBOX_ID_PREFIX}{checkbox_id}"
+                element = self.driver.document.get_element_by_id(element_id)
+                if element is None:
+                    self.log(f"⚠️ Чекбокс {checkbox_id} не найден")
+                    continue
+                overrides[element.get('name') or element_id.replace('_', '$')] = element.get('value', 'on')
+
+            if self.driver.document.get_element_by_id(CHECKBOX_OK_ID) is not None:
+                self.driver.click(CHECKBOX_OK_ID, overrides)
+                self.log("✅ Чекбоксы подтверждены")
+
+            field_indices = self._get_field_indices()
+            values = {'ctl00$cph$tbAddInfo': add_info_text}
+
+            radio_id = "ctl00_cph_ctrlDopFields_gv_ctl03_rbl_0" if has_adpi else "ctl00_cph_ctrlDopFields_gv_ctl03_rbl_1"
+            radio = self.driver.document.get_element_by_id(radio_id)
+            if radio is not None and radio.get('name'):
+                values[radio.get('name')] = radio.get('value', 'on')
+            else:
+                self.log("⚠️ Не удалось заполнить АДПИ")
+
+            text_values = {
+                'phone': self.phone or '',
+                'category': category,
+                'address': self.address,
+                'housing': housing_info,
+                'living': LIVING_CONDITIONS_TEXT
+            }
+            for key, text in text_values.items():
+                if key in field_indices:
+                    values[f"ctl00$cph$ctrlDopFields$gv$ctl{field_indices[key]}$tb"] = text
+
+            if has_adpi:
+                for key in ('install_date', 'check_date'):
+                    if adpi_data.get(key) and key in field_indices:
+                        index_str = field_indices[key]
+                        name = self._input_name(f"igtxtctl00_cph_ctrlDopFields_gv_ctl{index_str}_wdte",
+                                                f"ctl00$cph$ctrlDopFields$gv$ctl{index_str}$wdte")
+                        values[name] = adpi_data[key]
+
+            self.pending_fields = values
+            self.log(f"✅ Подготовлено полей для сохранения: {len(values)}")
+            return True
+
+        except Exception as e:
+            self.log(f"❌ Ошибка заполнения формы: {e}")
+            self.last_error = e
+            return False
+
+    def _save_and_exit(self):
+        """Сохранение одним постбэком со всеми значениями формы"""
+        try:
+            self.log("💾 Сохраняем данные...")
+            document = self.driver.click("ctl00_cph_lbtnExitSave", self.pending_fields)
+            if document.find('textarea', name='ctl00$cph$tbAddInfo') is not None:
+                self.log("❌ Сервер не принял сохранение: форма редактирования осталась открытой")
+                return False
+            self.log("✅ Данные сохранены")
+            return True
+        except Exception as e:
+            self.log(f"❌ Ошибка сохранения: {e}")
+            self.last_error = e
+            return False
+
+    def _take_screenshot(self, formatted_data, family_number, family_data):
+        """Вместо скриншота сохраняется HTML страницы после сохранения"""
+        try:
+            mother_name = family_data.get('mother_fio') or f"семья_{family_number}"
+            safe_name = re.sub(r'[\\/*?:"<>|]', '_', mother_name)[:50]
+            os.makedirs(self.screenshot_dir, exist_ok=True)
+            file_path = os.path.join(self.screenshot_dir, f"{family_number:03d}_{safe_name}.html")
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(self.driver.page_source)
+            self.log(f"📸 Страница сохранена: {file_path}")
+        except Exception as e:
+            self.log(f"⚠️ Ошибка сохранения страницы: {e}")
@@ -0,0 +1,155 @@
+"""Журнал статусов семей для продолжения обработки после сбоя
+
+Каждая смена статуса семьи дописывается в конец JSONL файла одной строкой и
+сразу сбрасывается на диск (fsync), исходный JSON при этом не переписывается.
+При загрузке того же файла семей журнал проигрывается: семьи получают последний
+записанный статус, а семьи, оборванные на середине ('в процессе'), снова ждут
+обработки.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+from mass_processor.card_cache import normalize_fio
+
+# Статусы, которые восстанавливаются из журнала как есть
+FINAL_STATUSES = ('успешно', 'ошибка', 'пропущено', 'ручное вмешательство')
+# Служебный статус: семья перенесена в completed и больше не отслеживается
+FORGOTTEN_STATUS = 'удалено'
+
+
+def family_key(family):
+    """Ключ семьи в журнале: ФИО матери (или отца) и дата рождения матери"""
+    fio = family.get('mother_fio') or family.get('father_fio') or ''
+    return f"{normalize_fio(fio)}|{(family.get('mother_birth') or '').strip()}"
+
+
+def journal_path_for(journals_dir, json_path):
+    """Файл журнала для JSON файла семей (имя файла + хэш полного пути)"""
+    digest = hashlib.sha1(os.path.abspath(json_path).encode('utf-8')).hexdigest()[:8]
+    name = os.path.splitext(os.path.basename(json_path))[0]
+    return os.path.join(journals_dir, f"{name}_{digest}.jsonl")
+
+
+class ProcessingJournal:
+    """Журнал переходов статусов семей (только дозапись)"""
+
+    # Журнал переписывается без устаревших записей, когда их больше в COMPACT_RATIO раз
+    COMPACT_RATIO = 4
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = None
+        self.entries = self._read()
+        self._compact_if_needed()
+
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.file = open(path, 'a', encoding='utf-8')
+            # После сбоя последняя строка может быть оборвана - новые записи начинаются с новой строки
+            if self.file.tell() > 0 and not self._ends_with_newline():
+                self.file.write("\n")
+                self.file.flush()
+        except Exception as e:
+            print(f"⚠️ Не удалось открыть журнал обработки {path}: {e}")
+
+    def record(self, family, status, error="", index=None):
+        """Запись смены статуса семьи (на диске до возврата из метода)"""
+        entry = {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'key': family_key(family),
+            'index': index,
+            'status': status,
+            'error': error or '',
+        }
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self.lock:
+            self.entries[entry['key']] = entry
+            if not self.file:
+                return
+            try:
+                self.file.write(line)
+                self.file.flush()
+                os.fsync(self.file.fileno())
+            except Exception as e:
+                print(f"⚠️ Ошибка записи в журнал обработки: {e}")
+
+    def restore(self, families):
+        """Статусы семей по журналу. Возвращает количество восстановленных по статусам"""
+        restored = {}
+        with self.lock:
+            entries = dict(self.entries)
+        for family in families:
+            entry = entries.get(family_key(family))
+            if not entry:
+                continue
+            status = entry['status']
+            if status in FINAL_STATUSES:
+                family['status'] = status
+                family['error_message'] = entry.get('error', '')
+            elif status == 'в процессе':
+                # Обработка оборвалась на этой семье - проходим ее заново
+                family['status'] = 'ожидает'
+                family['error_message'] = 'Обработка была прервана'
+                status = 'прервано'
+            else:
+                continue
+            restored[status] = restored.get(status, 0) + 1
+        return restored
+
+    def forget(self, families):
+        """Семьи больше не отслеживаются (перенесены в completed)"""
+        for family in families:
+            self.record(family, FORGOTTEN_STATUS)
+
+    def close(self):
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as file:
+            file.seek(-1, os.SEEK_END)
+            return file.read(1) == b"\n"
+
+    def _read(self):
+        """Последняя запись по каждой семье; оборванная при сбое строка пропускается"""
+        entries = {}
+        self.line_count = 0
+        if not os.path.exists(self.path):
+            return entries
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    self.line_count += 1
+                    try:
+                        entry = json.loads(line)
+                        entries[entry['key']] = entry
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        except Exception as e:
+            print(f"⚠️ Ошибка чтения журнала обработки {self.path}: {e}")
+        return entries
+
+    def _compact_if_needed(self):
+        """Перезапись журнала только с последними записями (атомарно через временный файл)"""
+        live = {key: entry for key, entry in self.entries.items() if entry.get('status') != FORGOTTEN_STATUS}
+        if self.line_count <= self.COMPACT_RATIO * len(live) + 100:
+            return
+        try:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                for entry in live.values():
+                    file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, self.path)
+            self.entries = live
+            self.line_count = len(live)
+        except Exception as e:
+            print(f"⚠️ Ошибка сжатия журнала обработки: {e}")
@@ -0,0 +1,95 @@
+"""Полный журнал обработки на диске
+
+Вкладка логов хранит только последние строки (ProcessLog.MAX_VIEW_LINES), а весь
+журнал пишется в config/logs/mass_processor.log с ротацией по размеру. Поиск и
+фильтр по журналу работают по файлам, а не по содержимому виджета.
+"""
+
+import logging
+import os
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+# Фильтры поиска: название -> признаки строки (пустой список - все строки)
+LOG_FILTERS = {
+    "Все": [],
+    "Ошибки": ["❌"],
+    "Предупреждения": ["⚠️"],
+    "Успешные": ["✅"],
+}
+
+
+class ProcessLog:
+    """Журнал с ротацией файлов и поиском по ним"""
+
+    # Сколько строк держит вкладка логов
+    MAX_VIEW_LINES = 5000
+
+    def __init__(self, logs_dir, file_name="mass_processor.log", max_bytes=5 * 1024 * 1024, backup_count=5):
+        self.path = os.path.join(logs_dir, file_name)
+        self.backup_count = backup_count
+        self.handler = None
+        # Отдельный логгер на каждый файл, чтобы несколько окон не писали в чужой журнал
+        self.logger = logging.getLogger(f"mass_processor.log.{self.path}")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+
+        try:
+            self.handler = RotatingFileHandler(self.path, maxBytes=max_bytes, backupCount=backup_count,
+                                               encoding='utf-8')
+            self.handler.setFormatter(logging.Formatter("%(message)s"))
+            self.logger.addHandler(self.handler)
+        except Exception as e:
+            print(f"⚠️ Не удалось открыть файл журнала {self.path}: {e}")
+
+    def write(self, line):
+        """Запись строки (с отметкой времени) в файл журнала"""
+        if self.handler:
+            self.logger.info(line.rstrip("\n"))
+
+    def files(self):
+        """Файлы журнала от старых к новым"""
+        paths = [f"{self.path}.{n}" for n in range(self.backup_count, 0, -1)] + [self.path]
+        return [path for path in paths if os.path.exists(path)]
+
+    def search(self, query="", log_filter="Все", limit=2000):
+        """Строки журнала с текстом query и признаком фильтра (последние limit совпадений)
+
+        Многострочные сообщения (трассировки) ищутся как одна запись.
+        """
+        query = (query or "").lower()
+        markers = LOG_FILTERS.get(log_filter, [])
+        if self.handler:
+            self.handler.flush()
+
+        matches = deque(maxlen=limit)
+        for record in self._records():
+            if markers and not any(marker in record for marker in markers):
+                continue
+            if query and query not in record.lower():
+                continue
+            matches.append(record)
+        return list(matches)
+
+    def close(self):
+        """Закрытие файла журнала"""
+        if self.handler:
+            self.logger.removeHandler(self.handler)
+            self.handler.close()
+            self.handler = None
+
+    def _records(self):
+        """Записи журнала: строка с отметкой времени вместе со строками-продолжениями"""
+        record = []
+        for path in self.files():
+            try:
+                with open(path, 'r', encoding='utf-8', errors='replace') as file:
+                    for line in file:
+                        if line.startswith("[") and record:
+                            yield "".join(record)
+                            record = []
+                        record.append(line)
+            except Exception as e:
+                print(f"⚠️ Ошибка чтения журнала {path}: {e}")
+        if record:
+            yield "".join(record)
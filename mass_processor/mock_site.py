@@ -0,0 +1,625 @@
+"""Локальная копия страниц FindInfo/CardInfo для проверки массового обработчика
+
+Воспроизводит только то, на что опирается AutoFormFillerMass: поле быстрого поиска,
+карточки .pers, вкладку доп. информации, таблицу ctrlDopFields_gv, окно чекбоксов
+и кнопку сохранения. Постбэки работают как в ASP.NET WebForms: состояние страницы
+передается в __VIEWSTATE и проверяется по __EVENTVALIDATION.
+
+Задержка ответа (--latency, --jitter) и доля сбоев (--failure-rate - ответ 500,
+--drop-rate - обрыв соединения) позволяют проверить обработчик в условиях,
+близких к рабочему серверу.
+
+Пример запуска:
+    python -m mass_processor mock --port 8080 --families families.json
+    python -m mass_processor mock --synthetic 50 --latency 0.2 --jitter 0.1 --failure-rate 0.02
+"""
+
+import argparse
+import base64
+import hashlib
+import html
+import json
+import random
+import secrets
+import threading
+import time
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlsplit
+
+APP_PREFIX = "/aspnetkp"
+SEARCH_PATH = APP_PREFIX + "/Common/FindInfo.aspx"
+CARD_PATH = APP_PREFIX + "/Common/CardInfo.aspx"
+LOGIN_PATH = APP_PREFIX + "/Login.aspx"
+
+DEFAULT_USERNAME = "СРЦ_Вол"
+DEFAULT_PASSWORD = "СРЦ_Вол1"
+
+GRID_PREFIX = "ctl00$cph$ctrlDopFields$gv$"
+POPUP_PREFIX = "ctl00$cph$ctrlDopFields$AJSpr1$PopupDiv$divContent$AJ_"
+CHECKBOX_COUNT = 20
+
+# Строки таблицы доп. полей (ctl02, ctl03, ...) для двух вариантов разметки
+LAYOUT_WITH_ADPI = [
+    ("Номер телефона", "tb"),
+    ("Наличие АДПИ", "rbl"),
+    ("Дата установки АДПИ", "wdte"),
+    ("Дата последней проверки АДПИ", "wdte"),
+    ("Категория семьи", "tb"),
+    ("Фактический адрес проживания семьи", "tb"),
+    ("Жилищные условия", "tb"),
+    ("Бытовые условия", "tb"),
+]
+LAYOUT_WITHOUT_ADPI = [
+    ("Номер телефона", "tb"),
+    ("Наличие АДПИ", "rbl"),
+    ("Категория семьи", "tb"),
+    ("Фактический адрес проживания семьи", "tb"),
+    ("Жилищные условия", "tb"),
+    ("Бытовые условия", "tb"),
+]
+
+DEFAULT_DISTRICT_ADDRESS = "Тверская обл., Вышневолоцкий городской округ, г. Вышний Волочек"
+OTHER_DISTRICT_ADDRESS = "Тверская обл., г. Тверь, ул. Советская, д. 1"
+
+# Части ФИО для синтетических семей
+SYNTHETIC_SURNAMES = ["Иванов", "Смирнов", "Кузнецов", "Попов", "Васильев", "Петров", "Соколов",
+                      "Михайлов", "Новиков", "Федоров", "Морозов", "Волков", "Алексеев", "Лебедев"]
+SYNTHETIC_FEMALE_NAMES = ["Анна", "Мария", "Ольга", "Елена", "Наталья", "Ирина", "Светлана", "Татьяна"]
+SYNTHETIC_MALE_NAMES = ["Петр", "Сергей", "Андрей", "Алексей", "Дмитрий", "Иван", "Николай", "Олег"]
+SYNTHETIC_PATRONYMICS = ["Петров", "Сергеев", "Андреев", "Алексеев", "Дмитриев", "Иванов", "Николаев", "Олегов"]
+SYNTHETIC_STREETS = ["Мира", "Ленина", "Советская", "Садовая", "Школьная", "Лесная"]
+
+
+def generate_families(count, seed=0):
+    """Синтетические семьи в формате JSON файла обработчика (ФИО матерей не повторяются)"""
+    rng = random.Random(seed)
+    families = []
+    for i in range(count):
+        # Номер семьи однозначно задает сочетание фамилии, имени и отчества
+        surname = SYNTHETIC_SURNAMES[i % len(SYNTHETIC_SURNAMES)]
+        rest = i // len(SYNTHETIC_SURNAMES)
+        name = SYNTHETIC_FEMALE_NAMES[rest % len(SYNTHETIC_FEMALE_NAMES)]
+        rest //= len(SYNTHETIC_FEMALE_NAMES)
+        patronymic = SYNTHETIC_PATRONYMICS[rest % len(SYNTHETIC_PATRONYMICS)] + "на"
+        suffix = f" {rest // len(SYNTHETIC_PATRONYMICS) + 1}" if rest >= len(SYNTHETIC_PATRONYMICS) else ""
+
+        adpi = rng.random() < 0.5
+        family = {
+            'mother_fio': f"{surname}а {name} {patronymic}{suffix}",
+            'mother_birth': f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.{rng.randint(1975, 2000)}",
+            'mother_work': rng.choice(["школа", "больница", "не работает", "магазин"]),
+            'father_fio': f"{surname} {rng.choice(SYNTHETIC_MALE_NAMES)} {rng.choice(SYNTHETIC_PATRONYMICS)}ич",
+            'children': [
+                {'fio': f"{surname} {rng.choice(SYNTHETIC_MALE_NAMES)}",
+                 'birth': f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.{rng.randint(2008, 2023)}",
+                 'education': rng.choice(["школа", "детский сад", "дома"])}
+                for _ in range(rng.randint(1, 4))
+            ],
+            'rooms': str(rng.randint(1, 4)),
+            'square': str(rng.randint(30, 90)),
+            'ownership': rng.choice(["собственность", "найм", "долевая собственность"]),
+            'address': f"{DEFAULT_DISTRICT_ADDRESS}, ул. {rng.choice(SYNTHETIC_STREETS)}, д. {rng.randint(1, 60)}",
+            'phone': f"89{rng.randint(0, 999999999):09d}",
+            'adpi': "да" if adpi else "нет",
+            'mother_salary': str(rng.randint(15, 60) * 1000),
+        }
+        if adpi:
+            family['install_date'] = f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.2023"
+            family['check_date'] = f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.2024"
+        families.append(family)
+    return families
+
+
+class MockDatabase:
+    """Карточки ПКУ и сохраненная доп. информация"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.cards = {}
+        self.saved = {}
+        self.next_id = 1
+
+    def add_card(self, fio, address, phone="", birth="", adpi_layout=False):
+        """Добавление карточки, возвращает ее идентификатор"""
+        with self.lock:
+            card_id = self.next_id
+            self.next_id += 1
+            self.cards[card_id] = {
+                'id': card_id,
+                'fio': fio,
+                'address': address,
+                'phone': phone,
+                'birth': birth,
+                'adpi_layout': adpi_layout
+            }
+            return card_id
+
+    def load_families(self, families, namesake_every=3):
+        """Карточки для семей из JSON (каждой N-й семье добавляется тезка из другого района)"""
+        for i, family in enumerate(families):
+            fio = str(family.get('mother_fio') or family.get('father_fio') or '').strip()
+            if not fio:
+                continue
+            address = str(family.get('address') or '').strip()
+            if not address:
+                address = f"{DEFAULT_DISTRICT_ADDRESS}, ул. Мира, д. {i + 1}"
+            self.add_card(fio, address,
+                          phone=str(family.get('phone_number', family.get('phone', '')) or ''),
+                          birth=str(family.get('mother_birth', '') or ''),
+                          adpi_layout=str(family.get('adpi', '')).strip().lower() == 'да')
+            if namesake_every and i % namesake_every == 0:
+                self.add_card(fio, OTHER_DISTRICT_ADDRESS)
+
+    def search(self, query):
+        """Поиск карточек, в ФИО которых есть все слова запроса"""
+        words = query.lower().replace('ё', 'е').split()
+        if not words:
+            return []
+        with self.lock:
+            return [card for card in self.cards.values()
+                    if all(word in card['fio'].lower().replace('ё', 'е') for word in words)]
+
+    def get(self, card_id):
+        with self.lock:
+            return self.cards.get(card_id)
+
+    def save(self, card_id, record):
+        with self.lock:
+            self.saved[card_id] = record
+
+    def get_saved(self, card_id):
+        with self.lock:
+            return self.saved.get(card_id)
+
+    def snapshot(self):
+        """Состояние базы для проверок"""
+        with self.lock:
+            return {
+                'cards': list(self.cards.values()),
+                'saved': {str(card_id): record for card_id, record in self.saved.items()}
+            }
+
+
+def encode_viewstate(state, secret):
+    """Сериализация состояния страницы в пару __VIEWSTATE/__EVENTVALIDATION"""
+    viewstate = base64.b64encode(json.dumps(state, ensure_ascii=False).encode('utf-8')).decode('ascii')
+    validation = hashlib.sha1((viewstate + secret).encode('ascii')).hexdigest()[:24]
+    return viewstate, validation
+
+
+def decode_viewstate(viewstate, validation, secret):
+    """Проверка и разбор __VIEWSTATE, None - если состояние подделано или отсутствует"""
+    if not viewstate:
+        return None
+    expected = hashlib.sha1((viewstate + secret).encode('ascii')).hexdigest()[:24]
+    if validation != expected:
+        return None
+    try:
+        return json.loads(base64.b64decode(viewstate).decode('utf-8'))
+    except Exception:
+        return None
+
+
+def grid_layout(card):
+    return LAYOUT_WITH_ADPI if card['adpi_layout'] else LAYOUT_WITHOUT_ADPI
+
+
+class MockSiteHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов локальной копии сайта"""
+
+    server_version = "MockASPNET/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    # ---- маршрутизация ----
+
+    def do_GET(self):
+        path, query = self._split_path()
+        if path == "/mock/state":
+            state = self.server.database.snapshot()
+            state['stats'] = self.server.get_stats()
+            return self._send_json(state)
+        if self._inject_fault():
+            return
+        if path == LOGIN_PATH:
+            return self._send_page("Вход в систему", self._login_body(), {'page': 'login'})
+        if not self._is_authenticated():
+            return self._redirect_to_login()
+        if path == SEARCH_PATH:
+            return self._render_search("", [])
+        if path == CARD_PATH:
+            card = self._get_card(query)
+            if not card:
+                return self._send_error(404, "Карточка не найдена")
+            return self._render_card(card, {'page': 'card', 'card': card['id'], 'mode': 'main'})
+        return self._send_error(404, "Страница не найдена")
+
+    def do_POST(self):
+        path, query = self._split_path()
+        form = self._read_form()
+        if self._inject_fault():
+            return
+
+        if path == LOGIN_PATH:
+            return self._handle_login(form, query)
+        if not self._is_authenticated():
+            return self._redirect_to_login()
+
+        state = decode_viewstate(form.get('__VIEWSTATE', ''), form.get('__EVENTVALIDATION', ''),
+                                 self.server.secret)
+        if state is None:
+            return self._send_error(500, "Invalid postback or callback argument")
+
+        if path == SEARCH_PATH:
+            text = form.get('ctl00$cph$ctrlFastFind$tbFind', '').strip()
+            return self._render_search(text, self.server.database.search(text))
+        if path == CARD_PATH:
+            card = self.server.database.get(state.get('card'))
+            if not card:
+                return self._send_error(404, "Карточка не найдена")
+            return self._handle_card_postback(card, state, form)
+        return self._send_error(404, "Страница не найдена")
+
+    # ---- вход ----
+
+    def _handle_login(self, form, query):
+        if (form.get('tbUserName') == self.server.username and
+                form.get('tbPassword') == self.server.password):
+            session_id = secrets.token_hex(12)
+            with self.server.lock:
+                self.server.sessions.add(session_id)
+            target = query.get('ReturnUrl', [SEARCH_PATH])[0]
+            self.send_response(302)
+            self.send_header("Location", target)
+            self.send_header("Set-Cookie", f"ASP.NET_SessionId={session_id}; path=/; HttpOnly")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = '<span id="lblError" class="error">Неверное имя пользователя или пароль</span>' + self._login_body()
+        return self._send_page("Вход в систему", body, {'page': 'login'})
+
+    def _login_body(self):
+        return (
+            '<div class="login">'
+            '<input name="tbUserName" type="text" id="tbUserName" />'
+            '<input name="tbPassword" type="password" id="tbPassword" />'
+            '<input type="submit" name="btnLogin" value="Войти" id="btnLogin" />'
+            '</div>'
+        )
+
+    # ---- поиск ----
+
+    def _render_search(self, text, cards):
+        rows = []
+        for i, card in enumerate(cards):
+            prefix = f"ctl00_cph_rptPers_ctl{i:02d}"
+            rows.append(
+                f'<div class="pers" id="{prefix}_dPers">'
+                f'<span class="fio">{html.escape(card["fio"])}</span>'
+                '<table class="tbl-details">'
+                f'<tr><td>Дата рождения:</td><td>{html.escape(card["birth"])}</td></tr>'
+                f'<tr><td>Проживает:</td><td>{html.escape(card["address"])}</td></tr>'
+                '</table>'
+                f'<a id="{prefix}_lnkCard" title="Переход в просмотр ПКУ" '
+                f'href="CardInfo.aspx?id={card["id"]}">Просмотр</a>'
+                '</div>'
+            )
+        body = (
+            '<div id="ctl00_cph_ctrlFastFind">'
+            '<input name="ctl00$cph$ctrlFastFind$tbFind" type="text" '
+            f'id="ctl00_cph_ctrlFastFind_tbFind" value="{html.escape(text)}" />'
+            '<input type="submit" name="ctl00$cph$ctrlFastFind$btnFind" value="Найти" '
+            'id="ctl00_cph_ctrlFastFind_btnFind" />'
+            '</div>'
+            f'<div id="ctl00_cph_dTabsContainer">{"".join(rows)}</div>'
+        )
+        return self._send_page("Поиск информации", body, {'page': 'search'})
+
+    # ---- карточка ----
+
+    def _handle_card_postback(self, card, state, form):
+        target = form.get('__EVENTTARGET', '')
+        mode = state.get('mode', 'main')
+
+        if target.startswith('ctl00$cph$rptAllTabs$'):
+            state['mode'] = 'addinfo' if target.startswith('ctl00$cph$rptAllTabs$ctl10$') else 'main'
+            state.pop('grid', None)
+        elif target == 'ctl00$cph$lbtnEditAddInfo' and mode == 'addinfo':
+            state['mode'] = 'edit'
+            saved = self.server.database.get_saved(card['id'])
+            state['text'] = saved['add_info'] if saved else ''
+        elif target == 'ctl00$cph$ctrlDopFields$lbtnAdd' and mode == 'edit':
+            state['grid'] = True
+            state['text'] = form.get('ctl00$cph$tbAddInfo', state.get('text', ''))
+        elif 'ctl00$cph$ctrlDopFields$AJSpr1$PopupDiv$ctl06$AJOk' in form and state.get('grid'):
+            state['checked'] = self._posted_checkboxes(form)
+            state['text'] = form.get('ctl00$cph$tbAddInfo', state.get('text', ''))
+            state['values'] = self._posted_grid(card, form)
+        elif target == 'ctl00$cph$lbtnExitSave' and mode == 'edit':
+            record = {
+                'add_info': form.get('ctl00$cph$tbAddInfo', ''),
+                'checked': sorted(set(state.get('checked', [])) | set(self._posted_checkboxes(form))),
+                'fields': self._posted_grid(card, form) if state.get('grid') else {}
+            }
+            self.server.database.save(card['id'], record)
+            state = {'page': 'card', 'card': card['id'], 'mode': 'addinfo'}
+        else:
+            return self._send_error(500, f"Invalid postback or callback argument: {target}")
+
+        return self._render_card(card, state)
+
+    def _posted_checkboxes(self, form):
+        return sorted(int(name[len(POPUP_PREFIX):]) for name in form
+                      if name.startswith(POPUP_PREFIX) and name[len(POPUP_PREFIX):].isdigit())
+
+    def _posted_grid(self, card, form):
+        values = {}
+        for i, (label, kind) in enumerate(grid_layout(card), start=2):
+            name = f"{GRID_PREFIX}ctl{i:02d}${kind}"
+            if name in form:
+                values[label] = form[name]
+        return values
+
+    def _render_card(self, card, state):
+        tabs = []
+        for i, title in enumerate(["Общие сведения", "Члены семьи", "Доходы"] + [""] * 7 + ["Доп. информация"]):
+            if not title:
+                continue
+            tabs.append(
+                f'<td id="ctl00_cph_rptAllTabs_ctl{i:02d}_tdTabL" class="tab" '
+                f'onclick="__doPostBack(\'ctl00$cph$rptAllTabs$ctl{i:02d}$lbtnTab\',\'\')">{title}</td>'
+            )
+        body = (
+            f'<h2 id="ctl00_cph_lblFio">{html.escape(card["fio"])}</h2>'
+            f'<div>Моб. телефон: <span id="ctl00_cph_lblMobilPhone">{html.escape(card["phone"])}</span></div>'
+            f'<div>Адрес регистрации: <span id="ctl00_cph_lblRegAddress">{html.escape(card["address"])}</span></div>'
+            f'<table class="tabs"><tr>{"".join(tabs)}</tr></table>'
+        )
+
+        mode = state.get('mode', 'main')
+        if mode == 'addinfo':
+            saved = self.server.database.get_saved(card['id'])
+            info = saved['add_info'] if saved and saved['add_info'] else "Информация отсутствует"
+            body += (
+                f'<span id="ctl00_cph_lblAddInfo2">{html.escape(info)}</span>'
+                '<a id="ctl00_cph_lbtnEditAddInfo" '
+                'href="javascript:__doPostBack(\'ctl00$cph$lbtnEditAddInfo\',\'\')">Редактировать</a>'
+            )
+        elif mode == 'edit':
+            body += (
+                f'<textarea name="ctl00$cph$tbAddInfo" id="ctl00_cph_tbAddInfo" rows="5">'
+                f'{html.escape(state.get("text", ""))}</textarea>'
+                '<a id="ctl00_cph_ctrlDopFields_lbtnAdd" '
+                'href="javascript:__doPostBack(\'ctl00$cph$ctrlDopFields$lbtnAdd\',\'\')">Добавить</a>'
+            )
+            if state.get('grid'):
+                body += self._grid_html(card, state) + self._popup_html(state.get('checked', []))
+            body += ('<a id="ctl00_cph_lbtnExitSave" '
+                     'href="javascript:__doPostBack(\'ctl00$cph$lbtnExitSave\',\'\')">Сохранить и выйти</a>')
+
+        return self._send_page(f"ПКУ - {card['fio']}", body, state)
+
+    def _grid_html(self, card, state):
+        values = state.get('values', {})
+        rows = ['<tr><th>Поле</th><th>Значение</th></tr>']
+        for i, (label, kind) in enumerate(grid_layout(card), start=2):
+            ctl = f"ctl{i:02d}"
+            name = f"{GRID_PREFIX}{ctl}${kind}"
+            element_id = f"ctl00_cph_ctrlDopFields_gv_{ctl}"
+            value = html.escape(values.get(label, ''))
+            if kind == 'rbl':
+                editor = ''.join(
+                    f'<input id="{element_id}_rbl_{n}" type="radio" name="{name}" value="{v}"'
+                    f'{" checked" if values.get(label) == v else ""} /><label>{text}</label>'
+                    for n, (v, text) in enumerate([("1", "Да"), ("0", "Нет")])
+                )
+            elif kind == 'wdte':
+                editor = f'<input id="igtxt{element_id}_wdte" name="{name}" type="text" value="{value}" />'
+            else:
+                editor = f'<input name="{name}" type="text" id="{element_id}_tb" value="{value}" />'
+            rows.append(f'<tr><td><span id="{element_id}_lbName">{label}</span></td><td>{editor}</td></tr>')
+        return f'<table id="ctl00_cph_ctrlDopFields_gv">{"".join(rows)}</table>'
+
+    def _popup_html(self, checked):
+        boxes = []
+        for n in range(1, CHECKBOX_COUNT + 1):
+            boxes.append(
+                f'<input id="ctl00_cph_ctrlDopFields_AJSpr1_PopupDiv_divContent_AJ_{n}" type="checkbox" '
+                f'name="{POPUP_PREFIX}{n}"{" checked" if n in checked else ""} /><label>Признак {n}</label>'
+            )
+        return (
+            '<div id="ctl00_cph_ctrlDopFields_AJSpr1_PopupDiv">'
+            f'<div id="ctl00_cph_ctrlDopFields_AJSpr1_PopupDiv_divContent">{"".join(boxes)}</div>'
+            '<input type="submit" name="ctl00$cph$ctrlDopFields$AJSpr1$PopupDiv$ctl06$AJOk" value="OK" '
+            'id="ctl00_cph_ctrlDopFields_AJSpr1_PopupDiv_ctl06_AJOk" />'
+            '</div>'
+        )
+
+    # ---- задержка и сбои ----
+
+    def _inject_fault(self):
+        """Задержка ответа и случайный сбой; True если ответ уже отправлен или оборван"""
+        delay, fault = self.server.next_fault()
+        if delay > 0:
+            time.sleep(delay)
+        if fault == 'error':
+            self._send_error(500, "Server Error in '/aspnetkp' Application.")
+            return True
+        if fault == 'drop':
+            # Соединение закрывается без ответа, как при сбросе со стороны IIS
+            self.close_connection = True
+            return True
+        return False
+
+    # ---- вспомогательные методы ----
+
+    def _split_path(self):
+        parts = urlsplit(self.path)
+        return parts.path, parse_qs(parts.query)
+
+    def _read_form(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length).decode('utf-8') if length else ''
+        return {key: values[-1] for key, values in parse_qs(raw, keep_blank_values=True).items()}
+
+    def _get_card(self, query):
+        try:
+            return self.server.database.get(int(query.get('id', ['0'])[0]))
+        except ValueError:
+            return None
+
+    def _session_id(self):
+        cookie = SimpleCookie(self.headers.get('Cookie', ''))
+        morsel = cookie.get('ASP.NET_SessionId')
+        return morsel.value if morsel else None
+
+    def _is_authenticated(self):
+        session_id = self._session_id()
+        with self.server.lock:
+            return session_id in self.server.sessions
+
+    def _redirect_to_login(self):
+        self.send_response(302)
+        self.send_header("Location", f"{LOGIN_PATH}?ReturnUrl={quote(self.path, safe='')}")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _send_page(self, title, body, state):
+        viewstate, validation = encode_viewstate(state, self.server.secret)
+        # Как в WebForms, форма отправляется на тот же адрес вместе с параметрами запроса
+        parts = urlsplit(self.path)
+        action = parts.path.rsplit('/', 1)[-1] + (f"?{parts.query}" if parts.query else "")
+        page = (
+            '<!DOCTYPE html><html><head><meta charset="utf-8" />'
+            f'<title>{html.escape(title)}</title></head><body>'
+            f'<form name="aspnetForm" method="post" action="{html.escape(action)}" id="aspnetForm">'
+            '<input type="hidden" name="__EVENTTARGET" id="__EVENTTARGET" value="" />'
+            '<input type="hidden" name="__EVENTARGUMENT" id="__EVENTARGUMENT" value="" />'
+            f'<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{viewstate}" />'
+            f'<input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="{validation}" />'
+            '<script type="text/javascript">'
+            'function __doPostBack(t, a) { var f = document.forms["aspnetForm"];'
+            ' f.__EVENTTARGET.value = t; f.__EVENTARGUMENT.value = a; f.submit(); }'
+            '</script>'
+            f'{body}</form></body></html>'
+        )
+        self._send(200, page.encode('utf-8'), "text/html; charset=utf-8")
+
+    def _send_json(self, data):
+        self._send(200, json.dumps(data, ensure_ascii=False).encode('utf-8'), "application/json; charset=utf-8")
+
+    def _send_error(self, code, message):
+        page = f'<html><head><meta charset="utf-8" /><title>Ошибка</title></head><body><h1>{html.escape(message)}</h1></body></html>'
+        self._send(code, page.encode('utf-8'), "text/html; charset=utf-8")
+
+    def _send(self, code, payload, content_type):
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class MockSiteServer(ThreadingHTTPServer):
+    """HTTP сервер локальной копии сайта"""
+
+    daemon_threads = True
+
+    def __init__(self, address, database=None, username=DEFAULT_USERNAME, password=DEFAULT_PASSWORD,
+                 verbose=False, latency=0.0, jitter=0.0, failure_rate=0.0, drop_rate=0.0, seed=None):
+        super().__init__(address, MockSiteHandler)
+        self.database = database or MockDatabase()
+        self.username = username
+        self.password = password
+        self.verbose = verbose
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.drop_rate = drop_rate
+        self.random = random.Random(seed)
+        self.stats = {'requests': 0, 'errors': 0, 'drops': 0}
+        self.secret = secrets.token_hex(8)
+        self.sessions = set()
+        self.lock = threading.Lock()
+
+    def next_fault(self):
+        """Задержка очередного ответа и вид сбоя ('error', 'drop' или None)"""
+        with self.lock:
+            self.stats['requests'] += 1
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter > 0 else 0.0)
+            roll = self.random.random()
+            if roll < self.failure_rate:
+                self.stats['errors'] += 1
+                return delay, 'error'
+            if roll < self.failure_rate + self.drop_rate:
+                self.stats['drops'] += 1
+                return delay, 'drop'
+            return delay, None
+
+    def get_stats(self):
+        """Счетчики запросов и внесенных сбоев"""
+        with self.lock:
+            return dict(self.stats)
+
+    @property
+    def base_url(self):
+        """Адрес приложения для AutoFormFillerMass (аналог http://localhost:8080/aspnetkp)"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{APP_PREFIX}"
+
+
+def start_mock_site(database=None, host="127.0.0.1", port=0, verbose=False, **faults):
+    """Запуск сервера в фоновом потоке (port=0 - любой свободный порт)
+
+    faults - latency, jitter, failure_rate, drop_rate, seed (см. MockSiteServer)
+    """
+    server = MockSiteServer((host, port), database=database, verbose=verbose, **faults)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main(argv=None):
+    """Точка входа командной строки: python -m mass_processor mock"""
+    parser = argparse.ArgumentParser(
+        prog="python -m mass_processor mock",
+        description="Локальная копия страниц FindInfo/CardInfo для проверки массового обработчика"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--families", help="JSON файл с семьями, для которых создаются карточки")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="создать карточки для N синтетических семей (см. generate_families)")
+    parser.add_argument("--seed", type=int, default=0, help="начальное значение генератора случайных чисел")
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка каждого ответа, сек")
+    parser.add_argument("--jitter", type=float, default=0.0, help="случайная добавка к задержке, 0..N сек")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="доля ответов с ошибкой 500 (0..1)")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="доля оборванных соединений (0..1)")
+    parser.add_argument("--verbose", action="store_true", help="выводить каждый запрос")
+    args = parser.parse_args(argv)
+
+    if not 0 <= args.failure_rate + args.drop_rate <= 1:
+        parser.error("сумма --failure-rate и --drop-rate должна быть от 0 до 1")
+
+    database = MockDatabase()
+    if args.families:
+        with open(args.families, 'r', encoding='utf-8') as file:
+            database.load_families(json.load(file))
+    if args.synthetic:
+        database.load_families(generate_families(args.synthetic, args.seed))
+
+    server = MockSiteServer((args.host, args.port), database=database, verbose=args.verbose,
+                            latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate,
+                            drop_rate=args.drop_rate, seed=args.seed)
+    print(f"🌐 Локальная копия сайта: {server.base_url}/Common/FindInfo.aspx "
+          f"(карточек: {len(database.cards)})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
@@ -0,0 +1,234 @@
+"""Повторы обработки семей по классу ошибки
+
+Вместо фиксированных двух попыток с перезапуском браузера и отдельного прохода
+по семьям с ошибками каждая неудача классифицируется, и для класса выбирается
+политика: повторить сразу, перезапустить браузер, повторить с нарастающей
+паузой или не повторять вовсе. Повтор встает в общую очередь через несколько
+новых семей, поэтому повторы чередуются с новой работой, а постоянные ошибки
+(семья не найдена, неверные данные) не стоят ни попыток, ни перезапуска браузера.
+"""
+
+import heapq
+import itertools
+import random
+import threading
+import time
+from collections import Counter, deque
+
+# Классы ошибок
+STALE = 'stale'
+DRIVER = 'driver'
+SERVER = 'server'
+NOT_FOUND = 'not_found'
+VALIDATION = 'validation'
+UNKNOWN = 'unknown'
+
+FAILURE_LABELS = {
+    STALE: "устаревший элемент или тайм-аут",
+    DRIVER: "сбой браузера",
+    SERVER: "ошибка сервера",
+    NOT_FOUND: "семья или карточка не найдена",
+    VALIDATION: "ошибка данных",
+    UNKNOWN: "неизвестная ошибка",
+}
+
+# Политика по классу: action - что делать перед повтором, attempts - всего попыток,
+# delay - пауза перед повтором, сек (для backoff удваивается с каждой попыткой)
+#   inplace - сразу, тем же браузером; requeue - через несколько новых семей;
+#   recycle - через несколько новых семей, браузер перезапускается;
+#   backoff - не раньше чем через delay; none - без повтора
+RETRY_POLICIES = {
+    STALE: {'action': 'inplace', 'attempts': 3, 'delay': 0.0},
+    DRIVER: {'action': 'recycle', 'attempts': 3, 'delay': 0.0},
+    SERVER: {'action': 'backoff', 'attempts': 4, 'delay': 2.0},
+    NOT_FOUND: {'action': 'none', 'attempts': 1, 'delay': 0.0},
+    VALIDATION: {'action': 'none', 'attempts': 1, 'delay': 0.0},
+    UNKNOWN: {'action': 'requeue', 'attempts': 2, 'delay': 0.0},
+}
+
+# Верхняя граница паузы backoff, сек
+MAX_BACKOFF = 60.0
+
+STALE_ERRORS = ('StaleElementReferenceException', 'TimeoutException', 'ElementClickInterceptedException',
+                'ElementNotInteractableException', 'NoSuchElementException', 'MoveTargetOutOfBoundsException')
+DRIVER_ERRORS = ('InvalidSessionIdException', 'NoSuchWindowException', 'SessionNotCreatedException')
+DRIVER_MESSAGES = ('invalid session id', 'session deleted', 'chrome not reachable', 'not connected to devtools',
+                   'target window already closed', 'no such window', 'http сессия закрыта',
+                   'max retries exceeded with url: /session')
+SERVER_ERRORS = ('ConnectionError', 'ConnectTimeout', 'ReadTimeout', 'Timeout', 'ChunkedEncodingError',
+                 'RemoteDisconnected', 'ConnectionResetError', 'ConnectionAbortedError', 'IncompleteRead')
+VALIDATION_ERRORS = ('ValueError', 'KeyError', 'TypeError')
+
+
+def classify_exception(error):
+    """Класс ошибки по исключению (без импорта selenium и requests - по именам классов)"""
+    names = {cls.__name__ for cls in type(error).__mro__}
+    message = str(error).lower()
+
+    if names & set(DRIVER_ERRORS):
+        return DRIVER
+
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    if status is not None:
+        return SERVER if status >= 500 else UNKNOWN
+    if names & set(SERVER_ERRORS):
+        return SERVER
+
+    if any(text in message for text in DRIVER_MESSAGES):
+        return DRIVER
+    if names & set(STALE_ERRORS):
+        return STALE
+    if 'WebDriverException' in names:
+        # Прочие ошибки WebDriver обычно означают, что браузер в плохом состоянии
+        return DRIVER
+    if names & set(VALIDATION_ERRORS):
+        return VALIDATION
+    return UNKNOWN
+
+
+def classify_failure(filler):
+    """Класс неудачной попытки обработки семьи исполнителем"""
+    if filler is None:
+        return DRIVER
+    if getattr(filler, 'failure_kind', None):
+        return filler.failure_kind
+    error = getattr(filler, 'last_error', None)
+    if error is not None:
+        return classify_exception(error)
+    try:
+        _ = filler.driver.current_url
+    except Exception:
+        return DRIVER
+    return UNKNOWN
+
+
+class RetryScheduler:
+    """Очередь семей с повторами по политикам классов ошибок, общая для всех браузеров
+
+    Задача - (индекс, семья, номер попытки). Исполнитель берет задачу через get(),
+    а результат сообщает через complete() или report(); пока есть задачи в работе,
+    get() ждет: они еще могут вернуться в очередь повтором.
+    """
+
+    # Через сколько новых семей встает повтор
+    RETRY_GAP = 2
+
+    def __init__(self, policies=None):
+        self.policies = policies or RETRY_POLICIES
+        self.condition = threading.Condition()
+        self.ready = deque()
+        self.delayed = []
+        self.sequence = itertools.count()
+        self.in_flight = 0
+        self.failures = Counter()
+        self.retries = Counter()
+
+    def add(self, index, family):
+        """Новая семья в конец очереди"""
+        with self.condition:
+            self.ready.append((index, family, 1))
+            self.condition.notify()
+
+    def get(self, should_continue=None, poll=0.5):
+        """Следующая задача или None, если очередь пуста и повторов больше не будет"""
+        with self.condition:
+            while True:
+                if should_continue is not None and not should_continue():
+                    return None
+                self._promote_delayed()
+                if self.ready:
+                    self.in_flight += 1
+                    return self.ready.popleft()
+                if not self.delayed and self.in_flight == 0:
+                    return None
+                timeout = poll
+                if self.delayed:
+                    timeout = min(poll, max(0.0, self.delayed[0][0] - time.monotonic()))
+                self.condition.wait(timeout)
+
+    def complete(self, task):
+        """Задача завершена (успешно, отложена или окончательно с ошибкой)"""
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def release(self, task):
+        """Задача не начата (например, не удалось запустить браузер) - обратно в начало очереди"""
+        with self.condition:
+            self.in_flight -= 1
+            self.ready.appendleft(task)
+            self.condition.notify_all()
+
+    def report(self, task, failure):
+        """Неудачная попытка: решение о повторе; повтор сразу ставится в очередь
+
+        Возвращает словарь: retry, action, attempt (номер следующей попытки),
+        delay, recycle (перезапустить браузер этого исполнителя), label.
+        """
+        index, family, attempt = task
+        policy = self.policies.get(failure, self.policies[UNKNOWN])
+        action = policy['action']
+        retry = action != 'none' and attempt < policy['attempts']
+        delay = 0.0
+        if retry and action == 'backoff':
+            delay = min(MAX_BACKOFF, policy['delay'] * 2 ** (attempt - 1))
+            delay += random.uniform(0, delay / 4)
+
+        with self.condition:
+            self.in_flight -= 1
+            self.failures[failure] += 1
+            if retry:
+                self.retries[failure] += 1
+                next_task = (index, family, attempt + 1)
+                if action == 'inplace':
+                    self.ready.appendleft(next_task)
+                elif action == 'backoff':
+                    heapq.heappush(self.delayed, (time.monotonic() + delay, next(self.sequence), next_task))
+                else:
+                    self.ready.insert(min(self.RETRY_GAP, len(self.ready)), next_task)
+            self.condition.notify_all()
+
+        return {
+            'retry': retry,
+            'action': action,
+            'attempt': attempt + 1,
+            'delay': round(delay, 1),
+            'recycle': action == 'recycle',
+            'label': FAILURE_LABELS.get(failure, failure),
+        }
+
+    def cancel_pending(self):
+        """Удаление из очереди еще не начатых семей и повторов"""
+        with self.condition:
+            self.ready.clear()
+            self.delayed = []
+            self.condition.notify_all()
+
+    def drain(self):
+        """Все не начатые задачи и ожидающие повторы (очередь очищается)"""
+        with self.condition:
+            tasks = list(self.ready) + [task for _, _, task in sorted(self.delayed)]
+            self.ready.clear()
+            self.delayed = []
+            self.condition.notify_all()
+        return tasks
+
+    def report_lines(self):
+        """Строки итогов по классам ошибок"""
+        if not self.failures:
+            return []
+        lines = ["🧮 Неудачные попытки по классам ошибок:"]
+        for failure, count in self.failures.most_common():
+            lines.append(f"   {FAILURE_LABELS.get(failure, failure)}: {count} (повторов: {self.retries[failure]})")
+        return lines
+
+    def __len__(self):
+        return len(self.ready) + len(self.delayed)
+
+    def _promote_delayed(self):
+        """Повторы, пауза которых истекла, - в начало очереди"""
+        now = time.monotonic()
+        while self.delayed and self.delayed[0][0] <= now:
+            _, _, task = heapq.heappop(self.delayed)
+            self.ready.appendleft(task)
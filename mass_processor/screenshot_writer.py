@@ -0,0 +1,105 @@
+"""Запись скриншотов в фоновых потоках
+
+Исполнитель только снимает PNG (через CDP - лишь область формы) и сразу
+переходит к следующей семье, а перекодирование в выбранный формат, уменьшение
+и запись файла выполняются в пуле потоков. JPEG и WebP занимают на диске в
+несколько раз меньше PNG, а уменьшенные до max_width снимки autoprint.py
+открывает и компонует на странице быстрее.
+"""
+
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Область скриншота - форма страницы ASP.NET (без полей окна); координаты для CDP clip
+SCREENSHOT_REGION_ID = "aspnetForm"
+SCREENSHOT_REGION_SCRIPT = """
+var element = document.getElementById(arguments[0]) || document.forms[0] || document.body;
+var rect = element.getBoundingClientRect();
+return {x: rect.left + window.scrollX, y: rect.top + window.scrollY,
+        width: Math.ceil(rect.width), height: Math.ceil(rect.height)};
+"""
+
+# Форматы: расширение файла и имя формата Pillow
+SCREENSHOT_FORMATS = {
+    'png': ('.png', 'PNG'),
+    'jpeg': ('.jpg', 'JPEG'),
+    'webp': ('.webp', 'WEBP'),
+}
+
+
+class ScreenshotWriter:
+    """Пул записи скриншотов, общий для всех браузеров запуска"""
+
+    def __init__(self, fmt="jpeg", quality=85, max_width=0, workers=2, log=print):
+        self.fmt = fmt if fmt in SCREENSHOT_FORMATS else "png"
+        self.quality = max(1, min(100, int(quality or 85)))
+        self.max_width = max(0, int(max_width or 0))
+        self.log = log
+        self.executor = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix="screenshot")
+        self.lock = threading.Lock()
+        self.written = 0
+        self.failed = 0
+        self.bytes_written = 0
+
+        if Image is None and (self.fmt != "png" or self.max_width):
+            self.log("⚠️ Pillow не установлен: скриншоты сохраняются в PNG без уменьшения")
+            self.fmt, self.max_width = "png", 0
+
+    def path_for(self, base_path):
+        """Имя файла скриншота с расширением выбранного формата"""
+        return base_path + SCREENSHOT_FORMATS[self.fmt][0]
+
+    def submit(self, png_bytes, base_path):
+        """Постановка снимка в очередь записи; возвращает имя будущего файла"""
+        path = self.path_for(base_path)
+        self.executor.submit(self._write, png_bytes, path)
+        return path
+
+    def close(self):
+        """Ожидание записи оставшихся снимков и итог в журнал"""
+        self.executor.shutdown(wait=True)
+        if self.written or self.failed:
+            self.log(f"📸 Скриншотов записано: {self.written} ({self.bytes_written / 1024 / 1024:.1f} МБ, "
+                     f"{self.fmt})" + (f", ошибок: {self.failed}" if self.failed else ""))
+
+    def _write(self, png_bytes, path):
+        try:
+            data = self._encode(png_bytes)
+            temp_path = path + ".tmp"
+            with open(temp_path, 'wb') as file:
+                file.write(data)
+            os.replace(temp_path, path)
+            with self.lock:
+                self.written += 1
+                self.bytes_written += len(data)
+            self.log(f"📸 Скриншот сохранен: {path}")
+        except Exception as e:
+            with self.lock:
+                self.failed += 1
+            self.log(f"⚠️ Ошибка записи скриншота {path}: {e}")
+
+    def _encode(self, png_bytes):
+        """Уменьшение до max_width и перекодирование в выбранный формат"""
+        if self.fmt == "png" and not self.max_width:
+            return png_bytes
+
+        image = Image.open(io.BytesIO(png_bytes))
+        if self.max_width and image.width > self.max_width:
+            height = round(image.height * self.max_width / image.width)
+            image = image.resize((self.max_width, height), Image.Resampling.LANCZOS)
+
+        output = io.BytesIO()
+        if self.fmt == "png":
+            image.save(output, 'PNG', optimize=True)
+        else:
+            if image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            image.save(output, SCREENSHOT_FORMATS[self.fmt][1], quality=self.quality)
+        return output.getvalue()
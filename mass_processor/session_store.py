@@ -0,0 +1,93 @@
+"""Cookie сессии после входа для новых и параллельных браузеров
+
+После первого входа cookie сессии ASP.NET сохраняются и подставляются в каждый
+следующий браузер (перезапуск, запасной браузер, браузеры пула) до открытия
+страницы поиска. Полный вход через форму выполняется, только если сервер
+отклонил подставленную сессию.
+"""
+
+import json
+import os
+import threading
+import time
+
+
+class SessionStore:
+    """Cookie сессий по адресу приложения и пользователю, общие для всех браузеров
+
+    Записывается в JSON файл сразу после каждого изменения (если задан path).
+    """
+
+    # Сессии старше этого срока не подставляются, сразу выполняется вход, сек
+    MAX_AGE = 8 * 3600
+
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+        # Первый вход через форму выполняет один браузер, остальные ждут его сессию
+        self.login_lock = threading.Lock()
+        self.entries = {}
+        self.load()
+
+    @staticmethod
+    def make_key(base_url, username):
+        """Ключ записи: адрес приложения и имя пользователя"""
+        return f"{(base_url or '').rstrip('/').lower()}|{username or ''}"
+
+    def load(self):
+        """Загрузка сохраненных сессий из файла"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            if isinstance(data, dict):
+                self.entries = data
+        except Exception as e:
+            print(f"⚠️ Ошибка загрузки сохраненной сессии: {e}")
+
+    def get(self, base_url, username):
+        """Cookie сохраненной сессии или None, если ее нет или она устарела"""
+        with self.lock:
+            entry = self.entries.get(self.make_key(base_url, username))
+        if not entry or time.time() - entry.get('saved_at', 0) > self.MAX_AGE:
+            return None
+        return entry.get('cookies') or None
+
+    def put(self, base_url, username, cookies):
+        """Запоминание cookie после успешного входа"""
+        if not cookies:
+            return
+        with self.lock:
+            self.entries[self.make_key(base_url, username)] = {'cookies': cookies, 'saved_at': time.time()}
+            self._save()
+
+    def evict(self, base_url, username, cookies=None):
+        """Удаление отклоненной сервером сессии
+
+        Если передан cookies, запись удаляется, только если другой браузер еще не
+        сохранил новую сессию.
+        """
+        key = self.make_key(base_url, username)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or (cookies is not None and entry.get('cookies') != cookies):
+                return
+            del self.entries[key]
+            self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(self.entries, file, ensure_ascii=False, indent=2)
+            # В файле действующие cookie входа - доступ только владельцу
+            try:
+                os.chmod(temp_path, 0o600)
+            except OSError:
+                pass
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            print(f"⚠️ Ошибка сохранения сессии: {e}")
@@ -0,0 +1,140 @@
+"""Замеры времени фаз обработки семьи
+
+Исполнитель (AutoFormFillerMass) размечает фазы process_family: поиск, выбор
+карточки, телефон и адрес, проверка доп. информации, переход к форме,
+заполнение, проверка, сохранение, скриншот. TimingRecorder собирает записи всех
+браузеров запуска, пишет их построчно в JSONL и считает итоговую сводку.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from mass_processor.waits import percentile
+
+# Порядок фаз в отчете
+PHASES = [
+    "поиск",
+    "карточка",
+    "телефон и адрес",
+    "проверка доп. информации",
+    "переход к форме",
+    "заполнение",
+    "проверка",
+    "сохранение",
+    "скриншот",
+    "возврат к поиску",
+]
+
+
+class PhaseTimer:
+    """Время фаз одной семьи"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        """Замер фазы: with timer.phase("поиск"): ..."""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.monotonic() - started
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+
+class TimingRecorder:
+    """Трасса и сводка времени фаз для всего запуска (общая для всех браузеров)"""
+
+    def __init__(self, trace_path=None):
+        self.trace_path = trace_path
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.records = []
+        self.trace_file = None
+
+        if trace_path:
+            try:
+                self.trace_file = open(trace_path, 'a', encoding='utf-8')
+            except Exception as e:
+                print(f"⚠️ Не удалось открыть файл трассировки {trace_path}: {e}")
+
+    def record_family(self, family_number, mother_fio, success, timer, worker=None, waits=None):
+        """Запись о попытке обработки семьи"""
+        record = {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'family': family_number,
+            'mother_fio': mother_fio,
+            'worker': worker,
+            'success': bool(success),
+            'total': round(timer.elapsed(), 3),
+            'phases': {name: round(seconds, 3) for name, seconds in timer.phases.items()},
+        }
+        if waits:
+            record['waits'] = {step: round(seconds, 3) for step, seconds in waits.items()}
+
+        with self.lock:
+            self.records.append(record)
+            if self.trace_file:
+                self.trace_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self.trace_file.flush()
+        return record
+
+    def summary(self):
+        """Сводка: p50/p95/max по фазам и семьям, семей в минуту"""
+        with self.lock:
+            records = list(self.records)
+        duration = time.monotonic() - self.started
+        success = sum(1 for record in records if record['success'])
+
+        phase_values = {}
+        for record in records:
+            for name, seconds in record['phases'].items():
+                phase_values.setdefault(name, []).append(seconds)
+        ordered = [name for name in PHASES if name in phase_values]
+        ordered += sorted(name for name in phase_values if name not in PHASES)
+
+        def describe(values):
+            return {
+                'count': len(values),
+                'p50': round(percentile(values, 50), 3),
+                'p95': round(percentile(values, 95), 3),
+                'max': round(max(values), 3),
+            }
+
+        return {
+            'attempts': len(records),
+            'success': success,
+            'duration': round(duration, 1),
+            'families_per_minute': round(success / (duration / 60), 2) if duration > 0 else 0.0,
+            'family': describe([record['total'] for record in records]) if records else None,
+            'phases': {name: describe(phase_values[name]) for name in ordered},
+        }
+
+    def report_lines(self):
+        """Строки итогового отчета для лога"""
+        summary = self.summary()
+        if not summary['attempts']:
+            return []
+        lines = [f"⏱️ Время по фазам (попыток: {summary['attempts']}, "
+                 f"{summary['families_per_minute']} семей/мин):"]
+        family = summary['family']
+        lines.append(f"   Семья целиком: p50 {family['p50']:.2f} | p95 {family['p95']:.2f} | max {family['max']:.2f} сек")
+        for name, stats in summary['phases'].items():
+            lines.append(f"   {name}: p50 {stats['p50']:.2f} | p95 {stats['p95']:.2f} | max {stats['max']:.2f} сек")
+        if self.trace_path:
+            lines.append(f"   Трассировка: {self.trace_path}")
+        return lines
+
+    def close(self):
+        """Закрытие файла трассировки"""
+        with self.lock:
+            if self.trace_file:
+                self.trace_file.close()
+                self.trace_file = None
@@ -0,0 +1,160 @@
+"""Очередь обновлений интерфейса между потоками обработки и Tk
+
+Tk можно трогать только из главного потока, а цикл обработки и браузеры пула
+работают в фоновых. Они не обращаются к виджетам напрямую, а кладут строки лога,
+статус, прогресс и вызовы в UiUpdateBus. Главный поток раз в interval_ms забирает
+все накопленное: строки лога вставляются одним блоком, из статуса и прогресса
+применяется только последнее значение, одинаковые перерисовки выполняются один раз.
+"""
+
+import threading
+from collections import OrderedDict, deque
+
+
+class UiUpdateBus:
+    """Пакетная передача обновлений интерфейса в главный поток по таймеру after()"""
+
+    def __init__(self, app, on_log=None, on_status=None, on_progress=None, interval_ms=100):
+        self.app = app
+        self.on_log = on_log
+        self.on_status = on_status
+        self.on_progress = on_progress
+        self.interval_ms = interval_ms
+        self.ui_thread = threading.current_thread()
+        self.lock = threading.Lock()
+        self.log_lines = []
+        self.calls = deque()
+        self.refreshes = OrderedDict()
+        self.status = None
+        self.progress = None
+        self.timer_id = None
+        self.running = False
+        self.draining = False
+
+    def in_ui_thread(self):
+        """Вызов из главного потока Tk"""
+        return threading.current_thread() is self.ui_thread
+
+    def log(self, line):
+        """Строка лога (с переводом строки)"""
+        with self.lock:
+            self.log_lines.append(line)
+
+    def set_status(self, text):
+        """Текст статуса; промежуточные значения между тиками отбрасываются"""
+        with self.lock:
+            self.status = text
+
+    def set_progress(self, value):
+        """Значение прогресса 0..1; применяется последнее"""
+        with self.lock:
+            self.progress = value
+
+    def refresh(self, key, func):
+        """Перерисовка, которая за один тик выполняется не больше одного раза"""
+        with self.lock:
+            self.refreshes[key] = func
+
+    def call(self, func, *args, **kwargs):
+        """Произвольный вызов в главном потоке (в порядке поступления)"""
+        with self.lock:
+            self.calls.append((func, args, kwargs))
+
+    def invoke(self, func, *args, **kwargs):
+        """Вызов в главном потоке с ожиданием результата (модальные диалоги из потоков обработки)
+
+        Из главного потока func вызывается сразу. Из фонового - ставится в очередь,
+        поток ждет результата; исключение func передается вызывающему. Если окно
+        закрыто и очередь больше не разбирается, выбрасывается RuntimeError.
+        """
+        if self.in_ui_thread():
+            return func(*args, **kwargs)
+        if not self.running:
+            raise RuntimeError("Интерфейс не запущен")
+
+        done = threading.Event()
+        result = {}
+
+        def run():
+            try:
+                result['value'] = func(*args, **kwargs)
+            except Exception as e:
+                result['error'] = e
+            finally:
+                done.set()
+
+        self.call(run)
+        while not done.wait(0.5):
+            if not self.running:
+                raise RuntimeError("Интерфейс остановлен до ответа оператора")
+        if 'error' in result:
+            raise result['error']
+        return result.get('value')
+
+    def start(self):
+        """Запуск таймера разбора очереди"""
+        self.running = True
+        self._schedule()
+
+    def stop(self):
+        """Остановка таймера (при закрытии окна)"""
+        self.running = False
+        if self.timer_id is not None:
+            try:
+                self.app.after_cancel(self.timer_id)
+            except Exception:
+                pass
+            self.timer_id = None
+
+    def drain(self):
+        """Применение всего накопленного (только из главного потока)
+
+        Если вызов из очереди открыл модальный диалог, вложенные тики применяют
+        только лог, статус и прогресс, остальные вызовы ждут закрытия диалога.
+        """
+        nested = self.draining
+        with self.lock:
+            log_lines, self.log_lines = self.log_lines, []
+            status, self.status = self.status, None
+            progress, self.progress = self.progress, None
+            calls, refreshes = deque(), OrderedDict()
+            if not nested:
+                calls, self.calls = self.calls, deque()
+                refreshes, self.refreshes = self.refreshes, OrderedDict()
+
+        self.draining = True
+        try:
+            if log_lines and self.on_log:
+                self._safe(self.on_log, "".join(log_lines))
+            for func, args, kwargs in calls:
+                self._safe(func, *args, **kwargs)
+            for func in refreshes.values():
+                self._safe(func)
+            if status is not None and self.on_status:
+                self._safe(self.on_status, status)
+            if progress is not None and self.on_progress:
+                self._safe(self.on_progress, progress)
+        finally:
+            self.draining = nested
+
+    def _tick(self):
+        self.timer_id = None
+        if not self.running:
+            return
+        # Следующий тик планируется заранее, чтобы лог шел и при открытом диалоге
+        self._schedule()
+        self.drain()
+
+    def _schedule(self):
+        try:
+            self.timer_id = self.app.after(self.interval_ms, self._tick)
+        except Exception:
+            # Окно уже уничтожено
+            self.running = False
+            self.timer_id = None
+
+    def _safe(self, func, *args, **kwargs):
+        try:
+            func(*args, **kwargs)
+        except Exception as e:
+            print(f"⚠️ Ошибка обновления интерфейса: {e}")
@@ -0,0 +1,139 @@
+"""Адаптивные ожидания для AutoFormFillerMass
+
+Вместо фиксированных пауз (time.sleep) и одинаковых 10-секундных WebDriverWait
+ожидание идет по признакам готовности страницы: document.readyState и отсутствие
+незавершенного асинхронного постбэка ASP.NET (Sys.WebForms.PageRequestManager).
+Таймаут и частота опроса каждого шага подбираются по времени, которое этот шаг
+занимал ранее в текущем запуске; после таймаута таймаут шага удваивается, пока
+шаг снова не выполнится успешно (сервер стал медленнее).
+"""
+
+import math
+import time
+from collections import deque
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+# Страница загружена и не ждет ответа на асинхронный постбэк
+PAGE_IDLE_SCRIPT = """
+if (document.readyState !== 'complete') {
+    return false;
+}
+try {
+    if (window.Sys && Sys.WebForms && Sys.WebForms.PageRequestManager) {
+        var manager = Sys.WebForms.PageRequestManager.getInstance();
+        if (manager && manager.get_isInAsyncPostBack()) {
+            return false;
+        }
+    }
+} catch (e) {}
+if (window.jQuery && window.jQuery.active > 0) {
+    return false;
+}
+return true;
+"""
+
+
+def percentile(values, percent):
+    """Процентиль (0..100) списка чисел, None для пустого списка"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class AdaptiveWaiter:
+    """Ожидания с таймаутами по статистике шагов текущего запуска"""
+
+    # Сколько последних замеров шага учитывать
+    HISTORY = 200
+    # До скольких замеров используются значения по умолчанию
+    MIN_SAMPLES = 5
+
+    def __init__(self, driver, default_timeout=10, min_timeout=10, max_timeout=30):
+        self.driver = driver
+        self.default_timeout = default_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.samples = {}
+        self.family_waits = {}
+        # Множитель таймаута шага после таймаутов подряд
+        self.boost = {}
+
+    def timeout_for(self, step):
+        """Таймаут шага: с запасом от 95-го процентиля, в пределах min..max"""
+        samples = self.samples.get(step)
+        if not samples or len(samples) < self.MIN_SAMPLES:
+            timeout = self.default_timeout
+        else:
+            timeout = max(percentile(samples, 95) * 4 + 1, self.min_timeout)
+        return min(timeout * self.boost.get(step, 1), self.max_timeout)
+
+    def poll_for(self, step):
+        """Частота опроса: быстрые шаги опрашиваются чаще"""
+        samples = self.samples.get(step)
+        if not samples or len(samples) < self.MIN_SAMPLES:
+            return 0.1
+        return min(max(percentile(samples, 50) / 5, 0.02), 0.25)
+
+    def until(self, step, condition, timeout=None):
+        """WebDriverWait.until с учетом времени шага (TimeoutException при таймауте)"""
+        started = time.monotonic()
+        success = timed_out = False
+        try:
+            result = WebDriverWait(
+                self.driver, timeout or self.timeout_for(step), poll_frequency=self.poll_for(step)
+            ).until(condition)
+            success = True
+            return result
+        except TimeoutException:
+            timed_out = True
+            raise
+        finally:
+            self._record(step, time.monotonic() - started, success, timed_out)
+
+    def page_idle(self, step, timeout=None):
+        """Ожидание загрузки страницы и завершения постбэков; False при таймауте"""
+        try:
+            return self.until(step, lambda driver: driver.execute_script(PAGE_IDLE_SCRIPT), timeout)
+        except Exception:
+            return False
+
+    def start_family(self):
+        """Сброс счетчиков ожидания перед новой семьей"""
+        self.family_waits = {}
+
+    def family_total(self):
+        """Сколько секунд текущая семья провела в ожиданиях"""
+        return sum(self.family_waits.values())
+
+    def family_report(self):
+        """Строка с временем ожидания по шагам для текущей семьи"""
+        steps = sorted(self.family_waits.items(), key=lambda item: item[1], reverse=True)
+        details = ", ".join(f"{step} {seconds:.2f}" for step, seconds in steps if seconds >= 0.01)
+        return f"{self.family_total():.2f} сек" + (f" ({details})" if details else "")
+
+    def stats(self):
+        """Статистика шагов запуска: количество, p50, p95 и текущий таймаут"""
+        return {
+            step: {
+                'count': len(samples),
+                'p50': round(percentile(samples, 50), 3),
+                'p95': round(percentile(samples, 95), 3),
+                'timeout': round(self.timeout_for(step), 1)
+            }
+            for step, samples in self.samples.items() if samples
+        }
+
+    def _record(self, step, elapsed, success, timed_out=False):
+        self.family_waits[step] = self.family_waits.get(step, 0.0) + elapsed
+        # Неудачи не попадают в замеры, иначе одна зависшая страница раздует таймаут шага;
+        # таймаут удваивает таймаут шага до следующего успешного ожидания, другие ошибки
+        # (устаревший элемент, ошибка JS, потерянный драйвер) таймаут не меняют
+        if success:
+            self.samples.setdefault(step, deque(maxlen=self.HISTORY)).append(elapsed)
+            self.boost.pop(step, None)
+        elif timed_out:
+            self.boost[step] = self.boost.get(step, 1) * 2
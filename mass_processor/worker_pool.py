@@ -0,0 +1,225 @@
+"""Пул параллельных браузеров для массовой обработки семей"""
+
+import threading
+import time
+import traceback
+
+from mass_processor.driver_manager import DriverManager
+from mass_processor.retry_policy import RetryScheduler, classify_failure
+
+
+class FamilyWorkerPool:
+    """Пул независимых экземпляров AutoFormFillerMass с общей очередью семей
+
+    Каждый исполнитель получает собственную сессию Chrome и собственный вход
+    в систему, а затем забирает семьи из общей очереди, пока она не опустеет.
+    Браузерами исполнителя управляет DriverManager: запасной браузер, проверка
+    перед каждой семьей и плановый перезапуск. Неудачные попытки возвращаются
+    в общую очередь по политике класса ошибки (RetryScheduler).
+    Результаты передаются обратно через обработчики on_family_started,
+    on_family_finished и on_family_deferred (семья отложена для оператора),
+    которые вызываются из потоков исполнителей. Если браузер не запускается
+    и после ACQUIRE_ATTEMPTS попыток, исполнитель завершается; последний
+    завершившийся исполнитель сообщает об оставшихся семьях как о неудачных.
+    """
+
+    # Сколько раз исполнитель пытается запустить браузер, прежде чем завершиться
+    ACQUIRE_ATTEMPTS = 3
+    # Пауза между попытками запуска браузера, сек
+    ACQUIRE_DELAY = 5
+
+    def __init__(self, host, filler_factory, workers=2, screenshot_dir=None,
+                 pause=0.0, retry_policies=None, keep_spare=True, recycle_after=150,
+                 memory_limit_mb=1500):
+        self.host = host
+        self.filler_factory = filler_factory
+        self.workers_count = max(1, int(workers))
+        self.screenshot_dir = screenshot_dir
+        self.pause = max(0.0, float(pause or 0))
+        self.keep_spare = keep_spare
+        self.recycle_after = recycle_after
+        self.memory_limit_mb = memory_limit_mb
+
+        self.scheduler = RetryScheduler(retry_policies)
+        # Исполнители, которым перед следующей семьей нужен новый браузер
+        self.recycle_next = {}
+        self.lock = threading.Lock()
+        # Общая блокировка диалогов: оператору одновременно задается только один вопрос
+        self.interaction_lock = threading.RLock()
+        self.managers = []
+        self.threads = []
+        self.workers_alive = 0
+        self.should_stop = False
+
+        self.on_family_started = None
+        self.on_family_finished = None
+        self.on_family_deferred = None
+
+    def log(self, message):
+        """Логирование через основное приложение"""
+        self.host.log_message(message)
+
+    def is_running(self):
+        """Проверка, продолжается ли обработка"""
+        return not self.should_stop and getattr(self.host, 'is_processing', True)
+
+    def run(self, tasks):
+        """Обработка списка задач [(индекс, семья), ...] и ожидание завершения"""
+        for index, family in tasks:
+            self.scheduler.add(index, family)
+
+        workers_count = min(self.workers_count, max(1, len(tasks)))
+        self.log(f"🧵 Запуск {workers_count} параллельных браузеров для {len(tasks)} семей")
+        self.workers_alive = workers_count
+
+        for worker_id in range(1, workers_count + 1):
+            thread = threading.Thread(target=self._worker_loop, args=(worker_id,), daemon=True)
+            self.threads.append(thread)
+            thread.start()
+
+        for thread in self.threads:
+            thread.join()
+
+        self.threads = []
+        self.log("🧵 Все параллельные браузеры завершили работу")
+
+    def stop(self):
+        """Остановка всех исполнителей"""
+        self.should_stop = True
+        self.cancel_pending()
+        with self.lock:
+            managers = list(self.managers)
+        for manager in managers:
+            manager.stop()
+
+    def cancel_pending(self):
+        """Удаление из очереди еще не начатых семей"""
+        self.scheduler.cancel_pending()
+
+    def _create_manager(self, worker_id):
+        """Менеджер браузеров исполнителя с собственным драйвером и входом в систему"""
+        def create_filler():
+            filler = self.filler_factory()
+            filler.worker_id = worker_id
+            filler.interaction_lock = self.interaction_lock
+            filler.screenshot_dir = self.screenshot_dir
+            return filler
+
+        manager = DriverManager(create_filler, self.log, worker_id=worker_id, keep_spare=self.keep_spare,
+                                recycle_after=self.recycle_after, memory_limit_mb=self.memory_limit_mb)
+        with self.lock:
+            self.managers.append(manager)
+        return manager
+
+    def _release_manager(self, manager):
+        """Закрытие браузеров исполнителя"""
+        with self.lock:
+            if manager in self.managers:
+                self.managers.remove(manager)
+        manager.stop()
+
+    def _worker_loop(self, worker_id):
+        """Цикл исполнителя: берет семьи и повторы из очереди, пока они не закончатся"""
+        manager = self._create_manager(worker_id)
+
+        try:
+            while self.is_running():
+                task = self.scheduler.get(self.is_running)
+                if task is None:
+                    break
+                settled = []
+                try:
+                    has_browser = self._run_task(manager, task, worker_id, settled)
+                finally:
+                    # Задача не должна навсегда остаться "в работе" - иначе другие исполнители будут ждать ее
+                    if not settled:
+                        self.scheduler.complete(task)
+                if not has_browser:
+                    return
+
+                if self.pause > 0 and self.is_running():
+                    time.sleep(self.pause)
+        finally:
+            self._release_manager(manager)
+            self._worker_exited(worker_id)
+
+    def _worker_exited(self, worker_id):
+        """Последний исполнитель сообщает о семьях, которые остались в очереди без браузеров"""
+        with self.lock:
+            self.workers_alive -= 1
+            last = self.workers_alive == 0
+        if not last or not self.is_running():
+            return
+        for index, family, attempt in self.scheduler.drain():
+            self.log(f"❌ Семья {index + 1}: не обработана - не удалось запустить ни один браузер")
+            if self.on_family_finished:
+                self.on_family_finished(index, family, False, worker_id)
+
+    def _acquire(self, manager, worker_id):
+        """Браузер исполнителя; запуск повторяется до ACQUIRE_ATTEMPTS раз (None - не удалось)"""
+        replace = self.recycle_next.pop(worker_id, False)
+        for attempt in range(1, self.ACQUIRE_ATTEMPTS + 1):
+            filler = manager.replace_active() if replace and attempt == 1 else manager.acquire()
+            if filler is not None or not self.is_running():
+                return filler
+            if attempt < self.ACQUIRE_ATTEMPTS:
+                self.log(f"⚠️ Браузер {worker_id}: не удалось запустить (попытка {attempt} из "
+                         f"{self.ACQUIRE_ATTEMPTS}), повтор через {self.ACQUIRE_DELAY} сек")
+                deadline = time.monotonic() + self.ACQUIRE_DELAY
+                while self.is_running() and time.monotonic() < deadline:
+                    time.sleep(0.2)
+        self.log(f"❌ Браузер {worker_id}: не удалось запустить, исполнитель завершается")
+        return None
+
+    def _run_task(self, manager, task, worker_id, settled):
+        """Одна попытка обработки семьи; результат передается в очередь повторов
+
+        В settled добавляется отметка, как только задача сдана в очередь.
+        Возвращает False, если браузер создать не удалось.
+        """
+        index, family, attempt = task
+
+        # Проверка браузера перед семьей: упавший заменяется запасным
+        filler = self._acquire(manager, worker_id)
+        if filler is None:
+            # Возвращаем семью в очередь для других исполнителей
+            self.scheduler.release(task)
+            settled.append(True)
+            return False
+
+        if self.on_family_started:
+            self.on_family_started(index, family, worker_id)
+
+        success = False
+        try:
+            success = filler.process_family(family, index + 1)
+        except Exception as e:
+            self.log(f"❌ Браузер {worker_id}: ошибка обработки семьи {index + 1}: {e}")
+            self.log(f"📋 Трассировка:\n{traceback.format_exc()}")
+            filler.last_error = e
+        manager.family_finished()
+
+        deferred_reason = getattr(filler, 'deferred_reason', None)
+        decision = None
+        if success or deferred_reason or not self.is_running():
+            self.scheduler.complete(task)
+        else:
+            decision = self.scheduler.report(task, classify_failure(filler))
+        settled.append(True)
+
+        if decision and decision['retry']:
+            if decision['recycle']:
+                self.recycle_next[worker_id] = True
+            self.log(f"🔄 Семья {index + 1}: {decision['label']} - повтор (попытка {decision['attempt']}"
+                     + (f", через {decision['delay']} сек" if decision['delay'] else "")
+                     + (", с новым браузером" if decision['recycle'] else "") + ")")
+            return True
+
+        if deferred_reason and self.on_family_deferred:
+            # Семья ждет оператора, повтор без него ничего не даст
+            self.on_family_deferred(index, family, deferred_reason, filler.deferred_cards, worker_id)
+        elif self.on_family_finished:
+            if decision:
+                self.log(f"⛔ Семья {index + 1}: {decision['label']} - без повтора")
+            self.on_family_finished(index, family, success, worker_id)
+        return True
@@ -0,0 +1,27 @@
+import unittest
+
+from utils.fio_index import FioIndex
+
+
+class TestSamePerson(unittest.TestCase):
+
+    def test_other_first_name_is_not_picked(self):
+        """Другое имя при той же фамилии - другой человек"""
+        index = FioIndex({"Иванова Марина Петровна": {}})
+        self.assertIsNone(index.same_person("Иванова Мария Петровна"))
+        self.assertIsNone(index.same_person("Иванова Мария"))
+
+    def test_surname_typo_is_picked(self):
+        """Опечатка в одну букву только в фамилии, ё/е и латиница"""
+        index = FioIndex({"Семёнова Алёна Петровна": {}, "Иванова Марина Петровна": {}})
+        self.assertEqual(index.same_person("Семенва Алена Петровна"), "Семёнова Алёна Петровна")
+        self.assertEqual(index.same_person("", "Иваноba Марина Петровна"), "Иванова Марина Петровна")
+
+    def test_two_candidates_are_not_picked(self):
+        """Две записи, подходящие по правилу, - неоднозначно"""
+        index = FioIndex({"Ивакова Мария Петровна": {}, "Иваноба Мария Петровна": {}})
+        self.assertIsNone(index.same_person("Иванова Мария Петровна"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+
+from mass_processor.form_layout import card_fio_matches, pick_card_by_fio
+
+
+class TestPickCardByFio(unittest.TestCase):
+
+    SEARCH_FIO = "Иванова Мария Петровна"
+
+    def test_different_patronymic_goes_to_operator(self):
+        """Карточка с другим отчеством не выбирается автоматически"""
+        cards = [{'fio': "Иванова Мария Павловна"}, {'fio': "Сидорова Анна Ивановна"}]
+        self.assertFalse(card_fio_matches(self.SEARCH_FIO, "Иванова Мария Павловна"))
+        self.assertIsNone(pick_card_by_fio(self.SEARCH_FIO, cards))
+
+    def test_surname_typo_with_other_candidate_goes_to_operator(self):
+        """Две карточки, подходящие по правилу, - выбирает оператор"""
+        cards = [{'fio': "Ивакова Мария Петровна"}, {'fio': "Иванова Мария Петровна"}]
+        self.assertIsNone(pick_card_by_fio(self.SEARCH_FIO, cards))
+
+    def test_single_matching_card_is_picked(self):
+        """Ровно одна карточка того же человека (ё/е, латиница, опечатка в фамилии)"""
+        cards = [{'fio': "Иванова Мария Павловна"}, {'fio': "Ивaнова Мария Петровна"}]
+        self.assertIs(pick_card_by_fio(self.SEARCH_FIO, cards), cards[1])
+        self.assertTrue(card_fio_matches("Семёнова Алёна Петровна", "Семенова Алена Петровна"))
+        self.assertTrue(card_fio_matches(self.SEARCH_FIO, "Иваова Мария Петровна"))
+        self.assertFalse(card_fio_matches(self.SEARCH_FIO, "Ивакина Мария Петровна"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,9 +2,30 @@
 
 import re
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
+from functools import lru_cache
 from dateutil import parser
 
+# Текущий год - верхняя граница допустимых дат (вычисляется один раз)
+CURRENT_YEAR = datetime.now().year
+
+# Форматы дат в порядке проверки
+DATE_FORMATS = (
+    '%d.%m.%Y', '%d/%m/%Y', '%d-%m-%Y',
+    '%Y.%m.%d', '%Y/%m/%d', '%Y-%m-%d',
+    '%d.%m.%y', '%d/%m/%y', '%d-%m-%y',
+    '%m/%d/%Y', '%m/%d/%y'
+)
+
+# Быстрые пути: ДД.ММ.ГГГГ и ГГГГ-ММ-ДД (в том числе str() от Timestamp)
+DMY_PATTERN = re.compile(r'^(\d{1,2})\.(\d{1,2})\.(\d{4})$')
+ISO_PATTERN = re.compile(r'^(\d{4})-(\d{1,2})-(\d{1,2})(?:[ T]00:00:00)?$')
+OVERLONG_YEAR_PATTERN = re.compile(r'(\d{1,2}\.\d{1,2}\.)(\d{4})\d+')
+DATE_JUNK_PATTERN = re.compile(r'[^\d./]+')
+
+# Начало отсчета дат Excel (серийный номер 1 - 01.01.1900 с учетом ошибки 1900 года)
+EXCEL_EPOCH = datetime(1899, 12, 30)
+
 
 def clean_string(text):
     """Очистка строки от специальных символов и нормализация пробелов"""
@@ -51,13 +72,16 @@ def clean_date(date_str):
     """Очистка и валидация даты"""
     if not isinstance(date_str, str):
         return date_str
-    
+    return _clean_date_string(date_str)
+
+
+@lru_cache(maxsize=65536)
+def _clean_date_string(date_str):
     date_str = clean_string(date_str)
     
     # Обработка ошибки с датой в формате 28.12.202026 (оставляем первые 4 числа года)
     # Находим паттерн DD.MM.YYYY где YYYY содержит больше 4 цифр
-    pattern = r'(\d{1,2}\.\d{1,2}\.)(\d{4})\d+'
-    match = re.match(pattern, date_str)
+    match = OVERLONG_YEAR_PATTERN.match(date_str)
     if match:
         day_month = match.group(1)
         year = match.group(2)
@@ -71,17 +95,17 @@ def clean_date(date_str):
             try:
                 month, day, year = map(int, parts)
                 # Проверяем валидность
-                if 1 <= month <= 12 and 1 <= day <= 31 and 1900 <= year <= datetime.now().year:
+                if 1 <= month <= 12 and 1 <= day <= 31 and 1900 <= year <= CURRENT_YEAR:
                     # Преобразуем в DD.MM.YYYY
                     return f"{day:02d}.{month:02d}.{year}"
             except:
                 pass
     
     # Обработка формата DD.MM.YYYY
-    if re.match(r'^\d{1,2}\.\d{1,2}\.\d{4}$', date_str):
+    if DMY_PATTERN.match(date_str):
         try:
             day, month, year = map(int, date_str.split('.'))
-            if 1 <= day <= 31 and 1 <= month <= 12 and 1900 <= year <= datetime.now().year:
+            if 1 <= day <= 31 and 1 <= month <= 12 and 1900 <= year <= CURRENT_YEAR:
                 return f"{day:02d}.{month:02d}.{year}"
         except:
             pass
@@ -107,7 +131,7 @@ def clean_date(date_str):
                 pass
     
     # Убираем все лишние символы, кроме цифр и точек и слэшей
-    date_str = re.sub(r'[^\d./]+', '', date_str)
+    date_str = DATE_JUNK_PATTERN.sub('', date_str)
     
     return date_str
 
@@ -191,37 +215,138 @@ def clean_family_data(family_data):
 
 
 def parse_date(date_string):
-    """Парсинг даты из различных форматов"""
-    if not date_string or pd.isna(date_string) or str(date_string).lower() in ['nan', 'nat', 'none', '']:
+    """Парсинг даты из различных форматов
+
+    Принимает строку, datetime/Timestamp или серийный номер даты Excel.
+    Результаты разбора строк запоминаются: одинаковые даты разбираются один раз.
+    """
+    if isinstance(date_string, (datetime, pd.Timestamp)):
+        if pd.isna(date_string):
+            return ""
+        if 1900 <= date_string.year <= CURRENT_YEAR:
+            return date_string.strftime('%d.%m.%Y')
+    elif isinstance(date_string, (int, float)) and not isinstance(date_string, bool):
+        if pd.isna(date_string):
+            return ""
+        serial_date = _excel_serial_date(date_string)
+        if serial_date:
+            return serial_date
+    if not date_string or pd.isna(date_string):
         return ""
+    return _parse_date_string(str(date_string).strip())
+
+
+@lru_cache(maxsize=65536)
+def _parse_date_string(date_string):
+    if date_string.lower() in ['nan', 'nat', 'none', '']:
+        return ""
+    
+    # Быстрые пути без перебора форматов
+    match = DMY_PATTERN.match(date_string)
+    if match:
+        result = _format_date(int(match.group(3)), int(match.group(2)), int(match.group(1)))
+        if result:
+            return result
+    match = ISO_PATTERN.match(date_string)
+    if match:
+        result = _format_date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        if result:
+            return result
+    
     try:
-        date_string = str(date_string).strip()
-        if isinstance(date_string, (datetime, pd.Timestamp)):
-            return date_string.strftime('%d.%m.%Y')
-        
-        formats = [
-            '%d.%m.%Y', '%d/%m/%Y', '%d-%m-%Y',
-            '%Y.%m.%d', '%Y/%m/%d', '%Y-%m-%d',
-            '%d.%m.%y', '%d/%m/%y', '%d-%m-%y',
-            '%m/%d/%Y', '%m/%d/%y'  # Добавлен формат MM/DD/YYYY
-        ]
-        
-        for fmt in formats:
+        for fmt in DATE_FORMATS:
             try:
                 dt = datetime.strptime(date_string, fmt)
-                if 1900 <= dt.year <= datetime.now().year:
+                if 1900 <= dt.year <= CURRENT_YEAR:
                     return dt.strftime('%d.%m.%Y')
             except:
                 continue
         
         dt = parser.parse(date_string, dayfirst=True, yearfirst=False, fuzzy=True)
-        if 1900 <= dt.year <= datetime.now().year:
+        if 1900 <= dt.year <= CURRENT_YEAR:
             return dt.strftime('%d.%m.%Y')
     except:
         pass
     return clean_date(date_string)
 
 
+def _format_date(year, month, day):
+    """ДД.ММ.ГГГГ для существующей даты в допустимом диапазоне, иначе None"""
+    if not 1900 <= year <= CURRENT_YEAR:
+        return None
+    try:
+        return datetime(year, month, day).strftime('%d.%m.%Y')
+    except ValueError:
+        return None
+
+
+def _excel_serial_date(value):
+    """Дата по серийному номеру Excel; None, если число похоже на год или вне диапазона"""
+    if 1900 <= value <= CURRENT_YEAR:
+        # Год без дня и месяца разбирается как строка
+        return None
+    try:
+        dt = EXCEL_EPOCH + timedelta(days=int(value))
+    except (OverflowError, ValueError):
+        return None
+    if 1900 <= dt.year <= CURRENT_YEAR and value >= 1:
+        return dt.strftime('%d.%m.%Y')
+    return None
+
+
+def sniff_date_format(values, sample_size=50):
+    """Формат, которым разбираются все строковые значения выборки, или None"""
+    sample = []
+    for value in values:
+        if isinstance(value, str) and value.strip():
+            sample.append(value.strip())
+            if len(sample) >= sample_size:
+                break
+    if not sample:
+        return None
+    
+    for fmt in DATE_FORMATS:
+        try:
+            if all(1900 <= datetime.strptime(value, fmt).year <= CURRENT_YEAR for value in sample):
+                return fmt
+        except ValueError:
+            continue
+    return None
+
+
+def parse_date_series(values):
+    """Пакетный парсинг столбца дат (pandas Series)
+
+    Формат строк определяется один раз по выборке столбца, каждое уникальное
+    значение разбирается один раз; значения, не подходящие под формат,
+    разбираются parse_date. Пустые ячейки - пустая строка.
+    """
+    values = pd.Series(values, dtype=object)
+    result = pd.Series("", index=values.index, dtype=object)
+    present = values.notna()
+    if not present.any():
+        return result
+    
+    unique_values = pd.unique(values[present])
+    fmt = sniff_date_format(unique_values)
+    parsed = {}
+    for value in unique_values:
+        parsed[value] = _parse_with_format(value, fmt) if fmt else parse_date(value)
+    result[present] = values[present].map(parsed)
+    return result
+
+
+def _parse_with_format(value, fmt):
+    if isinstance(value, str):
+        try:
+            dt = datetime.strptime(value.strip(), fmt)
+            if 1900 <= dt.year <= CURRENT_YEAR:
+                return dt.strftime('%d.%m.%Y')
+        except ValueError:
+            pass
+    return parse_date(value)
+
+
 def format_phone(phone_string):
     """Форматирование телефона в формат 7XXXXXXXXXX"""
     return clean_phone(phone_string)
\ No newline at end of file
@@ -1,14 +1,20 @@
 """Утилиты для работы с Excel файлами"""
 
-import re
 import pandas as pd
 import os
 from datetime import datetime
-from utils.data_processing import clean_string, clean_fio, clean_date, clean_phone, clean_address, parse_date
+from functools import lru_cache
+from utils.data_processing import clean_string, clean_fio, clean_phone, clean_address, parse_date, parse_date_series
 
 
 def load_register_file(file_path):
-    """Загрузка реестра многодетных из xls/xlsx файла"""
+    """Загрузка реестра многодетных из xls/xlsx файла
+
+    Строка семьи - номер в первом столбце; следующие за ней строки без номера,
+    но с ФИО в столбце 11 - остальные члены семьи. Столбцы очищаются целиком
+    (каждое уникальное значение - один раз), а строки членов семьи относятся
+    к своей семье по ключу группы (номер строки семьи, протянутый вниз).
+    """
     try:
         file_ext = os.path.splitext(file_path)[1].lower()
         
@@ -17,84 +23,77 @@ def load_register_file(file_path):
         else:
             df = pd.read_excel(file_path, header=None)
         
+        # Первая строка - заголовок
+        df = df.iloc[1:]
+        if df.empty:
+            return {}
+        
+        first = _raw_text_column(df, 0)
+        member_surname_raw = _raw_text_column(df, 11)
+        
+        surname = _text_column(df, 1)
+        name = _text_column(df, 2)
+        patronymic = _text_column(df, 3)
+        fio_full = (surname + ' ' + name + ' ' + patronymic).str.split().str.join(' ')
+        
+        # Строки семей: номер в первом столбце и непустое ФИО
+        is_family = first.str.fullmatch(r'\d+') & (fio_full != "")
+        # Продолжение семьи: без номера, но с ФИО члена семьи
+        is_continuation = (first == "") & (member_surname_raw != "")
+        
+        # Ключ группы: позиция строки семьи, протянутая вниз по строкам продолжения;
+        # любая другая строка (пустая, без ФИО, семья без ФИО) обрывает группу
+        positions = pd.Series(range(1, len(df) + 1), index=df.index, dtype='float64')
+        group = positions.where(is_family, other=float('nan'))
+        group = group.where(is_family | is_continuation, other=-1).ffill().fillna(-1).astype(int)
+        
+        birth_date = _date_column(df, 4)
+        phone = _raw_text_column(df, 10, strip=False).map(_memoized(clean_phone))
+        address_columns = [_text_column(df, column) for column in range(5, 10)]
+        
+        # Члены семьи из столбцов 11-14 строк семьи и строк продолжения
+        member_rows = (group >= 0) & (member_surname_raw != "")
+        members = {}
+        if member_rows.any():
+            member_name_raw = _raw_text_column(df, 12)[member_rows]
+            member_patronymic_raw = _raw_text_column(df, 13)[member_rows]
+            member_fio = (member_surname_raw[member_rows] + ' ' + member_name_raw + ' ' + member_patronymic_raw)
+            member_fio = member_fio.str.strip().map(_memoized(clean_fio))
+            for key, member_surname, member_name, member_patronymic, member_birth, fio in zip(
+                    group[member_rows],
+                    _text_column(df, 11)[member_rows],
+                    _text_column(df, 12)[member_rows],
+                    _text_column(df, 13)[member_rows],
+                    _date_column(df, 14)[member_rows],
+                    member_fio):
+                members.setdefault(key, []).append({
+                    'surname': member_surname,
+                    'name': member_name,
+                    'patronymic': member_patronymic,
+                    'birth_date': member_birth,
+                    'fio_full': fio
+                })
+        
         register_data = {}
-        i = 1
-        while i < len(df):
-            try:
-                row = df.iloc[i]
-                if row.isnull().all():
-                    i += 1
-                    continue
-                
-                if not pd.isna(row[0]) and str(row[0]).strip() and re.match(r'^\d+$', str(row[0]).strip()):
-                    phone_raw = str(row[10]) if len(row) > 10 and not pd.isna(row[10]) else ""
-                    phone = clean_phone(phone_raw)
-                    
-                    main_person = {
-                        'surname': clean_string(str(row[1]).strip()) if not pd.isna(row[1]) else "",
-                        'name': clean_string(str(row[2]).strip()) if not pd.isna(row[2]) else "",
-                        'patronymic': clean_string(str(row[3]).strip()) if not pd.isna(row[3]) else "",
-                        'birth_date': parse_date(str(row[4])) if not pd.isna(row[4]) else "",
-                        'phone': phone
-                    }
-                    
-                    fio_parts = [main_person['surname'], main_person['name'], main_person['patronymic']]
-                    fio_full = ' '.join([p for p in fio_parts if p])
-                    if not fio_full:
-                        i += 1
-                        continue
-                    
-                    address_info = {
-                        'region': clean_string(str(row[5]).strip()) if len(row) > 5 and not pd.isna(row[5]) else "",
-                        'index': clean_string(str(row[6]).strip()) if len(row) > 6 and not pd.isna(row[6]) else "",
-                        'city': clean_string(str(row[7]).strip()) if len(row) > 7 and not pd.isna(row[7]) else "",
-                        'street': clean_string(str(row[8]).strip()) if len(row) > 8 and not pd.isna(row[8]) else "",
-                        'house': clean_string(str(row[9]).strip()) if len(row) > 9 and not pd.isna(row[9]) else ""
-                    }
-                    
-                    family_members = []
-                    
-                    if len(row) > 11 and not pd.isna(row[11]) and str(row[11]).strip():
-                        family_members.append({
-                            'surname': clean_string(str(row[11]).strip()),
-                            'name': clean_string(str(row[12]).strip()) if len(row) > 12 and not pd.isna(row[12]) else "",
-                            'patronymic': clean_string(str(row[13]).strip()) if len(row) > 13 and not pd.isna(row[13]) else "",
-                            'birth_date': parse_date(str(row[14])) if len(row) > 14 and not pd.isna(row[14]) else "",
-                            'fio_full': clean_fio(f"{str(row[11]).strip()} {str(row[12]).strip() if len(row) > 12 and not pd.isna(row[12]) else ''} {str(row[13]).strip() if len(row) > 13 and not pd.isna(row[13]) else ''}".strip())
-                        })
-                    
-                    j = i + 1
-                    while j < len(df):
-                        next_row = df.iloc[j]
-                        if (pd.isna(next_row[0]) or str(next_row[0]).strip() == "") and \
-                        len(next_row) > 11 and not pd.isna(next_row[11]) and str(next_row[11]).strip():
-                            family_members.append({
-                                'surname': clean_string(str(next_row[11]).strip()),
-                                'name': clean_string(str(next_row[12]).strip()) if len(next_row) > 12 and not pd.isna(next_row[12]) else "",
-                                'patronymic': clean_string(str(next_row[13]).strip()) if len(next_row) > 13 and not pd.isna(next_row[13]) else "",
-                                'birth_date': parse_date(str(next_row[14])) if len(next_row) > 14 and not pd.isna(row[14]) else "",
-                                'fio_full': clean_fio(f"{str(next_row[11]).strip()} {str(next_row[12]).strip() if len(next_row) > 12 and not pd.isna(next_row[12]) else ''} {str(next_row[13]).strip() if len(next_row) > 13 and not pd.isna(next_row[13]) else ''}".strip())
-                            })
-                            j += 1
-                        else:
-                            break
-                    
-                    register_data[fio_full] = {
-                        'main_person': main_person,
-                        'family_members': family_members,
-                        'address': address_info,
-                        'row_index': i
-                    }
-                    
-                    i = j
-                else:
-                    i += 1
-            except Exception as e:
-                print(f"Ошибка обработки строки {i}: {e}")
-                import traceback
-                traceback.print_exc()
-                i += 1
-                continue
+        family_rows = zip(
+            positions[is_family].astype(int), fio_full[is_family],
+            surname[is_family], name[is_family], patronymic[is_family],
+            birth_date[is_family], phone[is_family],
+            *(column[is_family] for column in address_columns)
+        )
+        for row_index, fio, *person, region, index, city, street, house in family_rows:
+            register_data[fio] = {
+                'main_person': dict(zip(('surname', 'name', 'patronymic', 'birth_date', 'phone'), person)),
+                'family_members': members.get(row_index, []),
+                'address': {
+                    'region': region,
+                    'index': index,
+                    'city': city,
+                    'street': street,
+                    'house': house
+                },
+                'row_index': row_index
+            }
         
         return register_data
     except Exception as e:
@@ -104,6 +103,42 @@ def load_register_file(file_path):
         return {}
 
 
+def _memoized(function):
+    """Функция очистки с запоминанием: одинаковые значения столбца обрабатываются один раз"""
+    cache = {}
+    
+    def wrapper(value):
+        try:
+            return cache[value]
+        except KeyError:
+            result = cache[value] = function(value)
+            return result
+    return wrapper
+
+
+def _raw_text_column(df, column, strip=True):
+    """Столбец как строки (пустая строка для пустых ячеек и отсутствующего столбца)"""
+    if column not in df.columns:
+        return pd.Series("", index=df.index, dtype=object)
+    values = df[column]
+    text = values.astype(str)
+    if strip:
+        text = text.str.strip()
+    return text.where(values.notna(), "")
+
+
+def _text_column(df, column):
+    """Столбец, очищенный clean_string"""
+    return _raw_text_column(df, column).map(_memoized(clean_string))
+
+
+def _date_column(df, column):
+    """Столбец дат в формате ДД.ММ.ГГГГ"""
+    if column not in df.columns:
+        return pd.Series("", index=df.index, dtype=object)
+    return parse_date_series(df[column])
+
+
 def load_adpi_file(file_path):
     """Загрузка данных АДПИ из xlsx файла"""
     try:
@@ -163,6 +198,7 @@ def load_adpi_file(file_path):
         return {}
 
 
+@lru_cache(maxsize=65536)
 def parse_adpi_date(date_string):
     """Парсинг даты из АДПИ файла с обработкой двух дат"""
     if not date_string:
@@ -202,32 +238,7 @@ def parse_adpi_date(date_string):
 
 def parse_single_date(date_string):
     """Парсинг одной даты"""
-    try:
-        # Пробуем разные форматы
-        formats = [
-            '%d.%m.%Y', '%d/%m/%Y', '%d-%m-%Y',
-            '%Y.%m.%d', '%Y/%m/%d', '%Y-%m-%d',
-            '%d.%m.%y', '%d/%m/%y', '%d-%m-%y',
-            '%m/%d/%Y', '%m/%d/%y'
-        ]
-        
-        for fmt in formats:
-            try:
-                dt = datetime.strptime(date_string, fmt)
-                if 1900 <= dt.year <= datetime.now().year:
-                    return dt.strftime('%d.%m.%Y')
-            except:
-                continue
-        
-        # Пробуем с dateutil
-        from dateutil import parser
-        dt = parser.parse(date_string, dayfirst=True, yearfirst=False, fuzzy=True)
-        if 1900 <= dt.year <= datetime.now().year:
-            return dt.strftime('%d.%m.%Y')
-    except:
-        pass
-    
-    return clean_date(date_string)
+    return parse_date(date_string)
 
 
 def normalize_fio(fio):
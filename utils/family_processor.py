@@ -2,7 +2,8 @@
 
 from utils.data_processing import clean_family_data, clean_fio, clean_date, clean_string
 from utils.validation import validate_family_data
-from utils.excel_utils import load_register_file, load_adpi_file, parse_adpi_date, parse_single_date, normalize_fio, is_fio_similar
+from utils.excel_utils import load_register_file, load_adpi_file, parse_adpi_date, parse_single_date
+from utils.fio_index import FioIndex
 from datetime import datetime
 import json
 
@@ -20,6 +21,39 @@ class FamilyDataProcessor:
         
         # Константа для единого пособия
         self.BASE_UNIFIED_BENEFIT = 17000
+    
+    @property
+    def register_data(self):
+        return self._register_data
+    
+    @register_data.setter
+    def register_data(self, value):
+        # Индекс ФИО строится заново для каждого загруженного реестра
+        self._register_data = value
+        self._register_index = None
+    
+    @property
+    def register_index(self):
+        """Индекс ФИО реестра (строится при первом поиске после загрузки)"""
+        if self._register_index is None:
+            self._register_index = FioIndex(self._register_data or {})
+        return self._register_index
+    
+    @property
+    def adpi_data(self):
+        return self._adpi_data
+    
+    @adpi_data.setter
+    def adpi_data(self, value):
+        self._adpi_data = value
+        self._adpi_index = None
+    
+    @property
+    def adpi_index(self):
+        """Индекс ФИО данных АДПИ (строится при первом поиске после загрузки)"""
+        if self._adpi_index is None:
+            self._adpi_index = FioIndex(self._adpi_data or {})
+        return self._adpi_index
         
     def collect_family_data(self, form_data):
         """Сбор данных из формы в словарь"""
@@ -354,15 +388,11 @@ class FamilyDataProcessor:
         if not search_fio:
             return None, "Введите ФИО матери или отца в форме или в поле поиска"
         
-        # Ищем все совпадения
-        exact_matches = []
-        similar_matches = []
-        
-        for fio_key in self.register_data.keys():
-            if normalize_fio(search_fio) == normalize_fio(fio_key):
-                exact_matches.append((fio_key, self.register_data[fio_key]))
-            elif is_fio_similar(search_fio, fio_key):
-                similar_matches.append((fio_key, self.register_data[fio_key]))
+        # Ищем все совпадения по индексу: точные и похожие (с той же фамилией)
+        exact_keys = self.register_index.exact(search_fio)
+        exact_matches = [(fio_key, self.register_data[fio_key]) for fio_key in exact_keys]
+        similar_matches = [(fio_key, self.register_data[fio_key])
+                           for fio_key in self.register_index.similar(search_fio) if fio_key not in exact_keys]
         
         # Обработка случая, когда найдено несколько семей
         if len(exact_matches) > 1:
@@ -379,7 +409,13 @@ class FamilyDataProcessor:
                 found_data = similar_matches[0][1]
                 found_fio = similar_matches[0][0]
         else:
-            return None, f"Семья с ФИО '{search_fio}' не найдена в реестре"
+            # Опечатка в фамилии (ё/е, латиница) - только тот же человек: имя и отчество совпадают
+            found_fio = self.register_index.same_person(search_fio)
+            if found_fio is None:
+                return None, f"Семья с ФИО '{search_fio}' не найдена в реестре"
+            found_data = self.register_data[found_fio]
+            filled_data = self.fill_from_register_data(found_data, found_fio)
+            return filled_data, f"Семья автоопределена по ФИО с опечаткой в фамилии: {found_fio}"
         
         # Заполняем данные из реестра
         filled_data = self.fill_from_register_data(found_data, found_fio)
@@ -403,14 +439,13 @@ class FamilyDataProcessor:
                 break
         
         if not found_data:
-            for fio_key in self.adpi_data.keys():
-                for search_fio in [mother_fio, father_fio]:
-                    if search_fio and is_fio_similar(search_fio, fio_key):
-                        found_data = self.adpi_data[fio_key]
-                        found_for = fio_key
-                        break
-                if found_data:
-                    break
+            fio_key = self.adpi_index.first_similar(mother_fio, father_fio)
+            if fio_key is None:
+                # Опечатка в фамилии (ё/е, латиница) - только тот же человек
+                fio_key = self.adpi_index.same_person(mother_fio, father_fio)
+            if fio_key is not None:
+                found_data = self.adpi_data[fio_key]
+                found_for = fio_key
         
         if found_data:
             filled_data = {
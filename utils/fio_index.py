@@ -0,0 +1,99 @@
+"""Индекс ФИО для поиска семей в загруженном реестре и файле АДПИ
+
+Строится один раз на загруженный файл: нормализованное ФИО -> ключи, фамилия ->
+ключи и слово ФИО -> ключи. Точный поиск - одно обращение к словарю, а похожие
+ФИО (правило is_fio_similar: та же фамилия и совпадение имени или отчества)
+выбираются только из ключей с той же фамилией. Если ни точных, ни похожих
+нет, нечеткий поиск (опечатки, ё/е, двойные фамилии) - через FuzzyFioMatcher,
+который строится при первом нечетком поиске. Для заполнения формы берется
+только тот же человек (same_person: опечатка допускается лишь в фамилии).
+"""
+
+from collections import defaultdict
+
+from utils.excel_utils import normalize_fio
+from utils.fuzzy_fio import FuzzyFioMatcher, MIN_SCORE, is_same_person
+
+
+class FioIndex:
+    """Индекс ключей словаря {ФИО: данные} (register_data, adpi_data)"""
+
+    def __init__(self, entries):
+        self.entries = entries
+        # Порядок ключей в файле: при нескольких совпадениях выбирается первое
+        self.positions = {}
+        self.by_fio = defaultdict(list)
+        self.by_surname = defaultdict(list)
+        self.postings = defaultdict(set)
+        self.matcher = None
+
+        for position, key in enumerate(entries):
+            parts = normalize_fio(key).split()
+            if not parts:
+                continue
+            self.positions[key] = position
+            self.by_fio[' '.join(parts)].append(key)
+            self.by_surname[parts[0]].append(key)
+            for part in set(parts):
+                self.postings[part].add(key)
+
+    def exact(self, fio):
+        """Ключи с тем же ФИО (без учета регистра и лишних пробелов)"""
+        return list(self.by_fio.get(normalize_fio(fio or ""), []))
+
+    def similar(self, fio):
+        """Ключи, похожие на ФИО по правилу is_fio_similar, в порядке файла"""
+        parts = normalize_fio(fio or "").split()
+        if not parts:
+            return []
+        candidates = self.by_surname.get(parts[0], [])
+        if len(parts) == 1:
+            return list(candidates)
+
+        matching = set()
+        for part in parts[1:]:
+            matching |= self.postings.get(part, set())
+        return [key for key in candidates if key in matching]
+
+    def first_similar(self, *fios):
+        """Первый по порядку файла ключ, похожий на любое из ФИО, или None"""
+        found = set()
+        for fio in fios:
+            if fio:
+                found.update(self.similar(fio))
+        if not found:
+            return None
+        return min(found, key=self.positions.__getitem__)
+
+    def fuzzy(self, fio, limit=5, min_score=MIN_SCORE):
+        """Нечеткий поиск: [(ключ, оценка)] по убыванию оценки"""
+        return self._fuzzy_matcher().search(fio, limit=limit, min_score=min_score)
+
+    def best_fuzzy(self, *fios, min_score=MIN_SCORE):
+        """Лучший нечеткий кандидат (ключ, оценка) для любого из ФИО, если он однозначен, иначе None"""
+        best = None
+        for fio in fios:
+            if not fio:
+                continue
+            found = self._fuzzy_matcher().best(fio, min_score=min_score)
+            if found and (best is None or found[1] > best[1]):
+                best = found
+        return best
+
+    def same_person(self, *fios):
+        """Единственный ключ того же человека (is_same_person: опечатка только в фамилии) для первого из ФИО, у которого он есть, или None"""
+        for fio in fios:
+            if not fio:
+                continue
+            keys = [key for key, _ in self.fuzzy(fio, limit=0, min_score=0) if is_same_person(fio, key)]
+            if len(keys) == 1:
+                return keys[0]
+        return None
+
+    def _fuzzy_matcher(self):
+        if self.matcher is None:
+            self.matcher = FuzzyFioMatcher((key, key) for key in self.positions)
+        return self.matcher
+
+    def __len__(self):
+        return len(self.positions)
@@ -0,0 +1,203 @@
+"""Нечеткое сравнение и поиск ФИО
+
+Точное сравнение ФИО пропускает семьи из-за ё/е, латинских букв, похожих на
+русские (набраны в другой раскладке), двойных фамилий и опечаток в одну букву.
+Здесь ФИО сравниваются по частям (фамилия, имя, отчество) с весами и
+расстоянием Левенштейна с перестановками, а поиск кандидатов идет по индексу
+вариантов фамилии без одной буквы: фамилия с опечаткой в одну букву (замена,
+пропуск, лишняя буква, перестановка соседних) дает общий вариант с верной,
+поэтому поиск - несколько обращений к словарю даже на сотнях тысяч ФИО.
+"""
+
+import re
+from functools import lru_cache
+
+# Латинские буквы, похожие на русские, и ё -> е
+HOMOGLYPHS = str.maketrans({
+    'a': 'а', 'b': 'в', 'c': 'с', 'e': 'е', 'h': 'н', 'k': 'к', 'm': 'м',
+    'o': 'о', 'p': 'р', 't': 'т', 'x': 'х', 'y': 'у', 'ё': 'е',
+})
+WORD_PART_PATTERN = re.compile(r'[а-яa-z]+')
+
+# Веса частей ФИО в общей оценке
+WEIGHTS = (0.5, 0.3, 0.2)
+# Оценка части, которой нет у кандидата (неизвестно, совпадает ли)
+MISSING_PART_SCORE = 0.5
+# Фамилия похожа меньше - это другой человек, независимо от имени и отчества
+MIN_SURNAME_SCORE = 0.75
+# Минимальная оценка кандидата по умолчанию
+MIN_SCORE = 0.85
+# Сколько букв фамилии может отличаться у того же человека (is_same_person)
+MAX_SURNAME_EDITS = 1
+
+
+def split_fio(fio):
+    """ФИО по частям: (части фамилии, имя, отчество); двойная фамилия - несколько частей"""
+    words = []
+    for word in (fio or '').lower().translate(HOMOGLYPHS).split():
+        parts = WORD_PART_PATTERN.findall(word)
+        if parts:
+            words.append(tuple(parts))
+    if not words:
+        return (), '', ''
+    name = ''.join(words[1]) if len(words) > 1 else ''
+    patronymic = ''.join(part for word in words[2:] for part in word)
+    return words[0], name, patronymic
+
+
+def edit_distance(first, second):
+    """Расстояние Левенштейна с перестановками соседних букв"""
+    if first == second:
+        return 0
+    if not first or not second:
+        return max(len(first), len(second))
+
+    previous2 = None
+    previous = list(range(len(second) + 1))
+    for i, char1 in enumerate(first, 1):
+        current = [i] + [0] * len(second)
+        for j, char2 in enumerate(second, 1):
+            cost = 0 if char1 == char2 else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous2 is not None and i > 1 and j > 1
+                    and char1 == second[j - 2] and first[i - 2] == char2):
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+@lru_cache(maxsize=262144)
+def word_similarity(first, second):
+    """Похожесть слов от 0 до 1: 1 - расстояние Левенштейна (с перестановками) / длина"""
+    if first == second:
+        return 1.0
+    if not first or not second:
+        return 0.0
+    # Инициал: "И" и "Иван"
+    if len(first) == 1 or len(second) == 1:
+        return 0.9 if first[0] == second[0] else 0.0
+    return max(0.0, 1.0 - edit_distance(first, second) / max(len(first), len(second)))
+
+
+def _surname_similarity(first, second):
+    """Похожесть фамилий с учетом двойных: лучшая пара частей или фамилия целиком"""
+    if not first or not second:
+        return 0.0
+    best = word_similarity(''.join(first), ''.join(second))
+    if best < 1.0 and (len(first) > 1 or len(second) > 1):
+        partial = max(word_similarity(part1, part2) for part1 in first for part2 in second)
+        # Совпала только одна часть двойной фамилии
+        best = max(best, partial * 0.95)
+    return best
+
+
+def _parts_similarity(query, candidate):
+    surname1, name1, patronymic1 = query
+    surname2, name2, patronymic2 = candidate
+    surname_score = _surname_similarity(surname1, surname2)
+    if surname_score < MIN_SURNAME_SCORE:
+        return 0.0
+    total = WEIGHTS[0] * surname_score
+    weight = WEIGHTS[0]
+    for part1, part2, part_weight in ((name1, name2, WEIGHTS[1]), (patronymic1, patronymic2, WEIGHTS[2])):
+        if not part1:
+            continue
+        weight += part_weight
+        total += part_weight * (word_similarity(part1, part2) if part2 else MISSING_PART_SCORE)
+    return total / weight
+
+
+def fio_similarity(first, second):
+    """Оценка похожести двух ФИО от 0 до 1 (части, которых нет в first, не учитываются)"""
+    query = split_fio(first)
+    if not query[0]:
+        return 0.0
+    return _parts_similarity(query, split_fio(second))
+
+
+def is_same_person(search_fio, candidate_fio, max_surname_edits=MAX_SURNAME_EDITS):
+    """Тот же человек: имя и отчество совпадают (с учетом ё/е и латиницы), фамилия - с опечаткой не больше max_surname_edits букв"""
+    surname1, name1, patronymic1 = split_fio(search_fio)
+    surname2, name2, patronymic2 = split_fio(candidate_fio)
+    if not surname1 or not name1 or name1 != name2 or patronymic1 != patronymic2:
+        return False
+    return edit_distance(''.join(surname1), ''.join(surname2)) <= max_surname_edits
+
+
+def _deletion_variants(word):
+    """Слово и все его варианты без одной буквы"""
+    variants = {word}
+    if len(word) > 2:
+        variants.update(word[:i] + word[i + 1:] for i in range(len(word)))
+    return variants
+
+
+class FuzzyFioMatcher:
+    """Индекс ФИО для нечеткого поиска: варианты фамилий без одной буквы -> ключи"""
+
+    def __init__(self, items=None):
+        # ключ -> ФИО по частям; порядок добавления - порядок при равных оценках
+        self.entries = {}
+        self.positions = {}
+        self.surname_keys = {}
+        self.variants = {}
+        if items:
+            for key, fio in items:
+                self.add(key, fio)
+
+    def add(self, key, fio):
+        """Добавление ФИО с ключом (ключ реестра, координаты ячейки и т.п.)"""
+        parts = split_fio(fio)
+        if not parts[0]:
+            return
+        self.entries[key] = parts
+        self.positions.setdefault(key, len(self.positions))
+        for surname in set(parts[0]) | {''.join(parts[0])}:
+            keys = self.surname_keys.get(surname)
+            if keys is None:
+                keys = self.surname_keys[surname] = []
+                for variant in _deletion_variants(surname):
+                    self.variants.setdefault(variant, set()).add(surname)
+            keys.append(key)
+
+    def candidates(self, surname_parts):
+        """Ключи с фамилией, отличающейся от искомой не более чем на одну букву"""
+        surnames = set()
+        for surname in set(surname_parts) | {''.join(surname_parts)}:
+            for variant in _deletion_variants(surname):
+                surnames.update(self.variants.get(variant, ()))
+        keys = {}
+        for surname in surnames:
+            for key in self.surname_keys[surname]:
+                keys[key] = True
+        return keys
+
+    def search(self, fio, limit=5, min_score=MIN_SCORE):
+        """Кандидаты [(ключ, оценка)] по убыванию оценки"""
+        query = split_fio(fio)
+        if not query[0]:
+            return []
+        scored = []
+        # Одинаковые ФИО (тезки, повторы в файле) оцениваются один раз
+        scores = {}
+        for key in self.candidates(query[0]):
+            parts = self.entries[key]
+            score = scores.get(parts)
+            if score is None:
+                score = scores[parts] = _parts_similarity(query, parts)
+            if score >= min_score:
+                scored.append((key, round(score, 3)))
+        scored.sort(key=lambda item: (-item[1], self.positions[item[0]]))
+        return scored[:limit] if limit else scored
+
+    def best(self, fio, min_score=MIN_SCORE, margin=0.05):
+        """Лучший кандидат (ключ, оценка), если он единственный с отрывом от второго, иначе None"""
+        found = self.search(fio, limit=2, min_score=min_score)
+        if not found:
+            return None
+        if len(found) > 1 and found[0][1] - found[1][1] < margin:
+            return None
+        return found[0]
+
+    def __len__(self):
+        return len(self.entries)
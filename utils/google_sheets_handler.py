@@ -34,6 +34,12 @@ except ImportError:
     sys.path.append(os.path.dirname(os.path.abspath(__file__)))
     from config_manager import get_default_config_manager, ConfigManager
 
+try:
+    from .fuzzy_fio import FuzzyFioMatcher
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from fuzzy_fio import FuzzyFioMatcher
+
 
 class GoogleSheetsHandler:
     def __init__(self, credentials_file: str):
@@ -136,11 +142,22 @@ class GoogleSheetsHandler:
             
             found_families = []
             
+            # Индекс ячеек с ФИО для нечеткого поиска (опечатки, ё/е, двойные фамилии)
+            matcher = FuzzyFioMatcher(
+                ((i, j), str(cell)) for i, row in enumerate(values) for j, cell in enumerate(row)
+                if cell and len(str(cell).split()) >= 2
+            )
+            
             # Ищем семьи по ФИО матери или отца
             for family in families:
                 mother_fio = family.get('mother_fio', '').strip().lower()
                 father_fio = family.get('father_fio', '').strip().lower()
                 
+                best_match = self._find_family_fuzzy(matcher, family, mother_fio, father_fio)
+                if best_match:
+                    found_families.append(best_match)
+                    continue
+                
                 best_match = None
                 best_score = 0
                 
@@ -186,6 +203,32 @@ class GoogleSheetsHandler:
             print(f"❌ Ошибка поиска семей в таблице: {e}")
             return []
     
+    def _find_family_fuzzy(self, matcher, family: Dict, mother_fio: str, father_fio: str) -> Optional[Dict]:
+        """
+        Нечеткий поиск ячейки с ФИО матери или отца по индексу ячеек листа
+        
+        Ячейка выбирается, только если лучший кандидат однозначен (FuzzyFioMatcher.best):
+        при двух близких по оценке ФИО (сестры, тезки) возвращается None.
+        
+        Returns:
+            Найденная семья с координатами ячейки или None
+        """
+        best_match = None
+        best_score = 0
+        for found_by, fio in (('mother', mother_fio), ('father', father_fio)):
+            if not fio:
+                continue
+            found = matcher.best(fio)
+            if found and found[1] > best_score:
+                (i, j), best_score = found
+                best_match = {
+                    'family': family,
+                    'row_index': i + 1,
+                    'found_by': found_by,
+                    'coordinates': [i + 1, j + 1]
+                }
+        return best_match
+    
     def _calculate_match_score(self, row_text: str, name: str) -> float:
         """
         Рассчитывает степень совпадения между текстом строки и именем
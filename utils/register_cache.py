@@ -0,0 +1,171 @@
+"""Кэш разобранных файлов реестра и АДПИ
+
+Разбор xls/xlsx/ods через pandas занимает секунды, а при каждом запуске
+программы загружаются одни и те же файлы. Результат разбора сохраняется в
+pickle рядом с конфигурацией; при следующей загрузке файл не разбирается, если
+совпали размер и время изменения (или, если время изменилось, хэш содержимого).
+Записи устаревшей версии формата, удаленных файлов и самые старые сверх
+MAX_ENTRIES удаляются автоматически. В файле записи сначала лежит небольшой
+заголовок (путь, размер, время, хэш), затем данные: для проверки и очистки
+кэша читается только заголовок.
+"""
+
+import hashlib
+import os
+import pickle
+import time
+
+# Версия формата кэша: увеличивается при изменении результата разбора
+CACHE_VERSION = 4
+
+
+def file_digest(file_path, chunk_size=1024 * 1024):
+    """Хэш содержимого файла"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ParsedFileCache:
+    """Кэш результатов разбора файлов по пути, размеру, времени изменения и хэшу"""
+
+    # Сколько разобранных файлов хранить
+    MAX_ENTRIES = 20
+    SUFFIX = '.pickle'
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        except Exception as e:
+            print(f"⚠️ Не удалось создать папку кэша {self.cache_dir}: {e}")
+
+    def load(self, file_path, loader, kind=None):
+        """Результат loader(file_path) из кэша или разбором файла с сохранением в кэш
+
+        kind - вид данных (по умолчанию имя функции разбора); пустой результат
+        разбора (ошибка загрузки) не кэшируется.
+        """
+        kind = kind or f"{loader.__module__}.{loader.__qualname__}"
+        file_path = os.path.abspath(file_path)
+        cache_path = self._cache_path(kind, file_path)
+
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return loader(file_path)
+
+        entry = self._read(cache_path)
+        digest = None
+        if entry is not None and entry.get('path') == file_path and entry.get('size') == stat.st_size:
+            if entry.get('mtime') == stat.st_mtime_ns:
+                entry = self._read(cache_path, with_data=True)
+                if entry is not None:
+                    print(f"⚡ {os.path.basename(file_path)}: загружено из кэша")
+                    return entry['data']
+            else:
+                # Файл скопирован или сохранен заново - сравниваем содержимое
+                digest = self._digest(file_path)
+                if digest is not None and entry.get('hash') == digest:
+                    entry = self._read(cache_path, with_data=True)
+                    if entry is not None:
+                        entry['mtime'] = stat.st_mtime_ns
+                        self._write(cache_path, entry)
+                        print(f"⚡ {os.path.basename(file_path)}: загружено из кэша (файл не изменился)")
+                        return entry['data']
+
+        data = loader(file_path)
+        if data:
+            if digest is None:
+                digest = self._digest(file_path)
+            if digest is not None:
+                self._write(cache_path, {
+                    'version': CACHE_VERSION,
+                    'kind': kind,
+                    'path': file_path,
+                    'size': stat.st_size,
+                    'mtime': stat.st_mtime_ns,
+                    'hash': digest,
+                    'saved_at': time.time(),
+                    'data': data,
+                })
+                self.evict()
+        return data
+
+    def evict(self):
+        """Удаление записей удаленных файлов, старой версии и самых старых сверх MAX_ENTRIES"""
+        try:
+            names = [name for name in os.listdir(self.cache_dir) if name.endswith(self.SUFFIX)]
+        except OSError:
+            return
+
+        alive = []
+        for name in names:
+            cache_path = os.path.join(self.cache_dir, name)
+            entry = self._read(cache_path)
+            if entry is None or not os.path.exists(entry.get('path', '')):
+                self._remove(cache_path)
+            else:
+                alive.append((entry.get('saved_at', 0), cache_path))
+
+        alive.sort(reverse=True)
+        for _, cache_path in alive[self.MAX_ENTRIES:]:
+            self._remove(cache_path)
+
+    def clear(self):
+        """Очистка кэша"""
+        try:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(self.SUFFIX):
+                    self._remove(os.path.join(self.cache_dir, name))
+        except OSError:
+            pass
+
+    def _cache_path(self, kind, file_path):
+        key = hashlib.sha1(f"{kind}|{os.path.normcase(file_path)}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key + self.SUFFIX)
+
+    @staticmethod
+    def _digest(file_path):
+        try:
+            return file_digest(file_path)
+        except OSError:
+            return None
+
+    @staticmethod
+    def _read(cache_path, with_data=False):
+        """Заголовок записи кэша (с данными при with_data) или None (нет файла, поврежден, другая версия формата)"""
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            with open(cache_path, 'rb') as file:
+                entry = pickle.load(file)
+                if not isinstance(entry, dict) or entry.get('version') != CACHE_VERSION:
+                    return None
+                if with_data:
+                    entry['data'] = pickle.load(file)
+                return entry
+        except Exception as e:
+            print(f"⚠️ Поврежденная запись кэша {os.path.basename(cache_path)}: {e}")
+        return None
+
+    @staticmethod
+    def _write(cache_path, entry):
+        try:
+            temp_path = cache_path + ".tmp"
+            header = {key: value for key, value in entry.items() if key != 'data'}
+            with open(temp_path, 'wb') as file:
+                pickle.dump(header, file, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(entry['data'], file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, cache_path)
+        except Exception as e:
+            print(f"⚠️ Ошибка записи кэша: {e}")
+
+    @staticmethod
+    def _remove(cache_path):
+        try:
+            os.remove(cache_path)
+        except OSError:
+            pass